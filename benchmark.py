@@ -0,0 +1,975 @@
+"""Micro benchmarks for the interpreter phases.
+
+Run one benchmark by name, e.g.
+
+    python benchmark.py frontend --size 2000
+"""
+import argparse
+import contextlib
+import io
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from scala_interpreter import (AST_SUFFIX, EOF, ID, RESERVED_KEYWORDS, VM,
+                               ASTDumper, Compiler, CoroutineInterpreter,
+                               ExecutionGovernor, IntFrame, Interpreter, Lexer,
+                               LineIndex, MemoInterpreter, Optimizer,
+                               ParallelInterpreter, Parser,
+                               ProfilingInterpreter, QuickeningInterpreter,
+                               Scheduler, ScopedSymbolTable, SharedColumns,
+                               SymbolTableBuilder, Token, TokenBuffer,
+                               TokenStream, TracingInterpreter, TypeInferencer,
+                               artifact_path, batch_pool, deserialize_ast,
+                               lex_background, lex_batches, lex_parallel,
+                               load_ast, run_batch, serialize_ast, tokenize,
+                               tokenize_columns)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+INTERPRETER = [sys.executable, '-m', 'scala_interpreter']
+# time to first result over `python -c pass`: Python's own startup (about
+# 11 ms here) and the runpy import behind `-m` (about 4 ms) are not ours
+STARTUP_BUDGET = 0.010
+
+
+def generate_program(size):
+    """Build an object body with `size` declarations, assignments and ifs."""
+    lines = ['object bench {']
+    for i in range(size):
+        lines.append('var v{0}:INT = {0};'.format(i))
+        lines.append('v{0} = v{0} + {1} * 2;'.format(i, i % 7))
+        if i:
+            lines.append('if (v{0} < v{1}) {{ v{0} = v{1} }} else {{ '
+                         'var t:INT = v{0}; v{1} = t - 1 }}'.format(i, i - 1))
+    lines.append('}')
+    return '\n'.join(lines)
+
+
+def generate_int_variables(size):
+    """`size` INT variables of the object, each updated a few times."""
+    lines = ['object ints {']
+    lines += ['var v{0}:INT = {1};'.format(i, i * 1000 + 7) for i in range(size)]
+    for i in range(size):
+        lines.append('v{0} = v{0} * 3 + v{1};'.format(i, i - 1 if i else 0))
+    lines.append('var r:INT = 0;')
+    lines.append('do { ' + ' '.join(
+        'v{0} = v{0} + r;'.format(i) for i in range(min(size, 10)))
+        + ' r = r + 1 } while (r < 1000)')
+    lines.append('}')
+    return '\n'.join(lines)
+
+
+def generate_loop_program(iterations):
+    """A do-while loop doing integer arithmetic `iterations` times."""
+    return """object loop {{
+        var i:INT = 0; var s:INT = 0; var r:INT = 0;
+        do {{
+            s = s + i * 3 - (i / 2) + 7;
+            r = (r + i % 13) % 1000;
+            i = i + 1
+        }} while (i < {0})
+    }}""".format(iterations)
+
+
+def generate_cold_branches(size):
+    """Mostly never-taken if/else branches with sizeable bodies."""
+    lines = ['object cold {', 'var x:INT = 1; var hits:INT = 0;']
+    for i in range(size):
+        lines.append('if (x < 0) {')
+        for j in range(10):
+            lines.append('  var c{0}:INT = x * {1} + {0}; x = x + c{0} % 3;'
+                         .format(j, i))
+        lines.append('} else { hits = hits + 1 }')
+    lines.append('}')
+    return '\n'.join(lines)
+
+
+def generate_independent_loops(groups, iterations):
+    """`groups` do-while loops, each on variables of its own."""
+    lines = ['object groups {']
+    for g in range(groups):
+        lines.append('var i{0}:INT = 0; var s{0}:INT = {0};'.format(g))
+        lines.append('do {{ s{0} = (s{0} * 3 + i{0}) % 1000; i{0} = i{0} + 1 }} '
+                     'while (i{0} < {1});'.format(g, iterations))
+        lines.append('var t{0}:INT = s{0} + {0};'.format(g))
+    lines.append('}')
+    return '\n'.join(lines)
+
+
+def generate_invariant_loop(iterations):
+    """A loop re-evaluating a large expression of loop-invariant inputs."""
+    return """object invariant {{
+        var a:INT = 3; var b:INT = 5; var i:INT = 0; var s:INT = 0;
+        do {{
+            s = s + (a * b + a * a - b * 7 + (a + b) * (a - b) % 11) / (b - a);
+            i = i + 1
+        }} while (i < {0})
+    }}""".format(iterations)
+
+
+def generate_branchy_loop(iterations):
+    """A loop whose body branches: one flip midway, one every iteration."""
+    return """object branchy {{
+        var i:INT = 0; var s:INT = 0; var low:INT = 0; var high:INT = 0;
+        var even:INT = 0;
+        do {{
+            s = (s + i * 7 - i / 3) % 100003;
+            if (i < {1}) {{ low = low + 1 }} else {{ high = high + s % 5 }};
+            if (i % 2 == 0) {{ even = even + 1 }};
+            i = i + 1
+        }} while (i < {0})
+    }}""".format(iterations, iterations // 2)
+
+
+def generate_affine_loop(iterations):
+    """A counting loop whose variables all move by fixed amounts."""
+    return """object affine {{
+        var n:INT = {0}; var i:INT = 0; var j:INT = n; var s:INT = 0;
+        var t:INT = 0; var last:INT = 0;
+        do {{
+            i = i + 1;
+            s = s + i;
+            j = j - 3;
+            t = t - j;
+            last = n * 2
+        }} while (i < n)
+    }}""".format(iterations)
+
+
+def generate_short_loops(iterations):
+    """Two loops with two-statement bodies: one counted, one not."""
+    return """object short {{
+        var i:INT = 0; var s:INT = 0; var k:INT = 0; var t:INT = 0;
+        do {{ s = (s + i) % 1000; i = i + 1 }} while (i < {0});
+        do {{ t = t + k % 7 + 1; k = k + 1 }} while (t < {0} * 4)
+    }}""".format(iterations)
+
+
+def generate_profiled_program(size):
+    """A hot short loop after `size` never-taken branches holding loops."""
+    lines = ['object profiled {',
+             'var x:INT = 1; var hits:INT = 0; var i:INT = 0; var s:INT = 0;']
+    for i in range(size):
+        lines.append('if (x < 0) {')
+        for j in range(5):
+            lines.append('  var c{0}:INT = x * {1} + {0};'.format(j, i))
+        lines.append('  do { x = x + c0 % 3; c1 = c1 - 1 } while (c1 > 0)')
+        lines.append('} else { hits = hits + 1 }')
+    lines.append('do {{ s = (s + i) % 1000; i = i + 1 }} while (i < {})'
+                 .format(size * 100))
+    lines.append('}')
+    return '\n'.join(lines)
+
+
+def generate_identifier_program(size):
+    """Long variable names used over and over, in blocks and a loop."""
+    names = ['accumulatedValue{}'.format(i) for i in range(size)]
+    lines = ['object identifiers {', 'var loopCounter:INT = 0;']
+    lines += ['var {}:INT = {};'.format(name, i) for i, name in enumerate(names)]
+    for i, name in enumerate(names):
+        other = names[i - 1]
+        lines.append('if ({0} < {1}) {{ {0} = {1} + {0} % 7 }} else {{ '
+                     'var temporaryValue:INT = {0} * 2; '
+                     '{1} = temporaryValue - {1} }};'.format(name, other))
+    lines.append('do { ' + ' '.join(
+        '{0} = {0} + loopCounter;'.format(name) for name in names[:10])
+        + ' loopCounter = loopCounter + 1 } while (loopCounter < 1000)')
+    lines.append('}')
+    return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow the tracing output of the parser and symbol table."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def two_pass(text):
+    lexer = Lexer(text)
+    tree = Parser(lexer).parse()
+    SymbolTableBuilder(lexer.names).visit(tree)
+    return tree
+
+
+def fused(text):
+    return Parser(Lexer(text), fused=True).parse()
+
+
+def run(tree, governor=None):
+    interpreter = Interpreter(tree, governor)
+    interpreter.interpret()
+    return interpreter.GLOBAL_MEMORY
+
+
+def report(name, seconds, baseline=None):
+    line = '{:<28} {:10.3f} ms'.format(name, seconds * 1000)
+    if baseline is not None:
+        line += '  ({:.2f}x)'.format(baseline / seconds)
+    print(line)
+
+
+def best_of(func, repeat):
+    with quiet():
+        return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench_frontend(args):
+    """Parse + symbol resolution: two passes versus the fused parser."""
+    text = generate_program(args.size)
+    slow = best_of(lambda: two_pass(text), args.repeat)
+    fast = best_of(lambda: fused(text), args.repeat)
+    report('parse + SymbolTableBuilder', slow)
+    report('fused parse', fast, slow)
+    with quiet():
+        memories = [run(build(text)) for build in (two_pass, fused)]
+    assert memories[0] == memories[1]
+    print('variables:', len(memories[0]))
+
+
+def bench_types(args):
+    """Loop execution with and without the INT-specialized BinOps."""
+    text = generate_loop_program(args.size)
+    with quiet():
+        generic = two_pass(text)
+        typed = two_pass(text)
+        TypeInferencer().visit(typed)
+    slow = best_of(lambda: run(generic), args.repeat)
+    fast = best_of(lambda: run(typed), args.repeat)
+    report('generic BinOp', slow)
+    report('INT-specialized BinOp', fast, slow)
+    assert run(generic) == run(typed)
+
+
+def bench_governor(args):
+    """Cost of running under an ExecutionGovernor that never fires."""
+    text = generate_loop_program(args.size)
+    with quiet():
+        tree = two_pass(text)
+    free = best_of(lambda: run(tree), args.repeat)
+    governed = best_of(
+        lambda: run(tree, ExecutionGovernor(10 ** 12, 3600)), args.repeat)
+    report('no governor', free)
+    report('step budget + deadline', governed, free)
+    print('overhead: {:.1f}%'.format((governed / free - 1) * 100))
+
+
+def run_vm(code, chunk=None):
+    vm = VM(code)
+    while not vm.run(chunk):
+        vm = VM.restore(code, vm.snapshot())
+    return vm.GLOBAL_MEMORY
+
+
+def bench_vm(args):
+    """Tree-walking Interpreter versus the bytecode VM, with checkpoints."""
+    text = generate_loop_program(args.size)
+    with quiet():
+        tree = two_pass(text)
+        TypeInferencer().visit(tree)
+    code = Compiler().compile(tree)
+    tree_time = best_of(lambda: run(tree), args.repeat)
+    vm_time = best_of(lambda: run_vm(code), args.repeat)
+    checkpointed = best_of(lambda: run_vm(code, 1000), args.repeat)
+    report('Interpreter', tree_time)
+    report('VM', vm_time, tree_time)
+    report('VM, snapshot every 1000', checkpointed, tree_time)
+    assert run(tree) == run_vm(code) == run_vm(code, 1000)
+
+
+def bench_scheduler(args):
+    """Programs per second with many programs in flight at once."""
+    with quiet():
+        trees = [two_pass(generate_loop_program(50 + i % 100))
+                 for i in range(args.size)]
+
+    def sequential():
+        return [run(tree) for tree in trees]
+
+    def threaded():
+        interpreters = [Interpreter(tree) for tree in trees]
+        threads = [threading.Thread(target=interpreter.interpret)
+                   for interpreter in interpreters]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return [interpreter.GLOBAL_MEMORY for interpreter in interpreters]
+
+    def scheduled():
+        scheduler = Scheduler(quantum=args.quantum)
+        for tree in trees:
+            scheduler.spawn(CoroutineInterpreter(tree))
+        results = scheduler.run()
+        return [results[i] for i in range(len(trees))]
+
+    expected = sequential()
+    for name, func in (('sequential Interpreter', sequential),
+                       ('thread per program', threaded),
+                       ('Scheduler', scheduled)):
+        start = time.perf_counter()
+        assert func() == expected
+        elapsed = time.perf_counter() - start
+        print('{:<28} {:10.0f} programs/s'.format(name, len(trees) / elapsed))
+
+
+def bench_ast(args):
+    """Re-parsing the source versus loading the binary AST format."""
+    text = generate_program(args.size)
+    with quiet():
+        expected = two_pass(text)
+    data = serialize_ast(expected)
+    resolved = serialize_ast(expected, resolved=True)
+    paths = []
+    for contents in (data, resolved):
+        fd, path = tempfile.mkstemp(suffix=AST_SUFFIX)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contents)
+        paths.append(path)
+    path, resolved_path = paths
+
+    def load_and_resolve():
+        tree = load_ast(path)
+        SymbolTableBuilder().visit(tree)
+        return tree
+
+    try:
+        parse = best_of(lambda: two_pass(text), args.repeat)
+        eager = best_of(lambda: deserialize_ast(data, lazy=False), args.repeat)
+        lazy = best_of(lambda: load_ast(path), args.repeat)
+        unresolved = best_of(load_and_resolve, args.repeat)
+        loaded = best_of(lambda: load_ast(resolved_path), args.repeat)
+        print('source {} bytes, binary AST {} bytes, resolved {} bytes'.format(
+            len(text), len(data), len(resolved)))
+        report('parse + SymbolTableBuilder', parse)
+        report('deserialize_ast, eager', eager, parse)
+        report('load_ast, mmap + lazy', lazy, parse)
+        report('load_ast + SymbolTableBuilder', unresolved, parse)
+        report('load_ast, resolved', loaded, parse)
+        with quiet():
+            for tree in (load_and_resolve(), load_ast(resolved_path)):
+                assert ASTDumper().dump(expected) == ASTDumper().dump(tree)
+                assert run(tree) == run(expected)
+    finally:
+        for path in paths:
+            os.remove(path)
+
+
+def bench_startup(args):
+    """End-to-end `scala_interpreter run` with and without a fresh artifact."""
+    fd, path = tempfile.mkstemp(suffix='.scala')
+    with os.fdopen(fd, 'w') as f:
+        f.write(generate_program(args.size))
+    command = INTERPRETER + ['run', path]
+
+    def cold():
+        if os.path.exists(artifact_path(path)):
+            os.remove(artifact_path(path))
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, cwd=ROOT)
+
+    def cached():
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, cwd=ROOT)
+
+    try:
+        cold_time = best_of(cold, args.repeat)
+        cached_time = best_of(cached, args.repeat)
+        report('cold (parse + compile)', cold_time)
+        report('cached artifact', cached_time, cold_time)
+    finally:
+        for leftover in (path, artifact_path(path)):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+
+def import_times(module):
+    """Cumulative `-X importtime` microseconds per module of one import."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        check=True, stderr=subprocess.PIPE, universal_newlines=True, cwd=ROOT)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def bench_import(args):
+    """Import cost of the package and time to first result of a one-line
+    program on stdin, end to end: from spawning the process until it
+    has printed its result and exited, Python's own startup included."""
+    times = import_times('scala_interpreter.cli')
+    for name, micros in sorted(times.items(), key=lambda item: -item[1]):
+        if name.startswith('scala_interpreter') or micros >= 1000:
+            print('{:<28} {:10.3f} ms'.format(name, micros / 1000))
+    program = 'object one { var x:INT = 6; x = x * 7 }'
+
+    def spawn(command):
+        subprocess.run(command, input=program, check=True,
+                       stdout=subprocess.DEVNULL, universal_newlines=True,
+                       cwd=ROOT)
+
+    # the floor under any entry point
+    floor = best_of(lambda: spawn([sys.executable, '-c', 'pass']),
+                    args.repeat)
+    report('python -c pass', floor)
+    for name, command in (
+            ('python -m scala_interpreter', INTERPRETER),
+            ('python interpreter_.py',
+             [sys.executable, os.path.join(ROOT, 'interpreter_.py')])):
+        total = best_of(lambda: spawn(command), args.repeat)
+        report(name, total)
+        print('  first result {:.1f} ms after python -c pass '
+              '(budget {:.0f} ms) {}'.format(
+                  (total - floor) * 1000, STARTUP_BUDGET * 1000,
+                  'ok' if total - floor < STARTUP_BUDGET else 'MISSED'))
+
+
+def bench_lex(args):
+    """Sequential Lexer versus lex_parallel() on 1 to --jobs processes."""
+    text = generate_program(args.size)
+    expected = tokenize_columns(text)
+    sequential = best_of(lambda: tokenize(text), args.repeat)
+    print('source {} bytes, {} tokens'.format(len(text), len(expected[0])))
+    report('Lexer', sequential)
+    for workers in range(1, (args.jobs or os.cpu_count() or 1) + 1):
+        # the pool is started once; only lexing and token transfer count
+        with ProcessPoolExecutor(workers) as executor:
+            executor.submit(tokenize, 'x').result()
+            stream = lex_parallel(text, workers, executor)
+            parallel = best_of(lambda: lex_parallel(text, workers, executor),
+                               args.repeat)
+        report('lex_parallel, {} workers'.format(workers), parallel, sequential)
+        assert (stream.types, stream.values, stream.positions,
+                stream.name_ids) == expected
+
+
+def bench_parse(args):
+    """Parser.parse() versus parse_parallel() on 1 to --jobs processes."""
+    text = generate_program(args.size)
+    tokens = tokenize(text)
+    with quiet():
+        expected = ASTDumper().dump(Parser(TokenStream(tokens)).parse())
+    sequential = best_of(lambda: Parser(TokenStream(tokens)).parse(),
+                         args.repeat)
+    report('Parser.parse()', sequential)
+    for workers in range(1, (args.jobs or os.cpu_count() or 1) + 1):
+        with ProcessPoolExecutor(workers) as executor:
+            executor.submit(tokenize, 'x').result()
+            parallel = best_of(
+                lambda: Parser(TokenStream(tokens)).parse_parallel(workers,
+                                                                   executor),
+                args.repeat)
+            with quiet():
+                tree = Parser(TokenStream(tokens)).parse_parallel(workers,
+                                                                  executor)
+        report('parse_parallel, {} workers'.format(workers), parallel,
+               sequential)
+        assert ASTDumper().dump(tree) == expected
+
+
+def bench_pipeline(args):
+    """Parsing from the Lexer versus from a TokenBuffer fed in batches."""
+    text = generate_program(args.size)
+    with quiet():
+        expected = ASTDumper().dump(Parser(Lexer(text)).parse())
+    streams = (('Lexer', lambda: Lexer(text)),
+               ('TokenBuffer, batch fill',
+                lambda: TokenBuffer(lex_batches(text))),
+               ('TokenBuffer, background',
+                lambda: TokenBuffer(lex_background(text))))
+    baseline = None
+    for name, stream in streams:
+        seconds = best_of(lambda: Parser(stream()).parse(), args.repeat)
+        report(name, seconds, baseline)
+        baseline = baseline or seconds
+        with quiet():
+            assert ASTDumper().dump(Parser(stream()).parse()) == expected
+
+
+class UninternedLexer(Lexer):
+    """The Lexer without a NameTable: a word is upper-cased to look it up
+    as a keyword and an identifier is only its string."""
+
+    def _id(self):
+        text = self.text
+        start = pos = self.pos
+        end = len(text)
+        while pos < end and text[pos].isalnum():
+            pos += 1
+        self.pos = pos
+        self.current_char = text[pos] if pos < end else None
+        result = text[start:pos]
+        keyword = RESERVED_KEYWORDS.get(result.upper())
+        if keyword is not None:
+            return Token(keyword.type, keyword.value, start)
+        return Token(ID, result, start)
+
+
+class NameKeyedSymbolTable(ScopedSymbolTable):
+    """ScopedSymbolTable keyed by the names themselves instead of ids."""
+
+    def name_id(self, token):
+        return token.value
+
+    def define(self, symbol):
+        symbol.name_id = symbol.name
+        super().define(symbol)
+
+    def lookup(self, name, name_id=None):
+        return super().lookup(name, name)
+
+
+def uninterned_tokenize(text):
+    lexer = UninternedLexer(text)
+    tokens = []
+    token = lexer.get_next_token()
+    while token.type != EOF:
+        tokens.append(token)
+        token = lexer.get_next_token()
+    return tokens
+
+
+def uninterned(text):
+    return Parser(UninternedLexer(text), fused=True,
+                  symtab=NameKeyedSymbolTable()).parse()
+
+
+def bench_identifiers(args):
+    """Lexing, resolving and running an identifier-heavy program, with
+    interned names versus upper-cased keyword checks and a table keyed
+    by name."""
+    text = generate_identifier_program(args.size)
+    with quiet():
+        tree = fused(text)
+        baseline_tree = uninterned(text)
+    assert [(t.type, t.value) for t in uninterned_tokenize(text)] \
+        == [(t.type, t.value) for t in tokenize(text)]
+    assert run(baseline_tree) == run(tree)
+    for name, baseline, interned in (
+            ('tokenize', lambda: uninterned_tokenize(text),
+             lambda: tokenize(text)),
+            ('fused parse', lambda: uninterned(text), lambda: fused(text)),
+            ('run', lambda: run(baseline_tree), lambda: run(tree)),
+            ('lex + parse + run', lambda: run(uninterned(text)),
+             lambda: run(fused(text)))):
+        slow = best_of(baseline, args.repeat)
+        report(name + ', by name', slow)
+        report(name + ', interned', best_of(interned, args.repeat), slow)
+
+
+def frame_bytes(frame):
+    """Memory held by a frame and the values it owns."""
+    if isinstance(frame, IntFrame):
+        boxed = [value for value in frame.boxed.values() if value is not None]
+        return (sys.getsizeof(frame.ints) + sys.getsizeof(frame.kinds)
+                + sys.getsizeof(frame.boxed)
+                + sum(sys.getsizeof(value) for value in boxed))
+    return sys.getsizeof(frame) + sum(sys.getsizeof(value) for value in frame
+                                      if value is not None)
+
+
+def bench_typed_memory(args):
+    """List frames versus an IntFrame for the object's INT variables:
+    run time, frame memory and the cost of a snapshot of the frame."""
+    text = generate_int_variables(args.size)
+    with quiet():
+        tree = fused(text)
+
+    def interpreter(typed):
+        interpreter = Interpreter(tree)
+        interpreter.typed_memory = typed
+        interpreter.interpret()
+        return interpreter
+
+    plain = best_of(lambda: interpreter(False), args.repeat)
+    typed = best_of(lambda: interpreter(True), args.repeat)
+    report('list frame', plain)
+    report('IntFrame', typed, plain)
+    with quiet():
+        lists, ints = interpreter(False), interpreter(True)
+    assert lists.GLOBAL_MEMORY == ints.GLOBAL_MEMORY
+    frame, int_frame = lists.frames[0], ints.frames[0]
+    print('{} variables, {} promoted'.format(len(frame),
+                                             len(int_frame.promoted)))
+    print('frame memory: list {} bytes, IntFrame {} bytes'.format(
+        frame_bytes(frame), frame_bytes(int_frame)))
+    # a snapshot that can be stored or sent: list(frame) shares the int
+    # objects, so a frame of ints has to be pickled to get one
+    report('snapshot, pickled list',
+           best_of(lambda: pickle.dumps(list(frame)), args.repeat))
+    report('snapshot, IntFrame', best_of(int_frame.snapshot, args.repeat))
+
+
+def bench_locations(args):
+    """Cost of locating tokens: lexing, then building the line index
+    and looking up every token's (line, column), which only errors do."""
+    text = generate_program(args.size)
+    tokens = tokenize(text)
+    print('source {} bytes, {} lines, {} tokens'.format(
+        len(text), text.count('\n') + 1, len(tokens)))
+    lexing = best_of(lambda: tokenize(text), args.repeat)
+    report('tokenize', lexing)
+    report('LineIndex', best_of(lambda: LineIndex(text), args.repeat))
+    index = LineIndex(text)
+    positions = [token.pos for token in tokens]
+    seconds = best_of(lambda: [index.location(pos) for pos in positions],
+                      args.repeat)
+    report('locate every token', seconds)
+    for line, column in (index.location(pos) for pos in positions[::997]):
+        assert text.split('\n')[line - 1][column - 1:] != ''
+    for source in (text.replace('v7 + 0', 'v7 $ 0'),
+                   text.replace('var v9:INT', 'var v9 INT')):
+        try:
+            with quiet():
+                Parser(Lexer(source)).parse()
+        except Exception as error:
+            print('  {}'.format(error))
+
+
+def bench_parallel(args):
+    """Interpreter versus ParallelInterpreter on independent loops."""
+    text = generate_independent_loops(args.jobs or os.cpu_count() or 1,
+                                      args.size)
+    with quiet():
+        tree = two_pass(text)
+        TypeInferencer().visit(tree)
+    sequential = best_of(lambda: run(tree), args.repeat)
+    report('Interpreter', sequential)
+    expected = run(tree)
+    for workers in range(2, (args.jobs or os.cpu_count() or 1) + 1):
+        with ProcessPoolExecutor(workers) as executor:
+            executor.submit(tokenize, 'x').result()
+
+            def parallel():
+                interpreter = ParallelInterpreter(tree, workers, executor)
+                interpreter.interpret()
+                return interpreter.GLOBAL_MEMORY
+
+            assert parallel() == expected
+            report('ParallelInterpreter, {} workers'.format(workers),
+                   best_of(parallel, args.repeat), sequential)
+
+
+def echo_columns(columns):
+    """Worker side of a pickled transfer: the columns go back as is."""
+    return columns
+
+
+def copy_shared(input_spec, output_spec, start, end):
+    """Worker side of a shared transfer: copy rows from the input
+    columns into the output columns."""
+    inputs = SharedColumns.attach(input_spec)
+    outputs = SharedColumns.attach(output_spec)
+    for source, target in zip(inputs.columns.values(),
+                              outputs.columns.values()):
+        target[start:end] = source[start:end]
+    inputs.close()
+    outputs.close()
+
+
+def bench_batch(args):
+    """run_batch() with columns in shared memory versus pickled: moving
+    --size rows of two input and two output columns through the workers,
+    then running a program over up to 5000 rows."""
+    rows = args.size
+    workers = args.jobs or os.cpu_count() or 1
+    inputs = {'x': array('q', range(rows)),
+              'y': array('q', range(rows, 0, -1))}
+    bounds = [(start, min(start + -(-rows // workers), rows))
+              for start in range(0, rows, -(-rows // workers) or 1)]
+
+    def pickled():
+        futures = [executor.submit(echo_columns,
+                                   {name: column[start:end]
+                                    for name, column in inputs.items()})
+                   for start, end in bounds]
+        results = {name: array('q') for name in inputs}
+        for future in futures:
+            for name, column in future.result().items():
+                results[name].extend(column)
+        return results
+
+    def shared():
+        input_columns = SharedColumns.create(inputs, rows)
+        output_columns = SharedColumns.create(['s', 't'], rows)
+        for name, column in inputs.items():
+            input_columns.columns[name][:] = memoryview(column)
+        futures = [executor.submit(copy_shared, input_columns.spec(),
+                                   output_columns.spec(), start, end)
+                   for start, end in bounds]
+        for future in futures:
+            future.result()
+        results = {}
+        for name, column in output_columns.columns.items():
+            results[name] = array('q')
+            with column.cast('B') as data:
+                results[name].frombytes(data)
+        for columns in (input_columns, output_columns):
+            columns.close()
+            columns.unlink()
+        return results
+
+    text = generate_loop_program(20)
+    with quiet():
+        tree = fused(text)
+        TypeInferencer().visit(tree)
+    program_rows = min(rows, 5000)
+    program_inputs = {'s': array('q', range(program_rows))}
+    with batch_pool(workers) as executor:
+        executor.submit(tokenize, 'x').result()
+        assert list(pickled().values()) == list(shared().values())
+        print('{} rows, {} workers'.format(rows, workers))
+        slow = best_of(pickled, args.repeat)
+        report('transfer, pickled', slow)
+        report('transfer, shared memory', best_of(shared, args.repeat), slow)
+        assert (run_batch(tree, program_inputs, workers=workers,
+                          executor=executor, shared=False)
+                == run_batch(tree, program_inputs, workers=workers,
+                             executor=executor, shared=True))
+        print('program over {} rows'.format(program_rows))
+        slow = best_of(lambda: run_batch(tree, program_inputs,
+                                         workers=workers, executor=executor,
+                                         shared=False),
+                       args.repeat)
+        report('run_batch, pickled', slow)
+        report('run_batch, shared memory',
+               best_of(lambda: run_batch(tree, program_inputs,
+                                         workers=workers, executor=executor,
+                                         shared=True),
+                       args.repeat), slow)
+
+
+def bench_memo(args):
+    """Interpreter versus MemoInterpreter on loop-invariant expressions."""
+    for name, text in (('invariant', generate_invariant_loop(args.size)),
+                       ('loop', generate_loop_program(args.size))):
+        with quiet():
+            tree = two_pass(text)
+            TypeInferencer().visit(tree)
+        plain = best_of(lambda: run(tree), args.repeat)
+
+        def memoized():
+            interpreter = MemoInterpreter(tree)
+            interpreter.interpret()
+            return interpreter
+
+        report('{}: Interpreter'.format(name), plain)
+        report('{}: MemoInterpreter'.format(name),
+               best_of(memoized, args.repeat), plain)
+        interpreter = memoized()
+        print(interpreter.stats())
+        assert interpreter.GLOBAL_MEMORY == run(tree)
+
+
+def bench_quicken(args):
+    """Interpreter versus QuickeningInterpreter, untyped and typed trees."""
+    for name, text in (('loop', generate_loop_program(args.size)),
+                       ('invariant', generate_invariant_loop(args.size))):
+        with quiet():
+            generic = two_pass(text)
+            typed = two_pass(text)
+            TypeInferencer().visit(typed)
+        for kind, tree in (('untyped', generic), ('typed', typed)):
+            plain = best_of(lambda: run(tree), args.repeat)
+
+            def quickened():
+                interpreter = QuickeningInterpreter(tree)
+                interpreter.interpret()
+                return interpreter.GLOBAL_MEMORY
+
+            report('{} {}: Interpreter'.format(name, kind), plain)
+            report('{} {}: Quickening'.format(name, kind),
+                   best_of(quickened, args.repeat), plain)
+            assert quickened() == run(tree)
+
+
+def bench_trace(args):
+    """Interpreter, QuickeningInterpreter and TracingInterpreter on loops."""
+    for name, text in (('loop', generate_loop_program(args.size)),
+                       ('branchy', generate_branchy_loop(args.size))):
+        with quiet():
+            tree = two_pass(text)
+            TypeInferencer().visit(tree)
+        expected = run(tree)
+        plain = best_of(lambda: run(tree), args.repeat)
+        report('{}: Interpreter'.format(name), plain)
+        for engine in (QuickeningInterpreter, TracingInterpreter):
+            def engine_run():
+                interpreter = engine(tree)
+                interpreter.interpret()
+                return interpreter
+
+            report('{}: {}'.format(name, engine.__name__),
+                   best_of(engine_run, args.repeat), plain)
+            interpreter = engine_run()
+            assert interpreter.GLOBAL_MEMORY == expected
+        print('traces compiled: {}, side exits: {}'.format(
+            interpreter.traces_compiled, interpreter.side_exits))
+
+
+def bench_closedform(args):
+    """Affine loops run iteration by iteration versus summarized."""
+    for size in (args.size, 10 ** 9):
+        text = generate_affine_loop(size)
+        with quiet():
+            tree = two_pass(text)
+            TypeInferencer().visit(tree)
+            optimized = two_pass(text)
+            TypeInferencer().visit(optimized)
+        optimizer = Optimizer()
+        optimizer.optimize(optimized)
+        summarized = best_of(lambda: run(optimized), args.repeat)
+        if size == args.size:
+            plain = best_of(lambda: run(tree), args.repeat)
+            report('{}: loop'.format(size), plain)
+            report('{}: closed form'.format(size), summarized, plain)
+            assert run(optimized) == run(tree)
+        else:
+            report('{}: closed form'.format(size), summarized)
+        print('summarized loops: {}'.format(optimizer.summarized))
+
+
+def bench_unroll(args):
+    """Short do-while bodies run as is versus unrolled, per engine."""
+    text = generate_short_loops(args.size)
+    trees = {}
+    for factor in (1, 2, 4, 8):
+        with quiet():
+            tree = two_pass(text)
+            TypeInferencer().visit(tree)
+        Optimizer(max_unroll=factor).optimize(tree)
+        trees[factor] = tree
+    expected = run(trees[1])
+
+    def run_engine(engine, tree):
+        interpreter = engine(tree)
+        interpreter.interpret()
+        return interpreter.GLOBAL_MEMORY
+
+    for engine in (Interpreter, QuickeningInterpreter):
+        baseline = best_of(lambda: run_engine(engine, trees[1]), args.repeat)
+        report('{}: x1'.format(engine.__name__), baseline)
+        for factor in (2, 4, 8):
+            tree = trees[factor]
+            report('{}: x{}'.format(engine.__name__, factor),
+                   best_of(lambda: run_engine(engine, tree), args.repeat),
+                   baseline)
+            assert run_engine(engine, tree) == expected
+    governor = ExecutionGovernor(max_steps=10 ** 9)
+    baseline = best_of(lambda: run(trees[1], governor), args.repeat)
+    report('governed Interpreter: x1', baseline)
+    report('governed Interpreter: x4',
+           best_of(lambda: run(trees[4], governor), args.repeat), baseline)
+    # the VM compiles an UnrolledLoop as the loop it replaces
+    baseline = best_of(lambda: run_vm(Compiler().compile(trees[1])),
+                       args.repeat)
+    report('VM: x1', baseline)
+    report('VM: x4', best_of(lambda: run_vm(Compiler().compile(trees[4])),
+                             args.repeat), baseline)
+
+
+def bench_pgo(args):
+    """Whole builds and runs without and with a profile of the program."""
+    text = generate_profiled_program(args.size)
+    with quiet():
+        tree = fused(text)
+    profiler = ProfilingInterpreter(tree)
+    profiler.interpret()
+    profile = profiler.profile(text)
+
+    def build_and_run(lazy, profile=None):
+        tree = Parser(Lexer(text), fused=True, lazy=lazy).parse()
+        TypeInferencer().visit(tree)
+        Optimizer(profile=profile).optimize(tree)
+        return run(tree)
+
+    builds = (('eager', lambda: build_and_run(False)),
+              ('lazy', lambda: build_and_run(True)),
+              ('profile-guided', lambda: build_and_run(profile.cold, profile)))
+    baseline = None
+    for name, build in builds:
+        seconds = best_of(build, args.repeat)
+        report(name, seconds, baseline)
+        baseline = baseline or seconds
+    with quiet():
+        assert build_and_run(False) == build_and_run(True) == \
+            build_and_run(profile.cold, profile) == profiler.GLOBAL_MEMORY
+
+
+def bench_lazy(args):
+    """Eager versus lazy parsing when most branches never run."""
+    text = generate_cold_branches(args.size)
+
+    def eager():
+        return run(fused(text))
+
+    def lazy():
+        return run(Parser(Lexer(text), lazy=True).parse())
+
+    parse_eager = best_of(lambda: fused(text), args.repeat)
+    parse_lazy = best_of(lambda: Parser(Lexer(text), lazy=True).parse(),
+                         args.repeat)
+    total_eager = best_of(eager, args.repeat)
+    total_lazy = best_of(lazy, args.repeat)
+    report('fused parse', parse_eager)
+    report('lazy parse', parse_lazy, parse_eager)
+    report('fused parse + run', total_eager)
+    report('lazy parse + run', total_lazy, total_eager)
+    print('parse time saved: {:.1f} ms'.format(
+        (total_eager - total_lazy) * 1000))
+    with quiet():
+        assert eager() == lazy()
+
+
+BENCHMARKS = {
+    'frontend': bench_frontend,
+    'types': bench_types,
+    'governor': bench_governor,
+    'vm': bench_vm,
+    'scheduler': bench_scheduler,
+    'ast': bench_ast,
+    'startup': bench_startup,
+    'import': bench_import,
+    'lazy': bench_lazy,
+    'lex': bench_lex,
+    'parse': bench_parse,
+    'parallel': bench_parallel,
+    'memo': bench_memo,
+    'quicken': bench_quicken,
+    'trace': bench_trace,
+    'closedform': bench_closedform,
+    'unroll': bench_unroll,
+    'pgo': bench_pgo,
+    'pipeline': bench_pipeline,
+    'identifiers': bench_identifiers,
+    'locations': bench_locations,
+    'typed_memory': bench_typed_memory,
+    'batch': bench_batch,
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    arg_parser.add_argument('--size', type=int, default=1000)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--quantum', type=int, default=100,
+                            help='statements per turn for the Scheduler')
+    arg_parser.add_argument('--jobs', type=int,
+                            help='most worker processes to try '
+                                 '(default: all cores)')
+    args = arg_parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""Interpreter for a small subset of Scala.
+
+Submodules are only imported when one of their names is first used, so
+importing the package is nearly free and a plain run never loads the
+optimizer, VM or serialization code.
+"""
+
+# public name -> submodule defining it
+_EXPORTS = {
+    'INTEGER': 'tokens',
+    'PLUS': 'tokens',
+    'MINUS': 'tokens',
+    'MUL': 'tokens',
+    'DIV': 'tokens',
+    'REM': 'tokens',
+    'LPAREN': 'tokens',
+    'RPAREN': 'tokens',
+    'LCURL': 'tokens',
+    'RCURL': 'tokens',
+    'ID': 'tokens',
+    'ASSIGN': 'tokens',
+    'SEMI': 'tokens',
+    'DOT': 'tokens',
+    'OBJECT': 'tokens',
+    'VAR': 'tokens',
+    'COLON': 'tokens',
+    'COMMA': 'tokens',
+    'EOF': 'tokens',
+    'DEF': 'tokens',
+    'IF': 'tokens',
+    'ELSE': 'tokens',
+    'TRUE': 'tokens',
+    'FALSE': 'tokens',
+    'DO': 'tokens',
+    'WHILE': 'tokens',
+    'INT': 'tokens',
+    'LESSTHAN': 'tokens',
+    'LEQUAL': 'tokens',
+    'GREATHAN': 'tokens',
+    'GEQUAL': 'tokens',
+    'DEQUAL': 'tokens',
+    'Token': 'tokens',
+    'RESERVED_KEYWORDS': 'tokens',
+    'case_variants': 'tokens',
+    'KEYWORD_SPELLINGS': 'tokens',
+    'NameTable': 'tokens',
+    'LineIndex': 'lexer',
+    'TokenSource': 'lexer',
+    'Lexer': 'lexer',
+    'TokenStream': 'lexer',
+    'comment_spans': 'lexer',
+    'split_source': 'lexer',
+    'tokenize': 'lexer',
+    'tokenize_columns': 'lexer',
+    'lex_chunk': 'lexer',
+    'TokenColumns': 'lexer',
+    'lex_parallel': 'lexer',
+    'TokenBuffer': 'lexer',
+    'lex_batches': 'lexer',
+    'produce_batches': 'lexer',
+    'lex_background': 'lexer',
+    'AST': 'nodes',
+    'BinOp': 'nodes',
+    'Num': 'nodes',
+    'UnaryOp': 'nodes',
+    'Body': 'nodes',
+    'LazyBody': 'nodes',
+    'Assign_stmt': 'nodes',
+    'Declaration': 'nodes',
+    'Cond_stmt': 'nodes',
+    'Var': 'nodes',
+    'NoOp': 'nodes',
+    'Program': 'nodes',
+    'Type': 'nodes',
+    'If_stmt': 'nodes',
+    'DO_stmt': 'nodes',
+    'ClosedFormLoop': 'nodes',
+    'UnrolledLoop': 'nodes',
+    'NodeVisitor': 'nodes',
+    'Parser': 'parser',
+    'statement_end': 'parser',
+    'split_statements': 'parser',
+    'group_statements': 'parser',
+    'parse_statements': 'parser',
+    'parse_serialized': 'parser',
+    'parse_chunks': 'parser',
+    'number_sites': 'parser',
+    'Symbol': 'symbols',
+    'VarSymbol': 'symbols',
+    'BuiltinTypeSymbol': 'symbols',
+    'ScopedSymbolTable': 'symbols',
+    'SymbolTable': 'symbols',
+    'SymbolTableBuilder': 'symbols',
+    'ensure_resolved': 'symbols',
+    'INT_BINOPS': 'inference',
+    'INT_TYPE_NAMES': 'inference',
+    'compare': 'inference',
+    'binop_value': 'inference',
+    'TypeInferencer': 'inference',
+    'count_nodes': 'optimizer',
+    'expr_reads': 'optimizer',
+    'constant_value': 'optimizer',
+    'may_raise': 'optimizer',
+    'statement_effects': 'optimizer',
+    'contains_loop': 'optimizer',
+    'unloaded': 'optimizer',
+    'contains_unloaded': 'optimizer',
+    'dependency_groups': 'optimizer',
+    'LoopSummarizer': 'optimizer',
+    'LoopUnroller': 'optimizer',
+    'Optimizer': 'optimizer',
+    'ASTDumper': 'optimizer',
+    'ExecutionLimitExceeded': 'interpreter',
+    'ExecutionGovernor': 'interpreter',
+    'trip_count': 'interpreter',
+    'Interpreter': 'interpreter',
+    'IntFrame': 'environment',
+    'int_slots': 'environment',
+    'UNTRACKED_ATTACH': 'batch',
+    'SharedColumns': 'batch',
+    'BatchInterpreter': 'batch',
+    'batch_slots': 'batch',
+    'run_rows': 'batch',
+    'run_shared': 'batch',
+    'run_pickled': 'batch',
+    'batch_pool': 'batch',
+    'run_batch': 'batch',
+    'MemoInterpreter': 'memo',
+    'QuickeningInterpreter': 'quicken',
+    'NotTraceable': 'tracing',
+    'Trace': 'tracing',
+    'TraceCompiler': 'tracing',
+    'TracingInterpreter': 'tracing',
+    'PROFILE_VERSION': 'pgo',
+    'source_digest': 'pgo',
+    'profile_path': 'pgo',
+    'Profile': 'pgo',
+    'write_profile': 'pgo',
+    'load_profile': 'pgo',
+    'ProfilingInterpreter': 'pgo',
+    'run_statements': 'parallel',
+    'ParallelInterpreter': 'parallel',
+    'CoroutineInterpreter': 'scheduler',
+    'Scheduler': 'scheduler',
+    'STMT': 'vm',
+    'LOAD_CONST': 'vm',
+    'LOAD': 'vm',
+    'STORE': 'vm',
+    'BINARY': 'vm',
+    'BINARY_INT': 'vm',
+    'NEGATE': 'vm',
+    'COMPARE': 'vm',
+    'JUMP': 'vm',
+    'JUMP_IF_FALSE': 'vm',
+    'LOOP': 'vm',
+    'PUSH_FRAME': 'vm',
+    'POP_FRAME': 'vm',
+    'HALT': 'vm',
+    'SNAPSHOT_VERSION': 'vm',
+    'PYTHON_TAG': 'vm',
+    'Bytecode': 'vm',
+    'Compiler': 'vm',
+    'SnapshotError': 'vm',
+    'VM': 'vm',
+    'AST_MAGIC': 'serialize',
+    'AST_VERSION': 'serialize',
+    'AST_SUFFIX': 'serialize',
+    'FLAG_RESOLVED': 'serialize',
+    'FLAG_POSITIONS': 'serialize',
+    'TAG_PROGRAM': 'serialize',
+    'TAG_BODY': 'serialize',
+    'TAG_NOOP': 'serialize',
+    'TAG_DECLARATION': 'serialize',
+    'TAG_ASSIGN': 'serialize',
+    'TAG_IF': 'serialize',
+    'TAG_DO': 'serialize',
+    'TAG_COND': 'serialize',
+    'TAG_BINOP': 'serialize',
+    'TAG_UNARYOP': 'serialize',
+    'TAG_NUM': 'serialize',
+    'TAG_VAR': 'serialize',
+    'AST_OPERATORS': 'serialize',
+    'AST_COMPARISONS': 'serialize',
+    'ASTFormatError': 'serialize',
+    'ast_path': 'serialize',
+    'write_varint': 'serialize',
+    'read_varint': 'serialize',
+    'ASTWriter': 'serialize',
+    'ASTReader': 'serialize',
+    'serialize_ast': 'serialize',
+    'deserialize_ast': 'serialize',
+    'load_ast': 'serialize',
+    'ARTIFACT_MAGIC': 'aot',
+    'ARTIFACT_VERSION': 'aot',
+    'ARTIFACT_TAG': 'aot',
+    'ARTIFACT_HEADER': 'aot',
+    'compile_source': 'aot',
+    'artifact_path': 'aot',
+    'write_artifact': 'aot',
+    'load_artifact': 'aot',
+    'compile_file': 'aot',
+    'cached_compile': 'aot',
+    'main': 'cli',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name))
+    module = __import__(module_name, globals(), None, [name], 1)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,113 @@
+import hashlib
+import marshal
+import os
+import struct
+
+from .lexer import Lexer
+from .parser import Parser
+from .inference import TypeInferencer
+from .optimizer import Optimizer
+from .vm import PYTHON_TAG, Bytecode, Compiler
+
+
+ARTIFACT_MAGIC = b'SCLC'
+ARTIFACT_VERSION = 3
+# marshal data is only meant to be read by the Python version that wrote
+# it, so the header names that Python too
+ARTIFACT_TAG = PYTHON_TAG.encode('ascii')
+ARTIFACT_HEADER = struct.Struct('<4sB16sqq20s')
+
+
+def compile_source(text, optimize=True):
+    """Run the whole front end on source text and return its Bytecode."""
+    tree = Parser(Lexer(text), fused=True).parse()
+    TypeInferencer().visit(tree)
+    if optimize:
+        Optimizer().optimize(tree)
+    return Compiler().compile(tree)
+
+
+def artifact_path(source_path):
+    return os.path.splitext(source_path)[0] + '.scalac'
+
+
+def write_artifact(path, code, source):
+    """Store Bytecode together with the stat and hash of its source.
+
+    `source` is the source file path; its mtime and size are the quick
+    freshness check, the SHA-1 of its contents the fallback one.  The
+    header also records ARTIFACT_TAG, as the payload is marshal data.
+    """
+    st = os.stat(source)
+    with open(source, 'rb') as f:
+        digest = hashlib.sha1(f.read()).digest()
+    header = ARTIFACT_HEADER.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION,
+                                  ARTIFACT_TAG, st.st_mtime_ns, st.st_size,
+                                  digest)
+    payload = marshal.dumps((code.name, code.instructions, code.global_names))
+    # write to a temporary file first so readers never see half an artifact
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(header + payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_artifact(path, source):
+    """Return the Bytecode stored in `path`, or None if it is stale.
+
+    An artifact is stale when it is unreadable, was written by another
+    format version or Python, or belongs to other source contents.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < ARTIFACT_HEADER.size:
+        return None
+    magic, version, tag, mtime_ns, size, digest = \
+        ARTIFACT_HEADER.unpack_from(data)
+    if (magic != ARTIFACT_MAGIC or version != ARTIFACT_VERSION
+            or tag.rstrip(b'\0') != ARTIFACT_TAG):
+        return None
+    st = os.stat(source)
+    if st.st_mtime_ns != mtime_ns or st.st_size != size:
+        # touched but maybe unchanged, like checked-hash .pyc files
+        with open(source, 'rb') as f:
+            if hashlib.sha1(f.read()).digest() != digest:
+                return None
+    try:
+        name, instructions, global_names = marshal.loads(
+            data[ARTIFACT_HEADER.size:])
+    except (EOFError, ValueError, TypeError):
+        return None
+    return Bytecode(name, instructions, global_names)
+
+
+def compile_file(source, output=None):
+    """Ahead-of-time compile a source file, returning the artifact path."""
+    with open(source) as f:
+        code = compile_source(f.read())
+    output = output or artifact_path(source)
+    write_artifact(output, code, source)
+    return output
+
+
+def cached_compile(source):
+    """Bytecode for a source file, reusing or refreshing its artifact."""
+    path = artifact_path(source)
+    code = load_artifact(path, source)
+    if code is None:
+        with open(source) as f:
+            code = compile_source(f.read())
+        try:
+            write_artifact(path, code, source)
+        except OSError:
+            # a read-only directory only costs the cache
+            pass
+    return code
@@ -0,0 +1,235 @@
+import os
+import sys
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+
+from .environment import int_slots
+from .inference import TypeInferencer
+from .interpreter import Interpreter
+from .symbols import ensure_resolved
+
+
+# SharedMemory takes `track` from Python 3.13 on
+UNTRACKED_ATTACH = sys.version_info >= (3, 13)
+
+
+class SharedColumns(object):
+    """Int64 columns of `rows` values each, laid out one after the other
+    in a single shared memory block.
+
+    create() allocates the block; a worker process attach()es to it by
+    the spec() of the creating side and reads or writes `columns`, a
+    dict of name -> memoryview, without copying.  Every side close()s
+    its mapping once done and the creator also unlink()s the block.
+
+    Only the creator's resource tracker is meant to know the block.
+    Before Python 3.13 attaching registers it as well, which is only
+    harmless in a process sharing the creator's tracker, such as a
+    worker of batch_pool().
+    """
+
+    def __init__(self, block, names, rows):
+        self.block = block
+        self.names = list(names)
+        self.rows = rows
+        self.view = block.buf[:8 * rows * len(self.names)].cast('q')
+        self.columns = {name: self.view[index * rows:(index + 1) * rows]
+                        for index, name in enumerate(self.names)}
+
+    @classmethod
+    def create(cls, names, rows):
+        names = list(names)
+        # a block may not be empty
+        size = max(8 * rows * len(names), 1)
+        block = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            return cls(block, names, rows)
+        except BaseException:
+            block.close()
+            block.unlink()
+            raise
+
+    @classmethod
+    def attach(cls, spec):
+        block_name, names, rows = spec
+        if UNTRACKED_ATTACH:
+            block = shared_memory.SharedMemory(name=block_name, track=False)
+        else:
+            # registered again with the shared tracker, where the name is
+            # already known; unregistering here would drop the creator's
+            # entry as well
+            block = shared_memory.SharedMemory(name=block_name)
+        try:
+            return cls(block, names, rows)
+        except BaseException:
+            block.close()
+            raise
+
+    def spec(self):
+        """What attach() needs: (block name, column names, rows)."""
+        return self.block.name, self.names, self.rows
+
+    def close(self):
+        # the mapping can only be closed once no view of it is left
+        for column in self.columns.values():
+            column.release()
+        self.view.release()
+        self.block.close()
+
+    def unlink(self):
+        self.block.unlink()
+
+
+class BatchInterpreter(Interpreter):
+    """Interpreter running one program for one row of inputs at a time.
+
+    `inputs` maps object slots to the values of the current row; the
+    object's declaration of such a variable takes the row's value
+    instead of evaluating its initializer.
+    """
+
+    def __init__(self, tree, governor=None):
+        super().__init__(tree, governor)
+        self.inputs = {}
+
+    def visit_Declaration(self, node):
+        inputs = self.inputs
+        if node.depth == 0 and node.slot in inputs:
+            self.frames[0][node.slot] = inputs[node.slot]
+        else:
+            super().visit_Declaration(node)
+
+
+def batch_slots(tree, names):
+    """Object slots of the variables called `names`."""
+    slot_names = tree.body.slot_names
+    slots = []
+    for name in names:
+        if name not in slot_names:
+            raise NameError(repr(name))
+        slots.append(slot_names.index(name))
+    return slots
+
+
+def run_rows(tree, inputs, outputs, start, end):
+    """Run the program for rows `start` to `end` of the `inputs` columns,
+    storing each row's final values into the `outputs` columns.
+
+    Both map variable names to indexable columns.  Outputs must be INT
+    values that fit in 64 bits; an array or memoryview column raises on
+    anything else.
+    """
+    interpreter = BatchInterpreter(tree)
+    input_slots = list(zip(batch_slots(tree, inputs), inputs.values()))
+    output_slots = list(zip(batch_slots(tree, outputs), outputs.values()))
+    row_inputs = interpreter.inputs
+    for row in range(start, end):
+        for slot, column in input_slots:
+            row_inputs[slot] = column[row]
+        interpreter.visit(tree)
+        frame = interpreter.frames[0]
+        for slot, column in output_slots:
+            column[row] = frame[slot]
+
+
+def run_shared(tree, input_spec, output_spec, start, end):
+    """run_rows() for a worker, over SharedColumns of the parent."""
+    inputs = SharedColumns.attach(input_spec)
+    try:
+        outputs = SharedColumns.attach(output_spec)
+        try:
+            run_rows(tree, inputs.columns, outputs.columns, start, end)
+        finally:
+            outputs.close()
+    finally:
+        inputs.close()
+
+
+def run_pickled(tree, inputs, names, rows):
+    """run_rows() for a worker, on columns sent and returned pickled."""
+    outputs = {name: array('q', bytes(8 * rows)) for name in names}
+    run_rows(tree, inputs, outputs, 0, rows)
+    return outputs
+
+
+def batch_pool(workers=None):
+    """Process pool for run_batch() with shared columns.
+
+    The resource tracker is started first, so that processes the pool
+    forks share it with this one; see SharedColumns.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    resource_tracker.ensure_running()
+    return ProcessPoolExecutor(workers)
+
+
+def run_batch(tree, inputs, outputs=None, workers=None, executor=None,
+              shared=True):
+    """Run a program once per row of `inputs` in processes.
+
+    `inputs` maps variable names of the object to equally long columns
+    of ints (see BatchInterpreter); the result maps each of `outputs`,
+    by default every variable the object declares INT, to an
+    array('q') of its final value per row.  The tree is resolved if
+    need be and typed by TypeInferencer, so that INT arithmetic such as
+    REM stays integral.  The rows are split into one run per worker,
+    which reads and writes the columns in place in SharedColumns.
+    Creating and mapping the blocks costs more than pickling the
+    columns there and back up to between 10,000 and 100,000 rows in
+    the batch benchmark; pass shared=False for batches smaller than
+    that.  A shared run in an `executor` of your own needs one made by
+    batch_pool() before Python 3.13.
+    """
+    ensure_resolved(tree)
+    TypeInferencer().visit(tree)
+    body = tree.body
+    if outputs is None:
+        outputs = [body.slot_names[slot] for slot in int_slots(body)]
+    inputs = {name: column if isinstance(column, array)
+              and column.typecode == 'q' else array('q', column)
+              for name, column in inputs.items()}
+    rows = len(next(iter(inputs.values()))) if inputs else 1
+    if any(len(column) != rows for column in inputs.values()):
+        raise ValueError('input columns differ in length')
+    batch_slots(tree, list(inputs) + list(outputs))
+    workers = workers or os.cpu_count() or 1
+    if executor is None:
+        with batch_pool(workers) as executor:
+            return run_batch(tree, inputs, outputs, workers, executor, shared)
+    step = -(-rows // workers)
+    bounds = [(start, min(start + step, rows))
+              for start in range(0, rows, step or 1)]
+    if not shared:
+        futures = [executor.submit(run_pickled, tree,
+                                   {name: column[start:end]
+                                    for name, column in inputs.items()},
+                                   outputs, end - start)
+                   for start, end in bounds]
+        results = {name: array('q') for name in outputs}
+        for future in futures:
+            for name, column in future.result().items():
+                results[name].extend(column)
+        return results
+    input_columns = SharedColumns.create(inputs, rows)
+    try:
+        output_columns = SharedColumns.create(outputs, rows)
+        try:
+            for name, column in inputs.items():
+                input_columns.columns[name][:] = memoryview(column)
+            futures = [executor.submit(run_shared, tree, input_columns.spec(),
+                                       output_columns.spec(), start, end)
+                       for start, end in bounds]
+            for future in futures:
+                future.result()
+            results = {}
+            for name, column in output_columns.columns.items():
+                results[name] = array('q')
+                with column.cast('B') as data:
+                    results[name].frombytes(data)
+            return results
+        finally:
+            output_columns.close()
+            output_columns.unlink()
+    finally:
+        input_columns.close()
+        input_columns.unlink()
@@ -0,0 +1,364 @@
+import os
+import sys
+
+from .lexer import Lexer
+from .parser import Parser
+from .symbols import SymbolTableBuilder
+from .inference import TypeInferencer
+from .interpreter import ExecutionGovernor, ExecutionLimitExceeded, Interpreter
+
+
+# serialize.AST_SUFFIX; importing serialize here would slow down startup
+AST_SUFFIX = '.sast'
+
+# lexing and parsing in processes takes about twice the work of doing it
+# here (see the lex and parse benchmarks), so --jobs only uses them with
+# more cores than that and a source worth the cost of starting the pool
+PARALLEL_MIN_CORES = 3
+PARALLEL_MIN_SOURCE = 64 * 1024
+
+
+class Options(object):
+    """Command line defaults, used as is when no option is given."""
+    source = None
+    fused = False
+    lazy = False
+    optimize = False
+    dump_optimized = False
+    max_steps = None
+    time_limit = None
+    engine = 'tree'
+    pause_after = None
+    snapshot = 'program.snapshot'
+    resume = False
+    jobs = None
+    memo = False
+    profile = False
+    pgo = False
+    pipeline = False
+    typed_memory = False
+
+
+def parse_args(argv):
+    import argparse
+    arg_parser = argparse.ArgumentParser(
+        prog='scala_interpreter', description='Scala subset interpreter',
+        epilog='subcommands: compile SOURCE [-o OUTPUT], run SOURCE, '
+               'ast SOURCE [-o OUTPUT]; a SOURCE ending in {} is run '
+               'from its binary AST'.format(AST_SUFFIX),
+        argument_default=argparse.SUPPRESS)
+    arg_parser.add_argument('source', nargs='?',
+                            help='program file; stdin if omitted or -')
+    arg_parser.add_argument('--fused', action='store_true',
+                            help='resolve names while parsing')
+    arg_parser.add_argument('--lazy', action='store_true',
+                            help='parse braced bodies when first entered')
+    arg_parser.add_argument('--optimize', action='store_true',
+                            help='run the dead code optimizer')
+    arg_parser.add_argument('--dump-optimized', action='store_true',
+                            help='print the optimized AST')
+    arg_parser.add_argument('--max-steps', type=int,
+                            help='stop after this many steps; every engine '
+                                 'counts a loop going round again as one '
+                                 'step per statement of its body plus one')
+    arg_parser.add_argument('--time-limit', type=float,
+                            help='stop after this many seconds')
+    arg_parser.add_argument('--engine',
+                            choices=('tree', 'quicken', 'trace', 'vm'),
+                            help='tree-walking Interpreter (default), '
+                                 'self-specializing tree walker, tree '
+                                 'walker compiling hot loops, or bytecode VM')
+    arg_parser.add_argument('--pause-after', type=int, metavar='N',
+                            help='vm: stop after N statements and write '
+                                 'a snapshot')
+    arg_parser.add_argument('--snapshot',
+                            help='vm: snapshot file to write or resume')
+    arg_parser.add_argument('--resume', action='store_true',
+                            help='vm: continue from the snapshot file')
+    arg_parser.add_argument('--pipeline', action='store_true',
+                            help='lex in a background process while parsing')
+    arg_parser.add_argument('--jobs', type=int, metavar='N',
+                            help='run independent statements, and lex and '
+                                 'parse large sources, in up to N worker '
+                                 'processes, no more than there are cores')
+    arg_parser.add_argument('--memo', action='store_true',
+                            help='tree: cache results of large expressions '
+                                 'whose inputs did not change')
+    arg_parser.add_argument('--profile', action='store_true',
+                            help='tree: count branches and loop trips into '
+                                 'SOURCE.profile.json')
+    arg_parser.add_argument('--pgo', action='store_true',
+                            help='parse blocks that never ran lazily and '
+                                 'optimize with the --profile counts')
+    arg_parser.add_argument('--typed-memory', action='store_true',
+                            help='tree: keep INT variables of the object '
+                                 'unboxed in a 64-bit array')
+    args = arg_parser.parse_args(argv, namespace=Options())
+    check_options(arg_parser, args)
+    return args
+
+
+def check_options(arg_parser, args):
+    """Reject options that do not apply to the chosen --engine."""
+    if args.engine == 'vm':
+        if args.typed_memory:
+            arg_parser.error('--typed-memory needs a tree engine')
+    elif args.pause_after is not None or args.resume:
+        arg_parser.error('--pause-after and --resume need --engine vm')
+    if args.memo and args.engine != 'tree':
+        arg_parser.error('--memo needs --engine tree')
+    if args.profile and args.engine != 'tree':
+        arg_parser.error('--profile needs --engine tree')
+    if args.profile and args.memo:
+        arg_parser.error('--profile and --memo cannot be combined')
+    if (args.jobs or 1) >= PARALLEL_MIN_CORES:
+        # large sources are then lexed and parsed in the worker processes
+        for option in ('lazy', 'pipeline'):
+            if getattr(args, option):
+                arg_parser.error('--{} cannot be combined with --jobs {} or '
+                                 'more'.format(option, PARALLEL_MIN_CORES))
+    if is_ast(args.source):
+        # the tree is already parsed and resolved
+        for option in ('fused', 'lazy', 'pipeline', 'jobs', 'profile', 'pgo'):
+            if getattr(args, option):
+                arg_parser.error('--{} needs program text, not a binary '
+                                 'AST'.format(option))
+
+
+def is_ast(path):
+    return path is not None and path.endswith(AST_SUFFIX)
+
+
+def read_source(path):
+    """Program text of a file, or of stdin for None and '-'."""
+    if path is None or path == '-':
+        return sys.stdin.read()
+    with open(path) as f:
+        return f.read()
+
+
+def print_memory(memory):
+    print('')
+    print('Run-time GLOBAL_MEMORY contents:')
+    for k, v in sorted(memory.items()):
+        print('{} = {}'.format(k, v))
+
+
+def compile_command(argv):
+    import argparse
+    from .aot import compile_file
+    arg_parser = argparse.ArgumentParser(
+        prog='scala_interpreter compile',
+        description='compile a source file to a .scalac artifact')
+    arg_parser.add_argument('source')
+    arg_parser.add_argument('-o', '--output')
+    args = arg_parser.parse_args(argv)
+    print('Wrote {}'.format(compile_file(args.source, args.output)))
+
+
+def run_command(argv):
+    import argparse
+    from .aot import cached_compile
+    from .vm import VM
+    arg_parser = argparse.ArgumentParser(
+        prog='scala_interpreter run',
+        description='run a source file on the VM, using its artifact if fresh')
+    arg_parser.add_argument('source')
+    args = arg_parser.parse_args(argv)
+    vm = VM(cached_compile(args.source))
+    vm.run()
+    print_memory(vm.GLOBAL_MEMORY)
+
+
+def ast_command(argv):
+    import argparse
+    from .serialize import ast_path, serialize_ast
+    arg_parser = argparse.ArgumentParser(
+        prog='scala_interpreter ast',
+        description='parse and resolve a source file into a binary AST '
+                    'that runs without parsing it again')
+    arg_parser.add_argument('source')
+    arg_parser.add_argument('-o', '--output')
+    args = arg_parser.parse_args(argv)
+    tree = Parser(Lexer(read_source(args.source)), fused=True).parse()
+    output = args.output or ast_path(args.source)
+    # readers map the file, so never change one in place
+    tmp_path = '{}.{}.tmp'.format(output, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(serialize_ast(tree, resolved=True))
+    os.replace(tmp_path, output)
+    print('Wrote {}'.format(output))
+
+
+COMMANDS = {
+    'compile': compile_command,
+    'run': run_command,
+    'ast': ast_command,
+}
+
+
+def worker_count(jobs):
+    """Worker processes --jobs gets to use; 1 runs everything here."""
+    return min(jobs or 1, os.cpu_count() or 1)
+
+
+def tree_interpreter(args, tree, governor, executor, jobs=1):
+    """The tree-walking interpreter for --engine and the options that
+    check_options() allows with it."""
+    if args.engine == 'quicken':
+        from .quicken import QuickeningInterpreter
+        return QuickeningInterpreter(tree, governor)
+    if args.engine == 'trace':
+        from .tracing import TracingInterpreter
+        return TracingInterpreter(tree, governor)
+    if args.profile:
+        from .pgo import ProfilingInterpreter
+        return ProfilingInterpreter(tree, governor)
+    if args.memo:
+        from .memo import MemoInterpreter
+        return MemoInterpreter(tree, governor)
+    if executor is not None:
+        if governor is None:
+            from .parallel import ParallelInterpreter
+            return ParallelInterpreter(tree, jobs, executor)
+        # one step budget or deadline cannot be split between processes
+        print('Warning: --jobs only lexes and parses in processes with '
+              '--max-steps or --time-limit; statements run here',
+              file=sys.stderr)
+    return Interpreter(tree, governor)
+
+
+def parse_source(args, text, profile, executor=None, jobs=1):
+    """Parse and resolve program text as the options say, in `jobs`
+    processes of `executor` if that pays off."""
+    if jobs >= PARALLEL_MIN_CORES and len(text) >= PARALLEL_MIN_SOURCE:
+        from .lexer import lex_parallel
+        lexer = lex_parallel(text, jobs, executor)
+        parser = Parser(lexer, fused=args.fused)
+        tree = parser.parse_parallel(jobs, executor)
+    else:
+        lazy = profile.cold if profile is not None else args.lazy
+        if args.pipeline:
+            from .lexer import TokenBuffer, lex_background
+            from .tokens import NameTable
+            names = NameTable()
+            lexer = TokenBuffer(lex_background(text, names=names), text=text,
+                                names=names)
+        else:
+            lexer = Lexer(text)
+        parser = Parser(lexer, fused=args.fused, lazy=lazy)
+        tree = parser.parse()
+    if parser.symtab is not None:
+        symtab = parser.symtab
+    else:
+        # the Lexer's NameTable, whose ids the tokens carry
+        symtab_builder = SymbolTableBuilder(getattr(parser.lexer, 'names',
+                                                    None))
+        symtab_builder.visit(tree)
+        symtab = symtab_builder.symtab
+    print('')
+    print('Symbol Table contents:')
+    print(symtab)
+    return tree
+
+
+def run_program(args, executor=None, jobs=1):
+    """Parse, optimize and run the program `args` names and return its
+    memory at the end."""
+    profile = None
+    if is_ast(args.source):
+        from .serialize import load_ast
+        text = None
+        tree = load_ast(args.source)
+    else:
+        text = read_source(args.source)
+        if args.profile or args.pgo:
+            from .pgo import profile_path
+            source = args.source if args.source not in (None, '-') \
+                else 'program'
+            profile_file = profile_path(source)
+        if args.pgo:
+            from .pgo import load_profile
+            profile = load_profile(profile_file, text)
+            if profile is None:
+                print('No profile of this program in {}'.format(
+                    profile_file))
+        tree = parse_source(args, text, profile, executor, jobs)
+    TypeInferencer().visit(tree)
+    if args.optimize or args.dump_optimized or profile is not None:
+        from .optimizer import ASTDumper, Optimizer
+        optimizer = Optimizer(profile=profile)
+        optimizer.optimize(tree)
+        if args.dump_optimized:
+            print('')
+            print('Optimized AST:')
+            print(ASTDumper().dump(tree))
+            print('Removed nodes: {}'.format(optimizer.removed))
+            print('Summarized loops: {}'.format(optimizer.summarized))
+            print('Unrolled loops: {}'.format(optimizer.unrolled))
+
+    governor = None
+    if args.max_steps is not None or args.time_limit is not None:
+        governor = ExecutionGovernor(args.max_steps, args.time_limit)
+    if args.engine == 'vm':
+        from .vm import Compiler, VM
+        code = Compiler().compile(tree)
+        if args.resume:
+            with open(args.snapshot, 'rb') as f:
+                vm = VM.restore(code, f.read())
+        else:
+            vm = VM(code)
+        try:
+            finished = vm.run(args.pause_after, governor)
+        except ExecutionLimitExceeded as e:
+            print('')
+            print('Stopped: {}'.format(e))
+            finished = False
+        if not finished:
+            with open(args.snapshot, 'wb') as f:
+                f.write(vm.snapshot())
+            print('')
+            print('Paused, snapshot written to {}'.format(args.snapshot))
+        memory = vm.GLOBAL_MEMORY
+    else:
+        interpreter = tree_interpreter(args, tree, governor, executor, jobs)
+        interpreter.typed_memory = args.typed_memory
+        try:
+            interpreter.interpret()
+            memory = interpreter.GLOBAL_MEMORY
+        except ExecutionLimitExceeded as e:
+            print('')
+            print('Stopped: {}'.format(e))
+            memory = e.memory
+        if hasattr(interpreter, 'stats'):
+            print('')
+            print('Memo: {}'.format(interpreter.stats()))
+        if args.profile:
+            from .pgo import write_profile
+            write_profile(profile_file, interpreter.profile(text))
+            print('')
+            print('Profile written to {}'.format(profile_file))
+    return memory
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+    if len(argv) > 1 or argv and argv[0].startswith('-') and argv[0] != '-':
+        args = parse_args(argv)
+    else:
+        # a bare file name (or nothing) is the common case; it does not
+        # need argparse, which costs more to import than the interpreter
+        args = Options()
+        args.source = argv[0] if argv else None
+    jobs = worker_count(args.jobs)
+    if jobs == 1:
+        memory = run_program(args)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        # shut the workers down on errors and limits too
+        with ProcessPoolExecutor(jobs) as executor:
+            memory = run_program(args, executor, jobs)
+    print_memory(memory)
@@ -0,0 +1,87 @@
+from array import array
+
+from .nodes import Declaration
+from .inference import INT_TYPE_NAMES
+
+
+def int_slots(body):
+    """Slots of a Body's frame that every Declaration of them types INT."""
+    typed = {}
+    for child in body.children:
+        if isinstance(child, Declaration):
+            is_int = child.type_node.value in INT_TYPE_NAMES
+            typed[child.slot] = typed.get(child.slot, True) and is_int
+    return sorted(slot for slot, is_int in typed.items() if is_int)
+
+
+# IntFrame.kinds entries
+UNSET = 0
+UNBOXED = 1
+BOXED = 2
+
+
+class IntFrame(object):
+    """Frame of an object body keeping its INT variables unboxed.
+
+    Indexes, iterates and measures like the list frames the interpreters
+    use otherwise.  `kinds[s]` tells where the value of slot `s` is: in
+    `ints`, an array('q'), for UNBOXED, in the `boxed` dict for BOXED,
+    and UNSET until the slot is first stored to.  Only the slots in
+    `int_slots` are ever UNBOXED; one of them is promoted to BOXED by a
+    store of a value that is not an int or does not fit in 64 bits, and
+    goes back to `ints` on the next store that fits.
+
+    snapshot() copies the whole array in one buffer copy.
+    """
+
+    def __init__(self, size, int_slots=()):
+        self.ints = array('q', bytes(8 * size))
+        self.kinds = bytearray(size)
+        self.int_slots = frozenset(int_slots)
+        self.boxed = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __iter__(self):
+        for slot in range(len(self.kinds)):
+            yield self[slot]
+
+    def __getitem__(self, slot):
+        kind = self.kinds[slot]
+        if kind == UNBOXED:
+            return self.ints[slot]
+        if kind == BOXED:
+            return self.boxed[slot]
+        return None
+
+    def __setitem__(self, slot, value):
+        if type(value) is int and slot in self.int_slots:
+            try:
+                self.ints[slot] = value
+            except OverflowError:
+                pass
+            else:
+                if self.kinds[slot] == BOXED:
+                    del self.boxed[slot]
+                self.kinds[slot] = UNBOXED
+                return
+        self.boxed[slot] = value
+        self.kinds[slot] = BOXED
+
+    @property
+    def promoted(self):
+        """INT slots currently holding a boxed value."""
+        return sorted(slot for slot in self.boxed if slot in self.int_slots)
+
+    def snapshot(self):
+        """The frame's contents as (array bytes, kinds bytes, boxed slots)."""
+        return self.ints.tobytes(), bytes(self.kinds), dict(self.boxed)
+
+    def restore(self, state):
+        """Put back the contents of a snapshot() of a frame of this size."""
+        data, kinds, boxed = state
+        self.ints = array('q')
+        self.ints.frombytes(data)
+        self.kinds = bytearray(kinds)
+        self.boxed = dict(boxed)
@@ -0,0 +1,113 @@
+import operator
+
+from .tokens import (DEQUAL, DIV, GEQUAL, GREATHAN, INT, LEQUAL, LESSTHAN,
+                     MINUS, MUL, PLUS, REM)
+from .nodes import NodeVisitor
+
+
+# integer-only evaluators the Interpreter switches to once TypeInferencer
+# has proven both operands of a BinOp to be INT
+INT_BINOPS = {
+    PLUS: operator.add,
+    MINUS: operator.sub,
+    MUL: operator.mul,
+    DIV: operator.floordiv,
+    REM: operator.mod,
+}
+
+INT_TYPE_NAMES = ('INT', 'INTEGER')
+
+
+def compare(comp_op, left, right):
+    """Evaluate the comparison operator of a Cond_stmt."""
+    if comp_op == LESSTHAN:
+        return left < right
+    elif comp_op == LEQUAL:
+        return left <= right
+    elif comp_op == GREATHAN:
+        return left > right
+    elif comp_op == GEQUAL:
+        return left >= right
+    elif comp_op == DEQUAL:
+        return left == right
+    raise Exception('Invalid comparison {}'.format(comp_op))
+
+
+def binop_value(node, left, right):
+    """Apply the operator of a BinOp to already evaluated operands."""
+    if node.int_op is not None:
+        return node.int_op(left, right)
+    if node.op.type == REM:
+        return float(left) % float(right)
+    return INT_BINOPS[node.op.type](left, right)
+
+
+class TypeInferencer(NodeVisitor):
+    """Annotate every expression of a resolved tree with its static type.
+
+    Needs the symbols attached to Var nodes by SymbolTableBuilder (or the
+    fused parser).  Expressions whose type can be proven get
+    `static_type = INT`; BinOps over two INT operands additionally get an
+    `int_op` that the Interpreter calls directly.
+    """
+
+    def visit_Program(self, node):
+        self.visit(node.body)
+
+    def visit_Body(self, node):
+        for child in node.children:
+            self.visit(child)
+
+    def visit_LazyBody(self, node):
+        # a body not parsed yet is annotated when it is
+        node.after_load(self.visit_children)
+
+    def visit_children(self, children):
+        for child in children:
+            self.visit(child)
+
+    def visit_NoOp(self, node):
+        pass
+
+    def visit_Declaration(self, node):
+        self.visit(node.val)
+
+    def visit_Assign_stmt(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit_Cond_stmt(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit_If_stmt(self, node):
+        self.visit(node.condition)
+        self.visit(node.body)
+        self.visit(node.else_block)
+
+    def visit_DO_stmt(self, node):
+        self.visit(node.do_body)
+        self.visit(node.condition)
+
+    def visit_Num(self, node):
+        if type(node.value) is int:
+            node.static_type = INT
+        return node.static_type
+
+    def visit_Var(self, node):
+        type_symbol = node.symbol.type
+        if type_symbol is not None and type_symbol.name in INT_TYPE_NAMES:
+            node.static_type = INT
+        return node.static_type
+
+    def visit_UnaryOp(self, node):
+        node.static_type = self.visit(node.expr)
+        return node.static_type
+
+    def visit_BinOp(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if left == INT and right == INT:
+            node.static_type = INT
+            node.int_op = INT_BINOPS[node.op.type]
+        return node.static_type
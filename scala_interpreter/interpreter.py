@@ -0,0 +1,322 @@
+import time
+
+from .tokens import (DEQUAL, DIV, GEQUAL, GREATHAN, LEQUAL, LESSTHAN, MINUS,
+                     MUL, PLUS, REM)
+from .nodes import NodeVisitor
+from .inference import compare
+from .symbols import ensure_resolved
+
+
+def trip_count(comp_op, start, step, bound):
+    """How often a do-while body runs, or None if the loop never ends.
+
+    The counter starts at `start`, moves by `step` in every iteration and
+    the loop goes on while `counter comp_op bound`; all are ints.
+    """
+    if comp_op in (GREATHAN, GEQUAL):
+        # count down by counting up on the negated values
+        start, step, bound = -start, -step, -bound
+        comp_op = LESSTHAN if comp_op == GREATHAN else LEQUAL
+    if comp_op == LEQUAL:
+        comp_op, bound = LESSTHAN, bound + 1
+    if comp_op == LESSTHAN:
+        if start + step >= bound:
+            return 1
+        if step <= 0:
+            return None
+        return -((start - bound) // step)
+    if comp_op == DEQUAL:
+        if start + step != bound:
+            return 1
+        return 2 if step else None
+    return None
+
+
+class ExecutionLimitExceeded(Exception):
+    """A program ran past the step budget or deadline of its governor.
+
+    `memory` holds the GLOBAL_MEMORY contents at the point it was stopped.
+    """
+
+    def __init__(self, message, steps):
+        super().__init__(message)
+        self.steps = steps
+        self.memory = {}
+
+
+class ExecutionGovernor(object):
+    """Step budget and wall-clock deadline for an Interpreter run.
+
+    The interpreter reports steps once per loop iteration; limits are only
+    compared every `check_every` steps (and exactly when the budget is
+    reached), so the clock is read rarely.
+    """
+
+    def __init__(self, max_steps=None, time_limit=None, check_every=1024):
+        self.max_steps = max_steps
+        self.time_limit = time_limit
+        self.check_every = check_every
+        self.steps = 0
+        self.deadline = None
+        self._next_check = 0
+
+    def start(self):
+        self.steps = 0
+        if self.time_limit is not None:
+            self.deadline = time.monotonic() + self.time_limit
+        self._schedule()
+
+    def _schedule(self):
+        next_check = self.steps + self.check_every
+        if self.max_steps is not None:
+            next_check = min(next_check, self.max_steps + 1)
+        self._next_check = next_check
+
+    def tick(self, steps):
+        self.steps += steps
+        if self.steps >= self._next_check:
+            self.check()
+
+    def check(self):
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise ExecutionLimitExceeded(
+                'Step budget of {} exceeded'.format(self.max_steps),
+                self.steps)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ExecutionLimitExceeded(
+                'Time limit of {}s exceeded'.format(self.time_limit),
+                self.steps)
+        self._schedule()
+
+
+class Interpreter(NodeVisitor):
+    # keep the object body's INT variables in an IntFrame
+    typed_memory = False
+
+    def __init__(self, tree, governor=None):
+        # ParallelInterpreter's workers visit statements without a tree
+        self.tree = tree if tree is None else ensure_resolved(tree)
+        self.governor = governor
+        # one frame per open block, indexed by the depth that
+        # SymbolTableBuilder stored on every Var and Declaration
+        self.frames = []
+
+    @property
+    def GLOBAL_MEMORY(self):
+        """Mapping view of the variables of the object body."""
+        if not self.frames:
+            return {}
+        names = self.tree.body.slot_names
+        return {name: value for name, value in zip(names, self.frames[0])
+                if value is not None}
+
+    def global_frame(self, body):
+        """A fresh frame for the object body."""
+        if self.typed_memory:
+            # array pulls in collections, so only typed runs import it
+            from .environment import IntFrame, int_slots
+            return IntFrame(body.frame_size, int_slots(body))
+        return [None] * body.frame_size
+
+    def visit_Program(self, node):
+        body = node.body
+        self.frames = [self.global_frame(body)]
+        for child in body.children:
+            self.visit(child)
+
+    def visit_Declaration(self, node):
+        self.frames[node.depth][node.slot] = self.visit(node.val)
+
+    def visit_Type(self, node):
+        # Do nothing
+        pass
+
+    def visit_BinOp(self, node):
+        int_op = node.int_op
+        if int_op is not None:
+            return int_op(self.visit(node.left), self.visit(node.right))
+        if node.op.type == PLUS:
+            return self.visit(node.left) + self.visit(node.right)
+        elif node.op.type == MINUS:
+            return self.visit(node.left) - self.visit(node.right)
+        elif node.op.type == MUL:
+            return self.visit(node.left) * self.visit(node.right)
+        elif node.op.type == DIV:
+            return self.visit(node.left) // self.visit(node.right)
+        elif node.op.type == REM:
+            return float(self.visit(node.left)) % float(self.visit(node.right))
+
+    def visit_Num(self, node):
+        return node.value
+
+    def visit_UnaryOp(self, node):
+        op = node.op.type
+        if op == PLUS:
+            return +self.visit(node.expr)
+        elif op == MINUS:
+            return -self.visit(node.expr)
+
+    def visit_Body(self, node):
+        self.frames.append([None] * node.frame_size)
+        for child in node.children:
+            self.visit(child)
+        self.frames.pop()
+
+    def visit_Assign_stmt(self, node):
+        var_node = node.left
+        var_value = self.visit(node.right)
+        self.frames[var_node.depth][var_node.slot] = var_value
+
+    def visit_Var(self, node):
+        return self.frames[node.depth][node.slot]
+
+    def visit_Cond_stmt(self, node):
+        return compare(node.comp_op, self.visit(node.left),
+                       self.visit(node.right))
+
+    def visit_If_stmt(self, node):
+        if self.visit(node.condition):
+            self.visit(node.body)
+        else:
+            self.visit(node.else_block)
+
+    def visit_DO_stmt(self, node):
+        governor = self.governor
+        self.visit(node.do_body)
+        while self.visit(node.condition):
+            if governor is not None:
+                # one step per statement of the body plus the condition
+                governor.tick(len(node.do_body.children) + 1)
+            self.visit(node.do_body)
+
+    def visit_ClosedFormLoop(self, node):
+        if not self.run_closed_form(node):
+            self.visit_DO_stmt(node)
+
+    def visit_UnrolledLoop(self, node):
+        governor = self.governor
+        body = node.do_body
+        condition = node.condition
+        frames = self.frames
+        size = body.frame_size
+        visit = self.visit
+        trips = None
+        if governor is None and node.counter is not None:
+            trips = self.unrolled_trips(node)
+        visit(body)
+        if trips is not None:
+            # the copies reuse one frame: each reads only what it declared
+            blocks, rest = divmod(trips - 1, node.factor)
+            unchecked = node.unchecked
+            for _ in range(blocks):
+                frames.append([None] * size)
+                for child in unchecked:
+                    visit(child)
+                frames.pop()
+            for _ in range(rest):
+                visit(body)
+            return
+        ticks = len(body.children) + 1
+        checked = node.checked
+        while visit(condition):
+            if governor is not None:
+                governor.tick(ticks)
+            frames.append([None] * size)
+            for child in checked:
+                if child is not condition:
+                    visit(child)
+                    continue
+                if not visit(condition):
+                    frames.pop()
+                    return
+                if governor is not None:
+                    governor.tick(ticks)
+            frames.pop()
+
+    def unrolled_trips(self, node):
+        """Trip count of an UnrolledLoop with a counter, taken on entry,
+        or None if it has no end or the values are not INTs."""
+        depth, slot = node.counter
+        start = self.frames[depth][slot]
+        step = self.visit(node.step)
+        bound = self.visit(node.bound)
+        if type(start) is not int or type(step) is not int:
+            return None
+        if type(bound) is not int:
+            return None
+        return trip_count(node.comp_op, start, node.sign * step, bound)
+
+    def run_closed_form(self, node):
+        """Store the final values of a ClosedFormLoop; False if the
+        run-time values rule it out (non-INT values, no end, or a step
+        budget the loop would run past)."""
+        frames = self.frames
+        operands = {}
+        steps = {}
+        for kind, key, operand, sign in node.updates:
+            if kind == 'sum':
+                continue
+            value = self.visit(operand)
+            if kind == 'step':
+                if type(value) is not int:
+                    return False
+                steps[key] = sign * value
+            operands[key] = value
+        depth, slot = node.counter
+        start = frames[depth][slot]
+        bound = self.visit(node.bound)
+        if type(start) is not int or type(bound) is not int:
+            return False
+        trips = trip_count(node.comp_op, start, steps[node.counter], bound)
+        if trips is None:
+            return False
+        governor = self.governor
+        if governor is not None:
+            # the loop would tick once per iteration after the first
+            ticks = (trips - 1) * (len(node.do_body.children) + 1)
+            if (governor.max_steps is not None
+                    and governor.steps + ticks > governor.max_steps):
+                return False
+        values = {}
+        for index, (kind, key, operand, sign) in enumerate(node.updates):
+            depth, slot = key
+            if kind == 'set':
+                values[key] = operands[key]
+                continue
+            initial = frames[depth][slot]
+            if type(initial) is not int:
+                return False
+            if kind == 'step':
+                values[key] = initial + trips * steps[key]
+                continue
+            source = frames[operand[0]][operand[1]]
+            if type(source) is not int:
+                return False
+            # w goes through w0 + k * step for k = 1..trips when updated
+            # before this statement, k = 0..trips - 1 when after it
+            updated_before = any(
+                other == operand for _, other, _, _ in node.updates[:index])
+            offset = 1 if updated_before else -1
+            total = trips * source + steps[operand] * trips * (trips + offset) // 2
+            values[key] = initial + sign * total
+        if governor is not None:
+            governor.tick(ticks)
+        for (depth, slot), value in values.items():
+            frames[depth][slot] = value
+        return True
+
+    def visit_NoOp(self, node):
+        pass
+
+    def interpret(self):
+        tree = self.tree
+        if tree is None:
+            return ''
+        if self.governor is None:
+            return self.visit(tree)
+        self.governor.start()
+        try:
+            return self.visit(tree)
+        except ExecutionLimitExceeded as e:
+            e.memory = self.GLOBAL_MEMORY
+            raise
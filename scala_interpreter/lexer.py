@@ -0,0 +1,587 @@
+import bisect
+import os
+
+from .tokens import EOF, ID, KEYWORD_SPELLINGS, NameTable, Token
+
+
+class LineIndex(object):
+    """Offsets at which the lines of a text start, for turning token
+    offsets into (line, column) pairs counted from 1."""
+
+    def __init__(self, text):
+        starts = [0]
+        pos = text.find('\n')
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = text.find('\n', pos + 1)
+        self.starts = starts
+
+    def location(self, offset):
+        line = bisect.bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+
+class TokenSource(object):
+    """Base of the Lexer and its stand-ins: maps the `pos` offsets of
+    their tokens into `text` back to lines and columns.
+
+    Tokens only store their start offset; the line index is built on
+    the first location() call, which only errors make.  `names` is the
+    NameTable the name ids of the ID tokens refer to, if known.
+    """
+
+    text = None
+    names = None
+    # offset of the EOF token when not the end of `text`, e.g. the
+    # closing brace of a block whose tokens are handed out
+    end = None
+    _lines = None
+
+    def location(self, offset):
+        """(line, column) of an offset into `text`, None if unknown."""
+        if self.text is None or offset is None:
+            return None
+        if self._lines is None:
+            self._lines = LineIndex(self.text)
+        return self._lines.location(offset)
+
+    def eof(self):
+        """The EOF token, at `end` or else the end of `text` if known."""
+        end = self.end
+        if end is None and self.text is not None:
+            end = len(self.text)
+        return Token(EOF, None, end)
+
+
+class Lexer(TokenSource):
+    def __init__(self, text, names=None, pos=0):
+        # client string input, e.g. "4 + 2 * 3 - 6 / 2"
+        self.text = text
+        # identifiers are interned here as they are scanned
+        self.names = NameTable() if names is None else names
+        # self.pos is an index into self.text, where lexing starts
+        self.pos = pos
+        self.current_char = self.text[pos] if pos < len(text) else None
+
+    def error(self):
+        line, column = self.location(self.pos)
+        raise Exception('Invalid character {!r} at line {}, column {}'.format(
+            self.current_char, line, column))
+
+    def advance(self):
+        """Advance the `pos` pointer and set the `current_char` variable."""
+        self.pos += 1
+        if self.pos > len(self.text) - 1:
+            self.current_char = None  # Indicates end of input
+        else:
+            self.current_char = self.text[self.pos]
+
+    def peek(self):
+        peek_pos = self.pos + 1
+        if peek_pos > len(self.text) - 1:
+            return None
+        else:
+            return self.text[peek_pos]
+
+    def peek_token(self, k=1):
+        """The k-th token get_next_token() will return, without eating it."""
+        pos, current_char = self.pos, self.current_char
+        try:
+            for _ in range(k):
+                token = self.get_next_token()
+        finally:
+            self.pos, self.current_char = pos, current_char
+        return token
+
+    def skip_whitespace(self):
+        while self.current_char is not None and self.current_char.isspace():
+            self.advance()
+
+    def skip_comment(self):
+        while self.current_char != '/' or self.peek() != '*':
+            self.advance()
+        self.advance()
+        self.advance()
+
+    def number(self):
+        """Return a (multidigit) integer  consumed from the input."""
+        start = self.pos
+        result = ''
+        while self.current_char is not None and self.current_char.isdigit():
+            result += self.current_char
+            self.advance()
+
+            token = Token('INTEGER', int(result), start)
+
+        return token
+
+    def _id(self):
+        """Handle identifiers and reserved keywords"""
+        text = self.text
+        start = pos = self.pos
+        end = len(text)
+        while pos < end and text[pos].isalnum():
+            pos += 1
+        self.pos = pos
+        self.current_char = text[pos] if pos < end else None
+        result = text[start:pos]
+        keyword = KEYWORD_SPELLINGS.get(result)
+        if keyword is not None:
+            return Token(keyword.type, keyword.value, start)
+        names = self.names
+        name_id = names.intern(result)
+        token = Token(ID, names.names[name_id], start)
+        token.name_id = name_id
+        return token
+
+    # need to implement if ,else methods.
+
+    def get_next_token(self):
+        """Lexical analyzer (also known as scanner or tokenizer)
+        This method is responsible for breaking a sentence
+        apart into tokens. One token at a time.
+        """
+        while self.current_char is not None:
+            char = self.current_char
+            start = self.pos
+
+            if char == '{':
+                self.advance()
+                return Token('LCURL', '{', start)
+
+            elif char == '*' and self.peek() == '/':
+                self.advance()
+                self.advance()
+                self.skip_comment()
+                continue
+            elif char.isspace():
+                self.skip_whitespace()
+                continue
+            elif char == '<' and self.peek() == '=':
+                self.advance()
+                self.advance()
+                return Token('LEQUAL', '<=', start)
+            elif char == '<':
+                self.advance()
+                return Token('LESSTHAN', '<', start)
+            elif char == '>' and self.peek() == '=':
+                self.advance()
+                self.advance()
+                return Token('GEQUAL', '>=', start)
+
+            elif char == '>':
+                self.advance()
+                return Token('GREATHAN', '<', start)
+            elif char == '=' and self.peek() == '=':
+                self.advance()
+                self.advance()
+                return Token('DEQUAL', '==', start)
+            elif char == '=':
+                self.advance()
+                return Token('ASSIGN', '=', start)
+
+
+            # in scala the starting char of the variable should not be a digit.
+            elif char.isalpha():
+                return self._id()
+
+            elif char.isdigit():
+                return self.number()
+
+            elif char == ';':
+                self.advance()
+                return Token('SEMI', ';', start)
+            elif char == '\n':
+                self.advance()
+                return Token('EOL', '\n', start)
+
+            elif char == '+':
+                self.advance()
+                return Token('PLUS', '+', start)
+
+            elif char == '-':
+                self.advance()
+                return Token('MINUS', '-', start)
+
+            elif char == '*':
+                self.advance()
+                return Token('MUL', '*', start)
+
+            elif char == '/':
+                self.advance()
+                return Token('DIV', '/', start)
+
+            elif char == '(':
+                self.advance()
+                return Token('LPAREN', '(', start)
+
+            elif char == ')':
+                self.advance()
+                return Token('RPAREN', ')', start)
+
+            elif char == ':':
+                self.advance()
+                return Token('COLON', ':', start)
+
+            elif char == '}':
+                self.advance()
+                return Token('RCURL', '}', start)
+
+            elif char == '%':
+                self.advance()
+                return Token('REM', '%', start)
+
+            self.error()
+
+        return Token(EOF, None, self.pos)
+
+    def checking(self):
+
+        currenttoken = None
+        while self.current_char is not None:
+            currenttoken = self.get_next_token()
+            print(currenttoken.type, " ", currenttoken.value)
+
+
+class TokenStream(TokenSource):
+    """Lexer stand-in that hands out an already scanned list of tokens.
+
+    `text` is the source the tokens' offsets refer to and `names` the
+    table of their name ids, if known; `end` is where EOF is reported.
+    """
+
+    def __init__(self, tokens, text=None, names=None, end=None):
+        self.tokens = tokens
+        self.text = text
+        self.names = names
+        self.end = end
+        self.index = 0
+
+    def get_next_token(self):
+        index = self.index
+        if index < len(self.tokens):
+            self.index = index + 1
+            return self.tokens[index]
+        return self.eof()
+
+    def peek_token(self, k=1):
+        index = self.index + k - 1
+        if index < len(self.tokens):
+            return self.tokens[index]
+        return self.eof()
+
+
+class TokenColumns(TokenSource):
+    """Lexer stand-in over parallel lists of token types, values,
+    start offsets into `text` and name ids in `names`.
+
+    Flat lists are far cheaper to send between processes than Token
+    objects; each Token is only built when the parser asks for it.
+    `name_ids` holds None for every token other than an ID, and `end`
+    is where EOF is reported if not at the end of `text`.
+    """
+
+    def __init__(self, types=None, values=None, positions=None, text=None,
+                 name_ids=None, names=None, end=None):
+        self.types = [] if types is None else types
+        self.values = [] if values is None else values
+        self.positions = [None] * len(self.types) if positions is None \
+            else positions
+        self.name_ids = [None] * len(self.types) if name_ids is None \
+            else name_ids
+        self.text = text
+        self.names = NameTable() if names is None else names
+        self.end = end
+        self.index = 0
+
+    def extend(self, types, values, positions, name_ids):
+        self.types.extend(types)
+        self.values.extend(values)
+        self.positions.extend(positions)
+        self.name_ids.extend(name_ids)
+
+    def token(self, index):
+        token = Token(self.types[index], self.values[index],
+                      self.positions[index])
+        token.name_id = self.name_ids[index]
+        return token
+
+    def get_next_token(self):
+        index = self.index
+        if index < len(self.types):
+            self.index = index + 1
+            return self.token(index)
+        return self.eof()
+
+    def peek_token(self, k=1):
+        index = self.index + k - 1
+        if index < len(self.types):
+            return self.token(index)
+        return self.eof()
+
+
+class TokenBuffer(TokenSource):
+    """Lexer stand-in reading ahead into a bounded ring buffer.
+
+    `batches` yields lists of tokens (EOF left out), e.g. lex_batches()
+    lexing in this process or lex_background() in another one; they
+    are copied into a ring of `capacity` slots as the parser drains it,
+    so at most that many tokens sit between lexer and parser and
+    peek_token() can look up to `capacity` tokens ahead.  `text` is the
+    source the tokens' offsets refer to and `names` the table of their
+    name ids, if known.
+    """
+
+    def __init__(self, batches, capacity=256, text=None, names=None):
+        self.batches = iter(batches)
+        self.text = text
+        self.names = names
+        self.capacity = capacity
+        self.ring = [None] * capacity
+        self.head = 0
+        self.count = 0
+        # tokens of the current batch not copied into the ring yet
+        self.batch = []
+        self.batch_index = 0
+
+    def load(self, needed):
+        """Have at least `needed` tokens in the ring; False at the end."""
+        if needed > self.capacity:
+            raise ValueError('cannot look {} tokens ahead with a buffer of '
+                             '{}'.format(needed, self.capacity))
+        ring = self.ring
+        capacity = self.capacity
+        while self.count < needed:
+            batch = self.batch
+            index = self.batch_index
+            if index == len(batch):
+                batch = next(self.batches, None)
+                if batch is None:
+                    self.batch, self.batch_index = [], 0
+                    return False
+                self.batch, self.batch_index = batch, 0
+                continue
+            take = min(capacity - self.count, len(batch) - index)
+            tail = (self.head + self.count) % capacity
+            for token in batch[index:index + take]:
+                ring[tail] = token
+                tail = tail + 1 if tail + 1 < capacity else 0
+            self.batch_index = index + take
+            self.count += take
+        return True
+
+    def get_next_token(self):
+        if not self.count and not self.load(1):
+            return self.eof()
+        head = self.head
+        token = self.ring[head]
+        self.ring[head] = None
+        self.head = head + 1 if head + 1 < self.capacity else 0
+        self.count -= 1
+        return token
+
+    def peek_token(self, k=1):
+        if self.count < k and not self.load(k):
+            return self.eof()
+        return self.ring[(self.head + k - 1) % self.capacity]
+
+
+def lex_batches(text, size=64, names=None):
+    """Lex `text` here, lazily, in lists of up to `size` tokens,
+    interning identifiers in `names`."""
+    lexer = Lexer(text, names)
+    batch = []
+    token = lexer.get_next_token()
+    while token.type != EOF:
+        batch.append(token)
+        if len(batch) == size:
+            yield batch
+            batch = []
+        token = lexer.get_next_token()
+    if batch:
+        yield batch
+
+
+def produce_batches(text, size, connection):
+    """Body of the lex_background() process."""
+    names = NameTable()
+    sent = 0
+    try:
+        for batch in lex_batches(text, size, names):
+            connection.send(([token.type for token in batch],
+                             [token.value for token in batch],
+                             [token.pos for token in batch],
+                             [token.name_id for token in batch],
+                             names.names[sent:]))
+            sent = len(names)
+        connection.send(None)
+    except Exception as e:
+        connection.send(e)
+    finally:
+        connection.close()
+
+
+def lex_background(text, size=512, names=None):
+    """Lex `text` in a background process, yielding its token batches.
+
+    Batches travel as (types, values, positions, name ids) columns over
+    a pipe, which holds only a bounded amount, so the lexer runs ahead
+    of the parser by a few batches at most.  A lexing error is raised
+    here, in order.  Each batch also carries the names the process has
+    interned since the previous one, which are interned in `names` too;
+    the tokens yielded carry their ids in that table.
+    """
+    if names is None:
+        names = NameTable()
+    # the id in `names` of every id the process handed out
+    ids = []
+    import multiprocessing
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=produce_batches,
+                                      args=(text, size, sender), daemon=True)
+    process.start()
+    sender.close()
+    try:
+        while True:
+            message = receiver.recv()
+            if message is None:
+                return
+            if isinstance(message, Exception):
+                raise message
+            types, values, positions, name_ids, new_names = message
+            ids.extend(names.intern(name) for name in new_names)
+            table = names.names
+            batch = []
+            for type, value, pos, name_id in zip(types, values, positions,
+                                                 name_ids):
+                if name_id is None:
+                    batch.append(Token(type, value, pos))
+                else:
+                    name_id = ids[name_id]
+                    token = Token(type, table[name_id], pos)
+                    token.name_id = name_id
+                    batch.append(token)
+            yield batch
+    finally:
+        receiver.close()
+        process.join()
+
+
+def comment_spans(text):
+    """(start, end) of every `*/ ... /*` comment, as the Lexer sees them.
+
+    A `*` is never part of a longer token, so every `*/` starts a
+    comment; an unterminated one runs to the end of the text.
+    """
+    spans = []
+    pos = text.find('*/')
+    while pos != -1:
+        end = text.find('/*', pos + 2)
+        end = len(text) if end == -1 else end + 2
+        spans.append((pos, end))
+        pos = text.find('*/', end)
+    return spans
+
+
+def split_source(text, parts):
+    """Cut `text` into at most `parts` chunks that lex independently.
+
+    Every cut is made right after a `;` or `}` outside comments, where
+    the Lexer is between tokens, so lexing the chunks one by one gives
+    exactly the tokens of the whole text.
+    """
+    spans = comment_spans(text)
+    starts = [start for start, _ in spans]
+    cuts = [0]
+    for i in range(1, parts):
+        pos = max(len(text) * i // parts, cuts[-1])
+        while pos < len(text):
+            semi = text.find(';', pos)
+            curl = text.find('}', pos)
+            found = min(semi, curl) if semi != -1 and curl != -1 else max(semi, curl)
+            if found == -1:
+                pos = len(text)
+                break
+            span = bisect.bisect_right(starts, found) - 1
+            if span >= 0 and found < spans[span][1]:
+                pos = spans[span][1]
+            else:
+                pos = found + 1
+                break
+        if pos >= len(text):
+            break
+        if pos > cuts[-1]:
+            cuts.append(pos)
+    cuts.append(len(text))
+    return [text[start:end] for start, end in zip(cuts, cuts[1:])]
+
+
+def tokenize(text, names=None):
+    """All tokens of `text` up to, but not including, EOF."""
+    lexer = Lexer(text, names)
+    tokens = []
+    token = lexer.get_next_token()
+    while token.type != EOF:
+        tokens.append(token)
+        token = lexer.get_next_token()
+    return tokens
+
+
+def tokenize_columns(text, offset=0, names=None):
+    """tokenize(), as (types, values, positions, name ids) lists;
+    `offset` is added to every position, for text cut out of a larger
+    source."""
+    tokens = tokenize(text, names)
+    return ([token.type for token in tokens],
+            [token.value for token in tokens],
+            [token.pos + offset for token in tokens],
+            [token.name_id for token in tokens])
+
+
+def lex_chunk(text, offset):
+    """tokenize_columns() for a lex_parallel() worker, with the names
+    list of the worker's NameTable that the name ids index."""
+    names = NameTable()
+    return tokenize_columns(text, offset, names) + (names.names,)
+
+
+def lex_parallel(text, workers=None, executor=None):
+    """Lex `text` in a process pool and return one TokenColumns stream.
+
+    The text is split with split_source(), one chunk per worker
+    (os.cpu_count() by default), and the chunks' tokens are joined in
+    order. Pass an `executor` to reuse a pool across calls; otherwise
+    one with `workers` processes is made.  Every worker interns names in
+    a table of its own; their ids are mapped to the stream's `names`.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(workers) as executor:
+            return lex_parallel(text, workers, executor)
+    chunks = split_source(text, workers)
+    offsets = [0]
+    for chunk in chunks[:-1]:
+        offsets.append(offsets[-1] + len(chunk))
+    futures = [executor.submit(lex_chunk, chunk, offset)
+               for chunk, offset in zip(chunks, offsets)]
+    stream = TokenColumns(text=text)
+    names = stream.names
+    for future, chunk, offset in zip(futures, chunks, offsets):
+        try:
+            types, values, positions, name_ids, chunk_names = future.result()
+        except Exception:
+            # the worker only saw its chunk; lex it again within the
+            # whole text for an error naming the line and column there
+            lexer = Lexer(text, pos=offset)
+            while lexer.pos < offset + len(chunk):
+                lexer.get_next_token()
+            raise
+        ids = [names.intern(name) for name in chunk_names]
+        for index, name_id in enumerate(name_ids):
+            if name_id is not None:
+                name_id = name_ids[index] = ids[name_id]
+                values[index] = names.names[name_id]
+        stream.extend(types, values, positions, name_ids)
+    return stream
@@ -0,0 +1,103 @@
+import collections
+
+from .interpreter import Interpreter
+from .optimizer import count_nodes, expr_reads
+
+
+class MemoInterpreter(Interpreter):
+    """Interpreter that skips re-evaluating unchanged BinOp trees.
+
+    Every variable slot carries a version, bumped whenever the slot is
+    stored to; a block's frame starts with a version no other frame has
+    used.  A BinOp subtree of at least `threshold` nodes keeps its last
+    result together with the versions of the variables it read, and is
+    not evaluated again while those versions match.  Expressions have no
+    side effects, so only the inputs matter; one that raises is simply
+    not cached.
+
+    At most `capacity` expressions are cached, the least recently used
+    one is evicted first.  `hits`, `misses` and `evictions` count lookups.
+    """
+
+    def __init__(self, tree, governor=None, capacity=1024, threshold=8):
+        super().__init__(tree, governor)
+        self.capacity = capacity
+        self.threshold = threshold
+        # BinOp -> tuple of the (depth, slot) pairs it reads, or None
+        # when it is too small to be worth caching
+        self.plans = {}
+        # BinOp -> (versions of its reads, value), oldest use first
+        self.cache = collections.OrderedDict()
+        self.versions = []
+        self.clock = 0
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return 'hits {} misses {} evictions {} hit rate {:.1%}'.format(
+            self.hits, self.misses, self.evictions, self.hit_rate)
+
+    def visit_Program(self, node):
+        self.versions = [[0] * node.body.frame_size]
+        super().visit_Program(node)
+
+    def visit_Body(self, node):
+        self.clock += 1
+        self.versions.append([self.clock] * node.frame_size)
+        super().visit_Body(node)
+        self.versions.pop()
+
+    def visit_Declaration(self, node):
+        super().visit_Declaration(node)
+        self.clock += 1
+        self.versions[node.depth][node.slot] = self.clock
+
+    def visit_Assign_stmt(self, node):
+        super().visit_Assign_stmt(node)
+        var_node = node.left
+        self.clock += 1
+        self.versions[var_node.depth][var_node.slot] = self.clock
+
+    def visit_UnrolledLoop(self, node):
+        # its copies push their frame past visit_Body and the versions
+        self.visit_DO_stmt(node)
+
+    def run_closed_form(self, node):
+        if not super().run_closed_form(node):
+            return False
+        for _, (depth, slot), _, _ in node.updates:
+            self.clock += 1
+            self.versions[depth][slot] = self.clock
+        return True
+
+    def visit_BinOp(self, node):
+        plans = self.plans
+        if node in plans:
+            reads = plans[node]
+        else:
+            reads = None
+            if count_nodes(node) >= self.threshold:
+                reads = tuple(sorted(expr_reads(node)))
+            plans[node] = reads
+        if reads is None:
+            return super().visit_BinOp(node)
+        versions = self.versions
+        key = tuple([versions[depth][slot] for depth, slot in reads])
+        cache = self.cache
+        entry = cache.get(node)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            cache.move_to_end(node)
+            return entry[1]
+        self.misses += 1
+        value = super().visit_BinOp(node)
+        cache[node] = (key, value)
+        cache.move_to_end(node)
+        if len(cache) > self.capacity:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return value
@@ -0,0 +1,259 @@
+class AST(object):
+    pass
+
+
+class BinOp(AST):
+    def __init__(self, left, op, right):
+        self.left = left
+        self.token = self.op = op
+        self.right = right
+        # set by TypeInferencer when both operands are proven INT
+        self.static_type = None
+        self.int_op = None
+
+
+class Num(AST):
+    def __init__(self, token):
+        self.token = token
+        self.value = token.value
+        self.static_type = None
+
+
+class UnaryOp(AST):
+    def __init__(self, op, expr):
+        self.token = self.op = op
+        self.expr = expr
+        self.static_type = None
+
+
+class Body(AST):
+    """Represents a 'BEGIN ... END' block"""
+
+    def __init__(self):
+        self.children = []
+        # filled in by SymbolTableBuilder: nesting depth of the block's
+        # scope and the names of the variables living in its frame
+        self.depth = 0
+        self.slot_names = []
+        self.frame_size = 0
+
+
+class LazyBody(Body):
+    """Body whose children are produced by `loader(body)` on first access.
+
+    The loader may also fill in the frame layout, so reading slot_names
+    or frame_size loads the body as well.  Visitors without a
+    visit_LazyBody method treat it as a Body.
+    """
+
+    def __init__(self, loader):
+        super().__init__()
+        self._children = None
+        self._loader = loader
+
+    @property
+    def children(self):
+        if self._children is None:
+            loader, self._loader = self._loader, None
+            self._children = loader(self)
+        return self._children
+
+    @children.setter
+    def children(self, value):
+        self._children = value
+        self._loader = None
+
+    @property
+    def slot_names(self):
+        self.children
+        return self._slot_names
+
+    @slot_names.setter
+    def slot_names(self, value):
+        self._slot_names = value
+
+    @property
+    def frame_size(self):
+        self.children
+        return self._frame_size
+
+    @frame_size.setter
+    def frame_size(self, value):
+        self._frame_size = value
+
+    @property
+    def loaded(self):
+        return self._children is not None
+
+    def after_load(self, func):
+        """Call `func(children)` once the body is loaded, now if it is."""
+        if self.loaded:
+            func(self._children)
+            return
+        loader = self._loader
+
+        def load(body):
+            children = loader(body)
+            func(children)
+            return children
+        self._loader = load
+
+    def __getstate__(self):
+        # loaders hold files and parsers; pickle the decoded children
+        state = dict(self.__dict__)
+        state['_children'] = self.children
+        state['_loader'] = None
+        return state
+
+
+class Assign_stmt(AST):
+    def __init__(self, left, op, right):
+        self.left = left
+        self.token = self.op = op
+        self.right = right
+
+class Declaration(AST):
+    def __init__(self, var_node, type_node, op, val):
+        self.var_node = var_node
+        self.type_node = type_node
+        self.token = self.op = op
+        self.val = val
+        # (depth, slot) of the declared variable, see SymbolTableBuilder
+        self.depth = None
+        self.slot = None
+        
+class Cond_stmt(AST):
+    def __init__(self, leftexpr, comp_op, rightexpr):
+        self.leftexpr = leftexpr
+        self.comp_op = comp_op
+        self.rightexpr = rightexpr
+
+
+class Var(AST):
+    """The Var node is constructed out of ID token."""
+
+    def __init__(self, token):
+        self.token = token
+        self.value = token.value
+        # resolved once by SymbolTableBuilder to the frame depth and the
+        # slot inside that frame, so nothing after it looks names up again
+        self.symbol = None
+        self.depth = None
+        self.slot = None
+        self.static_type = None
+
+
+class NoOp(AST):
+    pass
+
+
+class Program(AST):
+    def __init__(self, name, body):
+        self.name = name
+        self.body = body
+        # True once every Var and Declaration has its (depth, slot)
+        self.resolved = False
+
+
+class Type(AST):
+    def __init__(self, token):
+        self.token = token
+        self.value = token.value
+
+
+class Cond_stmt(AST):
+    def __init__(self, left, comp_op, right):
+        self.left = left
+        self.comp_op = comp_op
+        self.right = right
+
+
+class If_stmt(AST):
+    def __init__(self, condition, body, else_block):
+        self.condition = condition
+        self.body = body
+        self.else_block = else_block
+        # ordinal of the `if` among the if/do keywords of the source,
+        # set by the Parser; profiles are keyed by it
+        self.site = None
+
+
+class DO_stmt(AST):
+    def __init__(self, while_condition, do_body):
+        self.condition = while_condition
+        self.do_body = do_body
+        # see If_stmt.site
+        self.site = None
+
+
+class ClosedFormLoop(DO_stmt):
+    """DO_stmt whose final state can be computed without iterating.
+
+    Built by LoopSummarizer.  `updates` lists the body's assignments in
+    order as (kind, (depth, slot), operand, sign):
+
+    * 'step': var = var + sign * operand, operand loop-invariant,
+    * 'set':  var = operand, operand loop-invariant,
+    * 'sum':  var = var + sign * w, operand the (depth, slot) of a 'step'
+      variable w.
+
+    The loop runs while `counter comp_op bound`, counter being a 'step'
+    variable and bound loop-invariant.  Visitors without a
+    visit_ClosedFormLoop method see the original loop.
+    """
+
+    def __init__(self, loop, updates, counter, comp_op, bound):
+        super().__init__(loop.condition, loop.do_body)
+        self.site = loop.site
+        self.updates = updates
+        self.counter = counter
+        self.comp_op = comp_op
+        self.bound = bound
+
+
+class UnrolledLoop(DO_stmt):
+    """DO_stmt whose body is run `factor` iterations at a time.
+
+    Built by LoopUnroller.  `checked` is the body's statements repeated
+    `factor` times with the loop condition between the copies, as exit
+    checks; `unchecked` the same copies without them.  The latter can
+    only be used when `counter` is set: the (depth, slot) of the one
+    variable the body moves by `sign` times the loop-invariant `step`,
+    compared by `comp_op` with the loop-invariant `bound`, so the trip
+    count is known on entry.  Visitors without a visit_UnrolledLoop
+    method see the original loop.
+    """
+
+    def __init__(self, loop, factor, counter=None, step=None, sign=1,
+                 comp_op=None, bound=None):
+        super().__init__(loop.condition, loop.do_body)
+        self.site = loop.site
+        self.factor = factor
+        children = loop.do_body.children
+        self.checked = list(children)
+        for _ in range(factor - 1):
+            self.checked.append(loop.condition)
+            self.checked.extend(children)
+        self.unchecked = list(children) * factor
+        self.counter = counter
+        self.step = step
+        self.sign = sign
+        self.comp_op = comp_op
+        self.bound = bound
+
+
+class NodeVisitor(object):
+    def visit(self, node):
+        method_name = 'visit_' + type(node).__name__
+        visitor = getattr(self, method_name, self.generic_visit)
+        return visitor(node)
+
+    def generic_visit(self, node):
+        # specialized node classes fall back to the visitor of their base
+        for cls in type(node).__mro__[1:]:
+            visitor = getattr(self, 'visit_' + cls.__name__, None)
+            if visitor is not None:
+                return visitor(node)
+        raise Exception('No visit_{} method'.format(type(node).__name__))
+    
+    
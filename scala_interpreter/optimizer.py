@@ -0,0 +1,611 @@
+from .tokens import (DEQUAL, DIV, GEQUAL, GREATHAN, LEQUAL, LESSTHAN, MINUS,
+                     PLUS, REM)
+from .nodes import (AST, Assign_stmt, BinOp, Body, ClosedFormLoop, Cond_stmt,
+                    DO_stmt, Declaration, If_stmt, LazyBody, NoOp,
+                    NodeVisitor, Num, UnaryOp, UnrolledLoop, Var)
+from .inference import binop_value, compare
+
+
+def count_nodes(node):
+    """Number of AST nodes in the subtree rooted at `node`."""
+    if isinstance(node, list):
+        return sum(count_nodes(child) for child in node)
+    if not isinstance(node, AST):
+        return 0
+    total = 1
+    for name, value in vars(node).items():
+        if name != 'symbol' and isinstance(value, (AST, list)):
+            total += count_nodes(value)
+    return total
+
+
+def expr_reads(node, reads=None):
+    """Set of (depth, slot) pairs read by an expression or condition."""
+    if reads is None:
+        reads = set()
+    if isinstance(node, Var):
+        reads.add((node.depth, node.slot))
+    elif isinstance(node, BinOp):
+        expr_reads(node.left, reads)
+        expr_reads(node.right, reads)
+    elif isinstance(node, UnaryOp):
+        expr_reads(node.expr, reads)
+    elif isinstance(node, Cond_stmt):
+        expr_reads(node.left, reads)
+        expr_reads(node.right, reads)
+    return reads
+
+
+def constant_value(node):
+    """Value of an expression built only from literals, else None."""
+    if isinstance(node, Num):
+        return node.value
+    if isinstance(node, UnaryOp):
+        value = constant_value(node.expr)
+        if value is None:
+            return None
+        return -value if node.op.type == MINUS else +value
+    if isinstance(node, BinOp):
+        left = constant_value(node.left)
+        right = constant_value(node.right)
+        if left is None or right is None:
+            return None
+        if node.op.type in (DIV, REM) and right == 0:
+            # leave the ZeroDivisionError to run time
+            return None
+        return binop_value(node, left, right)
+    return None
+
+
+def may_raise(node):
+    """True if evaluating the expression can fail, e.g. divide by zero."""
+    if isinstance(node, BinOp):
+        if node.op.type in (DIV, REM) and not constant_value(node.right):
+            return True
+        return may_raise(node.left) or may_raise(node.right)
+    if isinstance(node, UnaryOp):
+        return may_raise(node.expr)
+    return False
+
+
+def statement_effects(node, reads=None, writes=None):
+    """(reads, writes): the (depth, slot) pairs a statement may touch.
+
+    Both branches of an if/else count, so the sets are an upper bound.
+    """
+    if reads is None:
+        reads, writes = set(), set()
+    if isinstance(node, Assign_stmt):
+        writes.add((node.left.depth, node.left.slot))
+        expr_reads(node.right, reads)
+    elif isinstance(node, Declaration):
+        writes.add((node.depth, node.slot))
+        expr_reads(node.val, reads)
+    elif isinstance(node, If_stmt):
+        expr_reads(node.condition, reads)
+        statement_effects(node.body, reads, writes)
+        statement_effects(node.else_block, reads, writes)
+    elif isinstance(node, DO_stmt):
+        statement_effects(node.do_body, reads, writes)
+        expr_reads(node.condition, reads)
+    elif isinstance(node, Body):
+        for child in node.children:
+            statement_effects(child, reads, writes)
+    return reads, writes
+
+
+def contains_loop(node):
+    """True if a do-while occurs anywhere in the statement."""
+    if isinstance(node, DO_stmt):
+        return True
+    if isinstance(node, If_stmt):
+        return contains_loop(node.body) or contains_loop(node.else_block)
+    if isinstance(node, Body):
+        return any(contains_loop(child) for child in node.children)
+    return False
+
+
+def unloaded(node):
+    """True if the node is a LazyBody that has not been parsed yet."""
+    return isinstance(node, LazyBody) and not node.loaded
+
+
+def contains_unloaded(node):
+    """True if an unparsed LazyBody occurs anywhere in the statement."""
+    if unloaded(node):
+        return True
+    if isinstance(node, If_stmt):
+        return (contains_unloaded(node.body)
+                or contains_unloaded(node.else_block))
+    if isinstance(node, DO_stmt):
+        return contains_unloaded(node.do_body)
+    if isinstance(node, Body):
+        return any(contains_unloaded(child) for child in node.children)
+    return False
+
+
+def dependency_groups(body):
+    """Split `body.children` into groups that share no variables.
+
+    Two statements depend on each other when one may write a variable of
+    `body`'s frame, or an outer one, that the other reads or writes;
+    the groups are the connected components of that relation.  Returns
+    lists of child indices in source order, ordered by first statement.
+    """
+    children = body.children
+    parent = list(range(len(children)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    users = {}
+    written = set()
+    for index, child in enumerate(children):
+        reads, writes = statement_effects(child)
+        written |= writes
+        for key in reads | writes:
+            # locals of nested blocks live in frames of their own
+            if key[0] <= body.depth:
+                users.setdefault(key, []).append(index)
+    for key, indexes in users.items():
+        if key in written:
+            root = find(indexes[0])
+            for index in indexes[1:]:
+                parent[find(index)] = root
+    groups = {}
+    for index in range(len(children)):
+        groups.setdefault(find(index), []).append(index)
+    return sorted(groups.values())
+
+
+class Optimizer(NodeVisitor):
+    """Remove work the Interpreter would do for nothing.
+
+    Runs on a resolved tree and rewrites it in place:
+
+    * NoOp statements inserted by Parser.empty() are dropped,
+    * If_stmt / DO_stmt nodes whose Cond_stmt compares constants are
+      replaced by the branch that is always taken,
+    * stores (Assign_stmt / Declaration) that are overwritten or go out
+      of scope before being read are removed, based on a backward
+      liveness analysis over Body.children keyed by (depth, slot); an
+      expression that may raise reads every variable of the object,
+      whose values are still seen after the error,
+    * affine counting loops become ClosedFormLoop (see LoopSummarizer),
+    * other loops with short bodies become UnrolledLoop, up to
+      `max_unroll` iterations per copy (see LoopUnroller), guided by
+      the loop counts of `profile` if one is given.
+
+    Lazy bodies that have not been parsed are left as they are and
+    taken to read every variable around them.  `removed` counts the AST
+    nodes taken out of the tree, `summarized` and `unrolled` the loops
+    replaced.
+    """
+
+    def __init__(self, max_unroll=4, profile=None):
+        self.max_unroll = max_unroll
+        self.profile = profile
+        self.removed = 0
+        self.summarized = 0
+        self.unrolled = 0
+
+    def optimize(self, tree):
+        self.visit(tree)
+        self.frame_sizes = []
+        body = tree.body
+        # every variable of the object body is observable at the end
+        live = {(body.depth, slot) for slot in range(body.frame_size)}
+        self.live_block(body, live)
+        summarizer = LoopSummarizer()
+        summarizer.visit(tree)
+        self.summarized = summarizer.summarized
+        if self.max_unroll > 1:
+            unroller = LoopUnroller(self.max_unroll, profile=self.profile)
+            unroller.visit(tree)
+            self.unrolled = unroller.unrolled
+        return tree
+
+    def drop(self, node):
+        self.removed += count_nodes(node)
+
+    # pass 1: NoOp removal and branch pruning, returns the replacement
+
+    def visit_Program(self, node):
+        self.visit(node.body)
+        return node
+
+    def visit_Body(self, node):
+        if unloaded(node):
+            return node
+        children = []
+        for child in node.children:
+            child = self.visit(child)
+            if isinstance(child, NoOp):
+                self.drop(child)
+            else:
+                children.append(child)
+        node.children = children
+        return node
+
+    def visit_NoOp(self, node):
+        return node
+
+    def visit_Declaration(self, node):
+        return node
+
+    def visit_Assign_stmt(self, node):
+        return node
+
+    def visit_If_stmt(self, node):
+        node.body = self.visit(node.body)
+        node.else_block = self.visit(node.else_block)
+        decision = self.decide(node.condition)
+        if decision is None:
+            return node
+        taken, skipped = node.body, node.else_block
+        if not decision:
+            taken, skipped = skipped, taken
+        self.removed += 1 + count_nodes(node.condition)
+        self.drop(skipped)
+        return taken
+
+    def visit_DO_stmt(self, node):
+        node.do_body = self.visit(node.do_body)
+        if self.decide(node.condition) is False:
+            # the body of a do-while always runs once
+            self.removed += 1 + count_nodes(node.condition)
+            return node.do_body
+        return node
+
+    def decide(self, condition):
+        left = constant_value(condition.left)
+        right = constant_value(condition.right)
+        if left is None or right is None:
+            return None
+        return compare(condition.comp_op, left, right)
+
+    # pass 2: dead stores
+
+    def live_block(self, body, live_out, remove=True):
+        """Return the keys live on entry to `body` given those live after.
+
+        Variables of the block's own frame die when the block is left.
+        """
+        if unloaded(body):
+            return set(live_out) | {
+                (depth, slot)
+                for depth, size in enumerate(self.frame_sizes)
+                for slot in range(size)}
+        depth = body.depth
+        if depth:
+            live = {key for key in live_out if key[0] < depth}
+        else:
+            live = set(live_out)
+        children = []
+        self.frame_sizes.append(body.frame_size)
+        for child in reversed(body.children):
+            live, keep = self.live_stmt(child, live, remove)
+            if keep:
+                children.append(child)
+            else:
+                self.drop(child)
+        self.frame_sizes.pop()
+        if remove:
+            children.reverse()
+            body.children = children
+        if depth:
+            return {key for key in live if key[0] < depth}
+        return live
+
+    def live_stmt(self, node, live, remove):
+        if isinstance(node, (Assign_stmt, Declaration)):
+            if isinstance(node, Assign_stmt):
+                key, value = (node.left.depth, node.left.slot), node.right
+            else:
+                key, value = (node.depth, node.slot), node.val
+            if remove and key not in live and not may_raise(value):
+                return live, False
+            live = set(live)
+            live.discard(key)
+            return live | self.reads(value), True
+        if isinstance(node, If_stmt):
+            live_in = self.reads(node.condition)
+            live_in |= self.live_branch(node.body, live, remove)
+            live_in |= self.live_branch(node.else_block, live, remove)
+            return live_in, True
+        if isinstance(node, DO_stmt):
+            cond_reads = self.reads(node.condition)
+            end_of_body = live | cond_reads
+            while True:
+                live_in = self.live_block(node.do_body, end_of_body, False)
+                widened = end_of_body | live_in
+                if widened == end_of_body:
+                    break
+                end_of_body = widened
+            if remove:
+                self.live_block(node.do_body, end_of_body)
+            return live_in, True
+        if isinstance(node, Body):
+            return self.live_block(node, live, remove), True
+        return live, True
+
+    def live_branch(self, node, live, remove):
+        if isinstance(node, Body):
+            return self.live_block(node, live, remove)
+        return set(live)
+
+    def reads(self, expr):
+        reads = expr_reads(expr)
+        if may_raise(expr):
+            reads |= {(0, slot) for slot in range(self.frame_sizes[0])}
+        return reads
+
+
+# comparison seen from the other operand: `b < i` is `i > b`
+FLIPPED_COMPARISONS = {
+    LESSTHAN: GREATHAN,
+    LEQUAL: GEQUAL,
+    GREATHAN: LESSTHAN,
+    GEQUAL: LEQUAL,
+    DEQUAL: DEQUAL,
+}
+
+
+class LoopSummarizer(NodeVisitor):
+    """Replace affine counting loops by ClosedFormLoop nodes.
+
+    A DO_stmt qualifies when its body holds only assignments, each to a
+    different variable, of the forms `v = v + e`, `v = v - e`,
+    `v = e + v`, `v = e` with `e` loop-invariant, or `v = v + w`,
+    `v = v - w`, `v = w + v` with `w` a variable of the first kind, and
+    its condition compares a variable of the first kind to a
+    loop-invariant expression.  Invariant means reading no variable
+    assigned in the body and unable to raise.  The trip count and final
+    values depend on run-time values, so the Interpreter works them out
+    when it reaches the loop and runs it normally if it cannot.
+    """
+
+    def __init__(self):
+        self.summarized = 0
+
+    def visit_Program(self, node):
+        self.visit(node.body)
+
+    def visit_Body(self, node):
+        if unloaded(node):
+            return node
+        node.children = [self.visit(child) for child in node.children]
+        return node
+
+    def visit_LazyBody(self, node):
+        return self.visit_Body(node)
+
+    def visit_If_stmt(self, node):
+        self.visit(node.body)
+        self.visit(node.else_block)
+        return node
+
+    def visit_DO_stmt(self, node):
+        self.visit(node.do_body)
+        if unloaded(node.do_body):
+            return node
+        summary = self.summarize(node)
+        if summary is None:
+            return node
+        self.summarized += 1
+        return summary
+
+    def generic_visit(self, node):
+        return node
+
+    def summarize(self, node):
+        statements = [child for child in node.do_body.children
+                      if not isinstance(child, NoOp)]
+        if not all(isinstance(child, Assign_stmt) for child in statements):
+            return None
+        targets = [(child.left.depth, child.left.slot) for child in statements]
+        assigned = set(targets)
+        if len(assigned) != len(targets):
+            return None
+
+        def invariant(expr):
+            return not (expr_reads(expr) & assigned) and not may_raise(expr)
+
+        def is_target(expr, key):
+            return isinstance(expr, Var) and (expr.depth, expr.slot) == key
+
+        updates = []
+        for key, child in zip(targets, statements):
+            value = child.right
+            if invariant(value):
+                updates.append(('set', key, value, 1))
+                continue
+            if not isinstance(value, BinOp) or value.op.type not in (PLUS,
+                                                                    MINUS):
+                return None
+            sign = 1 if value.op.type == PLUS else -1
+            if is_target(value.left, key):
+                operand = value.right
+            elif sign == 1 and is_target(value.right, key):
+                operand = value.left
+            else:
+                return None
+            if invariant(operand):
+                updates.append(('step', key, operand, sign))
+            elif isinstance(operand, Var):
+                updates.append(('sum', key, (operand.depth, operand.slot),
+                                sign))
+            else:
+                return None
+        steps = {key for kind, key, _, _ in updates if kind == 'step'}
+        if any(kind == 'sum' and operand not in steps
+               for kind, _, operand, _ in updates):
+            return None
+
+        condition = node.condition
+        left, right, comp_op = condition.left, condition.right, condition.comp_op
+        if isinstance(right, Var) and (right.depth, right.slot) in steps:
+            left, right = right, left
+            comp_op = FLIPPED_COMPARISONS[comp_op]
+        if not (isinstance(left, Var) and (left.depth, left.slot) in steps
+                and invariant(right)):
+            return None
+        return ClosedFormLoop(node, updates, (left.depth, left.slot), comp_op,
+                              right)
+
+
+class LoopUnroller(LoopSummarizer):
+    """Replace do-while loops with short bodies by UnrolledLoop nodes.
+
+    The unroll factor is the largest one up to `max_factor` keeping the
+    copies of the body within `max_nodes` AST nodes; loops that would
+    not get at least two copies, or nest another loop, are left alone.
+    When the condition compares a counter moved once per iteration by a
+    loop-invariant step with a loop-invariant bound, the counter is
+    recorded so the exit checks can be dropped at run time.
+
+    With a `profile`, a loop is unrolled no further than its average
+    trip count, not at all if it never ran, and one that ran at least
+    `hot_loop` iterations gets twice the node budget.
+    """
+
+    def __init__(self, max_factor=4, max_nodes=48, profile=None,
+                 hot_loop=1000):
+        self.max_factor = max_factor
+        self.max_nodes = max_nodes
+        self.profile = profile
+        self.hot_loop = hot_loop
+        self.unrolled = 0
+
+    def visit_DO_stmt(self, node):
+        self.visit(node.do_body)
+        if isinstance(node, ClosedFormLoop) or contains_unloaded(node):
+            return node
+        factor = self.factor(node)
+        if factor < 2:
+            return node
+        self.unrolled += 1
+        return UnrolledLoop(node, factor, *self.counter(node))
+
+    def factor(self, node):
+        body = node.do_body
+        if not body.children or any(contains_loop(child)
+                                    for child in body.children):
+            return 1
+        size = count_nodes(body) + count_nodes(node.condition)
+        if self.profile is None:
+            return min(self.max_factor, self.max_nodes // size)
+        trips = self.profile.trips(node.site)
+        if trips is None:
+            return 1
+        budget = self.max_nodes
+        if self.profile.iterations(node.site) >= self.hot_loop:
+            budget *= 2
+        return min(self.max_factor, budget // size, int(trips))
+
+    def counter(self, node):
+        """(counter, step, sign, comp_op, bound) or () if there is none."""
+        body = node.do_body
+        writes = set()
+        for child in body.children:
+            statement_effects(child, set(), writes)
+
+        def invariant(expr):
+            return not (expr_reads(expr) & writes) and not may_raise(expr)
+
+        condition = node.condition
+        left, right, comp_op = condition.left, condition.right, condition.comp_op
+        if isinstance(right, Var) and not isinstance(left, Var):
+            left, right = right, left
+            comp_op = FLIPPED_COMPARISONS[comp_op]
+        if not isinstance(left, Var) or not invariant(right):
+            return ()
+        key = (left.depth, left.slot)
+        if key[0] >= body.depth:
+            return ()
+        updates = [child for child in body.children
+                   if key in statement_effects(child, set(), set())[1]]
+        if len(updates) != 1 or not isinstance(updates[0], Assign_stmt):
+            return ()
+        value = updates[0].right
+        if not isinstance(value, BinOp) or value.op.type not in (PLUS, MINUS):
+            return ()
+        sign = 1 if value.op.type == PLUS else -1
+        if isinstance(value.left, Var) and (value.left.depth,
+                                            value.left.slot) == key:
+            step = value.right
+        elif (sign == 1 and isinstance(value.right, Var)
+              and (value.right.depth, value.right.slot) == key):
+            step = value.left
+        else:
+            return ()
+        if not invariant(step):
+            return ()
+        return key, step, sign, comp_op, right
+
+
+class ASTDumper(NodeVisitor):
+    """Render a (resolved) tree as indented text, one node per line."""
+
+    def dump(self, node):
+        self.lines = []
+        self.depth = 0
+        self.visit(node)
+        return '\n'.join(self.lines)
+
+    def emit(self, text, *children):
+        self.lines.append('  ' * self.depth + text)
+        self.depth += 1
+        for child in children:
+            self.visit(child)
+        self.depth -= 1
+
+    def visit_Program(self, node):
+        self.emit('Program {}'.format(node.name), node.body)
+
+    def visit_Body(self, node):
+        self.emit('Body depth={} slots={}'.format(node.depth, node.slot_names),
+                  *node.children)
+
+    def visit_NoOp(self, node):
+        self.emit('NoOp')
+
+    def visit_Declaration(self, node):
+        self.emit('Declaration {}:{} @({}, {})'.format(
+            node.var_node.value, node.type_node.value, node.depth, node.slot),
+            node.val)
+
+    def visit_Assign_stmt(self, node):
+        self.emit('Assign_stmt', node.left, node.right)
+
+    def visit_If_stmt(self, node):
+        self.emit('If_stmt', node.condition, node.body, node.else_block)
+
+    def visit_DO_stmt(self, node):
+        self.emit('DO_stmt', node.do_body, node.condition)
+
+    def visit_ClosedFormLoop(self, node):
+        self.emit('ClosedFormLoop', node.do_body, node.condition)
+
+    def visit_UnrolledLoop(self, node):
+        self.emit('UnrolledLoop x{}{}'.format(
+            node.factor, ' counted' if node.counter else ''),
+            node.do_body, node.condition)
+
+    def visit_Cond_stmt(self, node):
+        self.emit('Cond_stmt {}'.format(node.comp_op), node.left, node.right)
+
+    def visit_BinOp(self, node):
+        self.emit('BinOp {}'.format(node.op.type), node.left, node.right)
+
+    def visit_UnaryOp(self, node):
+        self.emit('UnaryOp {}'.format(node.op.type), node.expr)
+
+    def visit_Num(self, node):
+        self.emit('Num {}'.format(node.value))
+
+    def visit_Var(self, node):
+        self.emit('Var {} @({}, {})'.format(node.value, node.depth, node.slot))
@@ -0,0 +1,85 @@
+import os
+
+from .interpreter import Interpreter
+from .optimizer import contains_loop, dependency_groups, statement_effects
+
+
+def run_statements(statements, frame_size, slots):
+    """Run top-level statements on a fresh object frame in a worker.
+
+    Returns the final values of `slots`, the variables they may write.
+    """
+    interpreter = Interpreter(None)
+    interpreter.frames = [[None] * frame_size]
+    for statement in statements:
+        interpreter.visit(statement)
+    frame = interpreter.frames[0]
+    return [frame[slot] for slot in slots]
+
+
+class ParallelInterpreter(Interpreter):
+    """Interpreter running independent top-level statements concurrently.
+
+    The object body is split with dependency_groups(); no group reads or
+    writes a variable another group writes, so each can start from an
+    empty frame.  Groups with a do-while are sent to a process pool and
+    the rest run here meanwhile; the pool's writes are then copied into
+    the object frame group by group, in source order, so the result is
+    the one sequential execution gives.  With fewer than two loop groups
+    there is nothing worth a process and the body runs sequentially.
+
+    Groups may interleave, so when any group fails, which statement
+    fails first and what the others had done by then is only known from
+    a run in source order: the body is then run again sequentially,
+    raising the same exception on the same memory as the Interpreter.
+    """
+
+    def __init__(self, tree, workers=None, executor=None):
+        super().__init__(tree)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = executor
+
+    def visit_Program(self, node):
+        body = node.body
+        children = body.children
+        groups = dependency_groups(body)
+        heavy = [any(contains_loop(children[index]) for index in group)
+                 for group in groups]
+        if sum(heavy) < 2 or self.workers < 2:
+            return super().visit_Program(node)
+        if self.executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(self.workers) as self.executor:
+                try:
+                    return self.run_groups(body, groups, heavy)
+                finally:
+                    self.executor = None
+        return self.run_groups(body, groups, heavy)
+
+    def run_groups(self, body, groups, heavy):
+        children = body.children
+        self.frames = [self.global_frame(body)]
+        frame = self.frames[0]
+        pending = []
+        for group in (group for group, loop in zip(groups, heavy) if loop):
+            statements = [children[index] for index in group]
+            writes = set()
+            for statement in statements:
+                writes |= statement_effects(statement)[1]
+            slots = sorted(slot for depth, slot in writes if depth == 0)
+            future = self.executor.submit(run_statements, statements,
+                                          body.frame_size, slots)
+            pending.append((slots, future))
+        try:
+            for group, loop in zip(groups, heavy):
+                if not loop:
+                    for index in group:
+                        self.visit(children[index])
+            results = [future.result() for slots, future in pending]
+        except Exception:
+            for slots, future in pending:
+                future.cancel()
+            return super().visit_Program(self.tree)
+        for (slots, future), values in zip(pending, results):
+            for slot, value in zip(slots, values):
+                frame[slot] = value
@@ -0,0 +1,603 @@
+import os
+
+from .tokens import (ASSIGN, COLON, DEQUAL, DIV, DO, ELSE, EOF, GEQUAL,
+                     GREATHAN, ID, IF, INT, INTEGER, LCURL, LEQUAL, LESSTHAN,
+                     LPAREN, MINUS, MUL, OBJECT, PLUS, RCURL, REM, RPAREN,
+                     SEMI, VAR, WHILE)
+from .lexer import TokenColumns, TokenStream
+from .nodes import (Assign_stmt, BinOp, Body, Cond_stmt, DO_stmt, Declaration,
+                    If_stmt, LazyBody, NoOp, Num, Program, Type, UnaryOp, Var)
+from .symbols import ScopedSymbolTable, SymbolTableBuilder
+
+
+COMPARISONS = (LESSTHAN, LEQUAL, GREATHAN, GEQUAL, DEQUAL)
+
+
+class Parser(object):
+    def __init__(self, lexer, fused=False, lazy=False, symtab=None, site=0):
+        self.lexer = lexer
+        # in fused mode names are defined and resolved while the tree is
+        # built, so no SymbolTableBuilder pass is needed afterwards
+        if symtab is None and (fused or lazy):
+            symtab = ScopedSymbolTable(getattr(lexer, 'names', None))
+        self.symtab = symtab
+        # in lazy mode braced if/else and do-while bodies are only
+        # brace-matched; they are parsed and resolved when first entered.
+        # `lazy` may also be a function of (site, branch) choosing the
+        # blocks to defer, branch being False for an else block only
+        self.lazy = lazy
+        # site of the next if/do, see If_stmt.site
+        self.site = site
+        # set current token to the first token taken from the input
+        self.current_token = self.lexer.get_next_token()
+
+    def error(self):
+        token = self.current_token
+        location = getattr(self.lexer, 'location', None)
+        location = location and location(token.pos)
+        if location is None:
+            raise Exception('Invalid syntax')
+        raise Exception('Invalid syntax at line {}, column {}: unexpected {}'
+                        .format(location[0], location[1], token))
+
+    def eat(self, token_type):
+        # compare the current token type with the passed token
+        # type and if they match then "eat" the current token
+        # and assign the next token to the self.current_token,
+        # otherwise raise an exception.
+        if self.current_token.type == token_type:
+            self.current_token = self.lexer.get_next_token()
+        else:
+            self.error()
+
+    def peek(self, k=1):
+        """The k-th token after current_token, without eating anything."""
+        return self.lexer.peek_token(k)
+
+    def program(self):
+
+        """program : OBJECT variable '{' stmt_list '}' """
+
+        self.eat(OBJECT)
+        var_node = self.id(resolve=False)
+        prog_name = var_node.value
+        print(prog_name)
+        print(self.current_token)
+        body_node = self.body()
+        program_node = Program(prog_name, body_node)
+        # fused and lazy parses resolve names as they go
+        program_node.resolved = self.symtab is not None
+
+        return program_node
+
+    def body(self):
+        """body :  { statement_list }"""
+        print("body")
+        print(self.current_token)
+        self.eat(LCURL)
+        nodes = self.stmt_list()
+        self.eat(RCURL)
+        print("RCURL")
+        root = Body()
+        for node in nodes:
+           root.children.append(node)
+        if self.symtab is not None:
+            self.symtab.layout(root)
+        return root
+
+    def stmt_list(self):
+        """stmt_list : stmt [[SEMI] stmt_list]"""
+        print("stmtlist")
+        print(self.current_token)
+        node = self.stmt()
+        results = [node]
+        while self.current_token.type not in (RCURL, EOF, ELSE, WHILE):
+            results.append(self.stmt())
+        return results
+
+    def block(self, site=None, branch=True):
+        """block : '{' stmt_list '}' | stmt_list
+
+        Bodies of if/else and do-while open their own scope, so they are
+        wrapped in a Body node just like the object body.
+        """
+        if (self.lazy and self.current_token.type == LCURL
+                and (self.lazy is True or self.lazy(site, branch))):
+            return self.lazy_block()
+        if self.symtab is not None:
+            self.symtab.enter_scope()
+        if self.current_token.type == LCURL:
+            self.eat(LCURL)
+            nodes = self.stmt_list()
+            self.eat(RCURL)
+        else:
+            nodes = self.stmt_list()
+        root = Body()
+        root.children.extend(nodes)
+        if self.symtab is not None:
+            self.symtab.layout(root)
+            self.symtab.leave_scope()
+        return root
+
+    def lazy_block(self):
+        """Skip a braced block, returning a LazyBody that parses it later.
+
+        Only the names the block mentions are carried over from the
+        current scope, enough to resolve it once it is entered.
+        """
+        site = self.site
+        tokens, end = self.braced_tokens()
+        names = set()
+        for token in tokens:
+            if token.type in (ID, INT):
+                names.add(token.value)
+            elif token.type in (IF, DO):
+                self.site += 1
+        symtab = self.symtab.fork(names)
+        parse_deferred = self.parse_deferred
+        # a closure rather than functools.partial keeps functools (and
+        # collections behind it) out of the startup path
+        return LazyBody(
+            lambda body: parse_deferred(tokens, symtab, body, site, end))
+
+    def braced_tokens(self):
+        """Eat a braced block; returns the tokens between its braces and
+        the offset of the closing one."""
+        self.eat(LCURL)
+        tokens = []
+        depth = 0
+        while depth or self.current_token.type != RCURL:
+            token = self.current_token
+            if token.type == LCURL:
+                depth += 1
+            elif token.type == RCURL:
+                depth -= 1
+            elif token.type == EOF:
+                self.error()
+            tokens.append(token)
+            self.current_token = self.lexer.get_next_token()
+        end = self.current_token.pos
+        self.eat(RCURL)
+        return tokens, end
+
+    def parse_deferred(self, tokens, symtab, body, site, end=None):
+        """Loader of a LazyBody created by lazy_block()."""
+        # a body cut short ends at its closing brace, not the file's end
+        stream = TokenStream(tokens, getattr(self.lexer, 'text', None),
+                             symtab.names, end)
+        parser = Parser(stream, lazy=self.lazy, symtab=symtab, site=site)
+        symtab.enter_scope()
+        nodes = parser.stmt_list()
+        if parser.current_token.type != EOF:
+            parser.error()
+        symtab.layout(body)
+        symtab.leave_scope()
+        return nodes
+
+    def stmt(self):
+        """
+        statement : assign_stmt
+                    | stmt1
+                    | empty
+        """
+        print("stmt")
+        if self.current_token.type == ID:
+            node = self.assign_stmt()
+        elif self.current_token.type == VAR:
+            node = self.decl_stmt()
+        else:
+            node = self.stmt1()
+        if (self.current_token.type == SEMI):
+            self.eat(SEMI)
+
+        return node
+
+    def assign_stmt(self):
+        """
+        assignment_statement : variable ASSIGN expr
+        """
+        print("assign_stmt")
+        left = self.id()
+        token = self.current_token
+        self.eat(ASSIGN)
+        right = self.expr()
+        node = Assign_stmt(left, token, right)
+
+        return node
+    
+    def decl_stmt(self):
+        
+        print("decleration stmt")
+        self.eat(VAR)
+        print("var eaten")
+        var_node = self.current_token
+        print(self.current_token)
+        self.eat(ID)
+        print(self.current_token)
+        self.eat(COLON)
+        print("done")
+        type_node = self.type_spec()
+        print("done")
+        print(self.current_token)
+        self.eat(INT)
+        token = self.current_token
+        print(self.current_token)
+        self.eat(ASSIGN)
+        val = self.expr()
+        
+        decl = Declaration(var_node, type_node,token,val)
+        if self.symtab is not None:
+            self.symtab.declare(decl)
+
+        return decl
+
+    def type_spec(self):
+        """type_spec : INTEGER
+                     | REAL
+        """
+        token = self.current_token
+        if self.current_token.type == INTEGER:
+            self.eat(INTEGER)
+        node = Type(token)
+        return node
+    
+    
+    def id(self, resolve=True):
+        """
+        variable : ID | const
+        """
+        print(self.current_token.value)
+        print("id")
+        node = Var(self.current_token)
+        self.eat(ID)
+        if resolve and self.symtab is not None:
+            self.symtab.resolve(node)
+        return node
+
+    def empty(self):
+        return NoOp()
+
+    def expr(self):
+        """
+        expr : term ((PLUS | MINUS) term)*
+        """
+        print("expr")
+        node = self.term()
+
+        while self.current_token.type in (PLUS, MINUS):
+            token = self.current_token
+            if token.type == PLUS:
+                self.eat(PLUS)
+            elif token.type == MINUS:
+                self.eat(MINUS)
+
+            node = BinOp(left=node, op=token, right=self.term())
+
+        return node
+
+    def term(self):
+        """term : factor ((MUL | INTEGER_DIV | FLOAT_DIV) factor)*"""
+        print("term")
+        node = self.factor()
+        while self.current_token.type in (MUL, DIV, REM):
+            token = self.current_token
+            if token.type == MUL:
+                self.eat(MUL)
+            elif token.type == DIV:
+                self.eat(DIV)
+            elif token.type == REM:
+                self.eat(REM)
+
+            node = BinOp(left=node, op=token, right=self.factor())
+
+        return node
+
+    def factor(self):
+        """factor : PLUS factor
+                  | MINUS factor
+                  | LPAREN expr RPAREN
+                  | variable
+        """
+        print("factor")
+        token = self.current_token
+        if token.type == PLUS:
+            self.eat(PLUS)
+            node = UnaryOp(token, self.factor())
+            return node
+        elif token.type == MINUS:
+            self.eat(MINUS)
+            node = UnaryOp(token, self.factor())
+            return node
+        elif token.type == LPAREN:
+            self.eat(LPAREN)
+            node = self.expr()
+            self.eat(RPAREN)
+            return node
+        elif token.type == INTEGER:
+            self.eat(INTEGER)
+            print(token)
+            return Num(token)
+        else:
+            node = self.id()
+            return node
+
+    def stmt1(self):
+        """stmt1: 'if' '(' con_stmt ')' stmt_list [[semi] 'else' expr]  (cond_stmt)
+                | 'do' Expr [semi] `while' `(' Expr ')'  (do_stmt)"""
+        print("stmt1")
+        if self.current_token.type == IF:
+            node = self.if_stmt()
+        elif self.current_token.type == DO:
+            node = self.do_stmt()
+        else:
+            node = self.empty()
+        return node
+
+    def if_stmt(self):
+        print("ifstmt")
+        self.eat(IF)
+        site = self.site
+        self.site += 1
+        print(self.current_token)
+        self.eat(LPAREN)
+        print(self.current_token)
+        condition = self.cond_stmt()
+        print(self.current_token)
+        self.eat(RPAREN)
+        body = self.block(site)
+        print(self.current_token)
+        if self.current_token.type == SEMI and self.peek().type == ELSE:
+            self.eat(SEMI)
+        if self.current_token.type == ELSE:
+            self.eat(ELSE)
+            print(self.current_token)
+            else_block = self.block(site, False)
+        else:
+            else_block = self.empty()
+
+        node = If_stmt(condition, body, else_block)
+        node.site = site
+
+        return node
+
+    def do_stmt(self):
+        print("dostmt")
+        self.eat(DO)
+        site = self.site
+        self.site += 1
+        print(self.current_token)
+        do_body = self.block(site)
+        print(self.current_token)
+        self.eat(WHILE)
+        print(self.current_token)
+        self.eat(LPAREN)
+        print(self.current_token)
+        cond = self.cond_stmt()
+        print(self.current_token)
+        self.eat(RPAREN)
+        node = DO_stmt(cond, do_body)
+        node.site = site
+
+        return node
+
+    def cond_stmt(self):
+        print("cond_stmt")
+        leftexpr = self.expr()
+        comp_op = self.current_token.type
+        if comp_op not in COMPARISONS:
+            self.error()
+        self.eat(comp_op)
+        rightexpr = self.expr()
+        node = Cond_stmt(leftexpr, comp_op, rightexpr)
+        return node
+
+    def parse(self):
+        print("parse")
+        node = self.program()
+        if self.current_token.type != EOF:
+            self.error()
+        return node
+
+    def parse_parallel(self, workers=None, executor=None):
+        """parse(), with the object body's statements parsed in processes.
+
+        The body is cut at top-level statement boundaries (see
+        split_statements), one run of statements per worker, and the
+        parsed statements are joined in order.  Workers parse without a
+        symbol table; in fused mode the whole tree is resolved afterwards
+        so that declarations are defined in source order.  Blocks are
+        always parsed eagerly.
+        """
+        print("parse")
+        self.eat(OBJECT)
+        prog_name = self.id(resolve=False).value
+        print(prog_name)
+        tokens, body_end = self.braced_tokens()
+        if self.current_token.type != EOF:
+            self.error()
+        types = [token.type for token in tokens]
+        values = [token.value for token in tokens]
+        positions = [token.pos for token in tokens]
+        text = getattr(self.lexer, 'text', None)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        starts = group_statements(split_statements(types), len(types), workers)
+        ends = starts[1:] + [len(types)]
+        # a run cut short ends where the next one starts
+        chunks = [(types[start:end], values[start:end], positions[start:end],
+                   positions[end] if end < len(types) else body_end)
+                  for start, end in zip(starts, ends)]
+        if len(starts) < 2:
+            results = [parse_statements(types, values, positions, text,
+                                        body_end)]
+        elif executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(workers) as executor:
+                results = parse_chunks(executor, chunks, text)
+        else:
+            results = parse_chunks(executor, chunks, text)
+        root = Body()
+        for nodes, trace in results:
+            if isinstance(nodes, bytes):
+                from .serialize import deserialize_ast
+                nodes = deserialize_ast(nodes, lazy=False).body.children
+            print(trace, end='')
+            root.children.extend(nodes)
+        number_sites(root.children)
+        program_node = Program(prog_name, root)
+        if self.symtab is not None:
+            symtab_builder = SymbolTableBuilder(getattr(self.lexer, 'names',
+                                                        None))
+            symtab_builder.visit(program_node)
+            self.symtab = symtab_builder.symtab
+        print("RCURL")
+        return program_node
+
+
+def statement_end(types, start):
+    """Index just past the top-level statement at `start`, if certain.
+
+    Returns None when the end cannot be told from the token types alone,
+    e.g. an if/else or do-while with an unbraced body, which runs on
+    until an `else`, `while` or `}`.
+    """
+    n = len(types)
+    kind = types[start]
+    if kind == SEMI:
+        return start + 1
+    if kind in (ID, VAR):
+        depth = 0
+        for i in range(start + 1, n):
+            kind = types[i]
+            if kind == LPAREN:
+                depth += 1
+            elif kind == RPAREN:
+                depth -= 1
+            elif kind == SEMI and not depth:
+                return i + 1
+            elif kind in (IF, DO, VAR, ELSE, WHILE, LCURL, RCURL):
+                return None
+        return None
+    if kind == IF:
+        end = match(types, start + 1, LPAREN, RPAREN)
+        end = match(types, end, LCURL, RCURL)
+        if (end is not None and end + 1 < n and types[end] == SEMI
+                and types[end + 1] == ELSE):
+            # `if (...) {...}; else {...}`, see Parser.if_stmt
+            end += 1
+        if end is not None and end < n and types[end] == ELSE:
+            end = match(types, end + 1, LCURL, RCURL)
+    elif kind == DO:
+        end = match(types, start + 1, LCURL, RCURL)
+        if end is None or end >= n or types[end] != WHILE:
+            return None
+        end = match(types, end + 1, LPAREN, RPAREN)
+    else:
+        return None
+    if end is not None and end < n and types[end] == SEMI:
+        end += 1
+    return end
+
+
+def match(types, start, open_type, close_type):
+    """Index just past the group opened at `start`, or None."""
+    if start is None or start >= len(types) or types[start] != open_type:
+        return None
+    depth = 0
+    for i in range(start, len(types)):
+        if types[i] == open_type:
+            depth += 1
+        elif types[i] == close_type:
+            depth -= 1
+            if not depth:
+                return i + 1
+    return None
+
+
+def split_statements(types):
+    """Start index of every top-level statement that can be cut off.
+
+    Once a statement's end is uncertain, the rest of the body is left in
+    one piece.
+    """
+    starts = []
+    start = 0
+    while start is not None and start < len(types):
+        starts.append(start)
+        start = statement_end(types, start)
+    return starts
+
+
+def group_statements(starts, size, parts):
+    """Pick at most `parts` of `starts` that cut `size` tokens evenly."""
+    groups = starts[:1]
+    for start in starts[1:]:
+        if start >= size * len(groups) // parts:
+            groups.append(start)
+    return groups
+
+
+def number_sites(nodes, site=0):
+    """Number the if/do statements among `nodes` in source order, as the
+    Parser does, and return the next site.  Loads lazy bodies."""
+    for node in nodes:
+        if isinstance(node, If_stmt):
+            node.site = site
+            site = number_sites([node.body, node.else_block], site + 1)
+        elif isinstance(node, DO_stmt):
+            node.site = site
+            site = number_sites([node.do_body], site + 1)
+        elif isinstance(node, Body):
+            site = number_sites(node.children, site)
+    return site
+
+
+def parse_statements(types, values, positions=None, text=None, end=None):
+    """Parse a run of whole statements; returns (nodes, parser trace).
+
+    `end` is the offset just past the run, where EOF is reported.
+    """
+    import contextlib
+    import io
+    trace = io.StringIO()
+    with contextlib.redirect_stdout(trace):
+        parser = Parser(TokenColumns(types, values, positions, text,
+                                     end=end))
+        nodes = parser.stmt_list()
+        if parser.current_token.type != EOF:
+            parser.error()
+    return nodes, trace.getvalue()
+
+
+def parse_serialized(types, values, positions=None):
+    """parse_statements() for a worker process.
+
+    The nodes come back in the binary AST format, which is several times
+    cheaper to send and rebuild than pickled nodes, with the tokens'
+    `positions`.
+    """
+    from .serialize import serialize_ast
+    nodes, trace = parse_statements(types, values, positions)
+    body = Body()
+    body.children.extend(nodes)
+    return serialize_ast(Program('', body), positions=True), trace
+
+
+def parse_chunks(executor, chunks, text):
+    """Parse (types, values, positions, end) runs with parse_serialized()
+    in `executor`, in order.
+
+    Workers are not sent the source, so a run that fails to parse is
+    parsed again here to raise an error naming its line and column.
+    """
+    futures = [executor.submit(parse_serialized, types, values, positions)
+               for types, values, positions, end in chunks]
+    results = []
+    for future, (types, values, positions, end) in zip(futures, chunks):
+        try:
+            results.append(future.result())
+        except Exception:
+            parse_statements(types, values, positions, text, end)
+            raise
+    return results
+    
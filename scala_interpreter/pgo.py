@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+
+from .interpreter import Interpreter
+
+
+PROFILE_VERSION = 1
+
+
+def source_digest(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def profile_path(source_path):
+    return os.path.splitext(source_path)[0] + '.profile.json'
+
+
+class Profile(object):
+    """Branch and loop counts of a program run, keyed by If_stmt.site and
+    DO_stmt.site.
+
+    `branches[site]` is [runs of the body, runs of the else block] of an
+    if, `loops[site]` [times entered, iterations] of a do-while, and
+    `digest` the source_digest() of the program they were taken from.
+    """
+
+    def __init__(self, digest, branches=None, loops=None):
+        self.digest = digest
+        self.branches = branches if branches is not None else {}
+        self.loops = loops if loops is not None else {}
+
+    def trips(self, site):
+        """Average iterations per entry of a loop, None if never entered."""
+        counts = self.loops.get(site)
+        if not counts or not counts[0]:
+            return None
+        return counts[1] / counts[0]
+
+    def iterations(self, site):
+        counts = self.loops.get(site)
+        return counts[1] if counts else 0
+
+    def cold(self, site, branch):
+        """True if the block of the if/do at `site` never ran; `branch`
+        is False for an else block.  Usable as Parser(lazy=...)."""
+        if site in self.loops:
+            return False
+        counts = self.branches.get(site)
+        return counts is None or not counts[0 if branch else 1]
+
+
+def write_profile(path, profile):
+    data = {
+        'version': PROFILE_VERSION,
+        'digest': profile.digest,
+        'branches': {str(site): counts
+                     for site, counts in profile.branches.items()},
+        'loops': {str(site): counts for site, counts in profile.loops.items()},
+    }
+    # like artifacts, never let a reader see half a file
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_profile(path, text):
+    """Return the Profile stored in `path`, or None if it is missing or
+    was taken from a different program than `text`."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (not isinstance(data, dict) or data.get('version') != PROFILE_VERSION
+            or data.get('digest') != source_digest(text)):
+        return None
+    try:
+        branches = {int(site): list(counts)
+                    for site, counts in data['branches'].items()}
+        loops = {int(site): list(counts)
+                 for site, counts in data['loops'].items()}
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+    return Profile(data['digest'], branches, loops)
+
+
+class ProfilingInterpreter(Interpreter):
+    """Interpreter counting, per site, the branches taken by every
+    If_stmt and the iterations of every DO_stmt.
+
+    Sites are the ones the Parser set, so an optimized tree is profiled
+    in terms of its source; number_sites() numbers a tree built any
+    other way.  Optimized loops are counted like the DO_stmt they
+    replace.
+    """
+
+    def __init__(self, tree, governor=None):
+        super().__init__(tree, governor)
+        self.branches = {}
+        self.loops = {}
+
+    def profile(self, text):
+        """The counts so far as a Profile of the program `text`."""
+        return Profile(source_digest(text), self.branches, self.loops)
+
+    def visit_If_stmt(self, node):
+        counts = self.branches.get(node.site)
+        if counts is None:
+            counts = self.branches[node.site] = [0, 0]
+        if self.visit(node.condition):
+            counts[0] += 1
+            self.visit(node.body)
+        else:
+            counts[1] += 1
+            self.visit(node.else_block)
+
+    def visit_DO_stmt(self, node):
+        counts = self.loops.get(node.site)
+        if counts is None:
+            counts = self.loops[node.site] = [0, 0]
+        counts[0] += 1
+        governor = self.governor
+        iterations = 1
+        self.visit(node.do_body)
+        while self.visit(node.condition):
+            if governor is not None:
+                governor.tick(len(node.do_body.children) + 1)
+            self.visit(node.do_body)
+            iterations += 1
+        counts[1] += iterations
+
+    visit_ClosedFormLoop = visit_UnrolledLoop = visit_DO_stmt
@@ -0,0 +1,298 @@
+from .tokens import (DEQUAL, DIV, GEQUAL, GREATHAN, LEQUAL, LESSTHAN, MINUS,
+                     MUL, PLUS, REM)
+from .nodes import BinOp, Cond_stmt, Num
+from .inference import binop_value
+from .interpreter import Interpreter
+
+
+# Specialized node classes.  A QuickeningInterpreter rewrites the
+# __class__ of a node it has executed to one of these; they add no state
+# beyond `const`, so any other visitor still treats them as their base
+# class through NodeVisitor.generic_visit.
+
+class GenericBinOp(BinOp):
+    """BinOp that saw non-INT operands; evaluated the Interpreter's way."""
+
+
+class AddIntInt(BinOp):
+    pass
+
+
+class SubIntInt(BinOp):
+    pass
+
+
+class MulIntInt(BinOp):
+    pass
+
+
+class DivIntInt(BinOp):
+    pass
+
+
+class RemIntInt(BinOp):
+    pass
+
+
+class AddIntConst(BinOp):
+    """BinOp whose right operand is an INT literal, kept in `const`."""
+
+
+class SubIntConst(BinOp):
+    pass
+
+
+class MulIntConst(BinOp):
+    pass
+
+
+class DivIntConst(BinOp):
+    pass
+
+
+class RemIntConst(BinOp):
+    pass
+
+
+class CompareLess(Cond_stmt):
+    pass
+
+
+class CompareLessEqual(Cond_stmt):
+    pass
+
+
+class CompareGreater(Cond_stmt):
+    pass
+
+
+class CompareGreaterEqual(Cond_stmt):
+    pass
+
+
+class CompareEqual(Cond_stmt):
+    pass
+
+
+class CompareLessConst(Cond_stmt):
+    """Cond_stmt whose right operand is a literal, kept in `const`."""
+
+
+class CompareLessEqualConst(Cond_stmt):
+    pass
+
+
+class CompareGreaterConst(Cond_stmt):
+    pass
+
+
+class CompareGreaterEqualConst(Cond_stmt):
+    pass
+
+
+class CompareEqualConst(Cond_stmt):
+    pass
+
+
+INT_SPECIALIZATIONS = {
+    PLUS: (AddIntInt, AddIntConst),
+    MINUS: (SubIntInt, SubIntConst),
+    MUL: (MulIntInt, MulIntConst),
+    DIV: (DivIntInt, DivIntConst),
+    REM: (RemIntInt, RemIntConst),
+}
+
+COMPARE_SPECIALIZATIONS = {
+    LESSTHAN: (CompareLess, CompareLessConst),
+    LEQUAL: (CompareLessEqual, CompareLessEqualConst),
+    GREATHAN: (CompareGreater, CompareGreaterConst),
+    GEQUAL: (CompareGreaterEqual, CompareGreaterEqualConst),
+    DEQUAL: (CompareEqual, CompareEqualConst),
+}
+
+
+class QuickeningInterpreter(Interpreter):
+    """Interpreter whose nodes specialize themselves on first execution.
+
+    visit() looks the visitor up in a per-class dispatch cache instead of
+    building its name on every call.  A BinOp that first sees two INT
+    operands becomes e.g. AddIntInt, or AddIntConst when its right
+    operand is a literal; these compute `l + r` inline behind a guard on
+    the operand types, and turn into GenericBinOp for good when the guard
+    fails.  A Cond_stmt becomes e.g. CompareLess or CompareLessConst.
+    Var loads are already resolved to a (depth, slot) pair, so they only
+    gain from the dispatch cache.
+
+    The tree is put back as it was when interpret() returns, classes and
+    `const` attributes alike.  `rewrites`
+    and `despecializations` count class changes.
+    """
+
+    def __init__(self, tree, governor=None):
+        super().__init__(tree, governor)
+        self.dispatch = {}
+        # node -> class it had before it was first rewritten
+        self.originals = {}
+        self.rewrites = self.despecializations = 0
+
+    def visit(self, node):
+        method = self.dispatch.get(node.__class__)
+        if method is None:
+            method = self.lookup(node.__class__)
+        return method(node)
+
+    def lookup(self, cls):
+        for klass in cls.__mro__:
+            method = getattr(self, 'visit_' + klass.__name__, None)
+            if method is not None:
+                self.dispatch[cls] = method
+                return method
+        raise Exception('No visit_{} method'.format(cls.__name__))
+
+    def interpret(self):
+        try:
+            return super().interpret()
+        finally:
+            for node, cls in self.originals.items():
+                node.__class__ = cls
+                node.__dict__.pop('const', None)
+            self.originals.clear()
+
+    def rewrite(self, node, cls):
+        self.originals.setdefault(node, node.__class__)
+        node.__class__ = cls
+        self.rewrites += 1
+
+    # first execution: evaluate generically, then pick a specialization
+
+    def visit_BinOp(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        value = binop_value(node, left, right)
+        op = node.op.type
+        if (type(left) is not int or type(right) is not int
+                or op == REM and node.int_op is None):
+            # untyped REM works on floats, so ints do not make it cheaper
+            self.rewrite(node, GenericBinOp)
+        elif type(node.right) is Num:
+            node.const = right
+            self.rewrite(node, INT_SPECIALIZATIONS[op][1])
+        else:
+            self.rewrite(node, INT_SPECIALIZATIONS[op][0])
+        return value
+
+    def visit_GenericBinOp(self, node):
+        return binop_value(node, self.visit(node.left), self.visit(node.right))
+
+    def despecialize(self, node, left, right):
+        self.rewrite(node, GenericBinOp)
+        self.despecializations += 1
+        return binop_value(node, left, right)
+
+    def visit_Cond_stmt(self, node):
+        generic, const = COMPARE_SPECIALIZATIONS[node.comp_op]
+        if type(node.right) is Num:
+            node.const = node.right.value
+            self.rewrite(node, const)
+        else:
+            self.rewrite(node, generic)
+        return self.visit(node)
+
+    # specialized BinOps: guard on the operand types, else despecialize
+
+    def visit_AddIntInt(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if type(left) is int and type(right) is int:
+            return left + right
+        return self.despecialize(node, left, right)
+
+    def visit_SubIntInt(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if type(left) is int and type(right) is int:
+            return left - right
+        return self.despecialize(node, left, right)
+
+    def visit_MulIntInt(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if type(left) is int and type(right) is int:
+            return left * right
+        return self.despecialize(node, left, right)
+
+    def visit_DivIntInt(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if type(left) is int and type(right) is int:
+            return left // right
+        return self.despecialize(node, left, right)
+
+    def visit_RemIntInt(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if type(left) is int and type(right) is int:
+            return left % right
+        return self.despecialize(node, left, right)
+
+    def visit_AddIntConst(self, node):
+        left = self.visit(node.left)
+        if type(left) is int:
+            return left + node.const
+        return self.despecialize(node, left, node.const)
+
+    def visit_SubIntConst(self, node):
+        left = self.visit(node.left)
+        if type(left) is int:
+            return left - node.const
+        return self.despecialize(node, left, node.const)
+
+    def visit_MulIntConst(self, node):
+        left = self.visit(node.left)
+        if type(left) is int:
+            return left * node.const
+        return self.despecialize(node, left, node.const)
+
+    def visit_DivIntConst(self, node):
+        left = self.visit(node.left)
+        if type(left) is int:
+            return left // node.const
+        return self.despecialize(node, left, node.const)
+
+    def visit_RemIntConst(self, node):
+        left = self.visit(node.left)
+        if type(left) is int:
+            return left % node.const
+        return self.despecialize(node, left, node.const)
+
+    # specialized comparisons: Python compares any operands alike
+
+    def visit_CompareLess(self, node):
+        return self.visit(node.left) < self.visit(node.right)
+
+    def visit_CompareLessEqual(self, node):
+        return self.visit(node.left) <= self.visit(node.right)
+
+    def visit_CompareGreater(self, node):
+        return self.visit(node.left) > self.visit(node.right)
+
+    def visit_CompareGreaterEqual(self, node):
+        return self.visit(node.left) >= self.visit(node.right)
+
+    def visit_CompareEqual(self, node):
+        return self.visit(node.left) == self.visit(node.right)
+
+    def visit_CompareLessConst(self, node):
+        return self.visit(node.left) < node.const
+
+    def visit_CompareLessEqualConst(self, node):
+        return self.visit(node.left) <= node.const
+
+    def visit_CompareGreaterConst(self, node):
+        return self.visit(node.left) > node.const
+
+    def visit_CompareGreaterEqualConst(self, node):
+        return self.visit(node.left) >= node.const
+
+    def visit_CompareEqualConst(self, node):
+        return self.visit(node.left) == node.const
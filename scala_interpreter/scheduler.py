@@ -0,0 +1,111 @@
+import collections
+import itertools
+
+from .nodes import Body, DO_stmt, If_stmt, NoOp
+from .interpreter import ExecutionLimitExceeded, Interpreter
+
+
+class CoroutineInterpreter(Interpreter):
+    """Interpreter that runs the program as a generator.
+
+    Body, If_stmt and DO_stmt are executed by generator methods that
+    yield once after every simple statement and every loop condition,
+    so a Scheduler can interleave many programs on one thread.
+    Expressions are still evaluated by the ordinary visit methods.
+    """
+
+    def execute(self):
+        body = self.tree.body
+        self.frames = [self.global_frame(body)]
+        for child in body.children:
+            yield from self.execute_stmt(child)
+
+    def execute_stmt(self, node):
+        if isinstance(node, Body):
+            yield from self.execute_Body(node)
+        elif isinstance(node, If_stmt):
+            if self.visit(node.condition):
+                yield from self.execute_stmt(node.body)
+            else:
+                yield from self.execute_stmt(node.else_block)
+        elif isinstance(node, DO_stmt):
+            yield from self.execute_DO_stmt(node)
+        elif not isinstance(node, NoOp):
+            self.visit(node)
+            yield
+
+    def execute_Body(self, node):
+        self.frames.append([None] * node.frame_size)
+        for child in node.children:
+            yield from self.execute_stmt(child)
+        self.frames.pop()
+
+    def execute_DO_stmt(self, node):
+        governor = self.governor
+        while True:
+            yield from self.execute_Body(node.do_body)
+            yield
+            if not self.visit(node.condition):
+                return
+            if governor is not None:
+                governor.tick(len(node.do_body.children) + 1)
+
+    def interpret(self):
+        if self.tree is None:
+            return ''
+        if self.governor is not None:
+            self.governor.start()
+        try:
+            for _ in self.execute():
+                pass
+        except ExecutionLimitExceeded as e:
+            e.memory = self.GLOBAL_MEMORY
+            raise
+
+
+class Scheduler(object):
+    """Round-robin scheduler for CoroutineInterpreter instances.
+
+    Each program gets `quantum` statements per turn before the next one
+    runs.  Finished programs leave the run queue; their GLOBAL_MEMORY
+    (or the exception that stopped them) is kept in `results`.
+    """
+
+    def __init__(self, quantum=100):
+        self.quantum = quantum
+        self.ready = collections.deque()
+        self.results = {}
+        self._next_id = 0
+
+    def spawn(self, interpreter):
+        """Queue a program and return the id its result is stored under."""
+        task_id = self._next_id
+        self._next_id += 1
+        if interpreter.governor is not None:
+            interpreter.governor.start()
+        self.ready.append((task_id, interpreter, interpreter.execute()))
+        return task_id
+
+    def run(self):
+        ready = self.ready
+        results = self.results
+        quantum = self.quantum
+        while ready:
+            task = ready.popleft()
+            task_id, interpreter, steps = task
+            try:
+                for _ in itertools.islice(steps, quantum - 1):
+                    pass
+                # islice cannot tell a finished generator from a full
+                # quantum, so the last step decides
+                next(steps)
+            except StopIteration:
+                results[task_id] = interpreter.GLOBAL_MEMORY
+                continue
+            except Exception as e:
+                if isinstance(e, ExecutionLimitExceeded):
+                    e.memory = interpreter.GLOBAL_MEMORY
+                results[task_id] = e
+                continue
+            ready.append(task)
+        return results
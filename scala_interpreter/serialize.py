@@ -0,0 +1,438 @@
+import functools
+import mmap
+import os
+
+from .tokens import (ASSIGN, DEQUAL, DIV, GEQUAL, GREATHAN, ID, INTEGER,
+                     LEQUAL, LESSTHAN, MINUS, MUL, PLUS, REM, Token)
+from .nodes import (Assign_stmt, BinOp, Body, Cond_stmt, DO_stmt, Declaration,
+                    If_stmt, LazyBody, NoOp, NodeVisitor, Num, Program, Type,
+                    UnaryOp, Var)
+from .symbols import BuiltinTypeSymbol, VarSymbol
+
+
+AST_MAGIC = b'SAST'
+AST_VERSION = 2
+AST_SUFFIX = '.sast'
+
+# header flags of the binary AST format
+FLAG_RESOLVED = 1
+FLAG_POSITIONS = 2
+
+# node kind tags of the binary AST format
+TAG_PROGRAM = 1
+TAG_BODY = 2
+TAG_NOOP = 3
+TAG_DECLARATION = 4
+TAG_ASSIGN = 5
+TAG_IF = 6
+TAG_DO = 7
+TAG_COND = 8
+TAG_BINOP = 9
+TAG_UNARYOP = 10
+TAG_NUM = 11
+TAG_VAR = 12
+
+# operator token types and the text the lexer gives them, by operand code
+AST_OPERATORS = [(PLUS, '+'), (MINUS, '-'), (MUL, '*'), (DIV, '/'), (REM, '%')]
+AST_COMPARISONS = [LESSTHAN, LEQUAL, GREATHAN, GEQUAL, DEQUAL]
+
+
+class ASTFormatError(Exception):
+    """Data that is not, or no longer, a whole serialized AST."""
+
+
+def ast_path(source_path):
+    return os.path.splitext(source_path)[0] + AST_SUFFIX
+
+
+def write_varint(out, value):
+    """Append an unsigned LEB128 integer to a bytearray."""
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+class ASTWriter(NodeVisitor):
+    """Serialize the tree built by Parser.parse() to the binary AST format.
+
+    Layout: magic, version, flags, a string table of identifiers, then
+    the nodes in prefix order, each a tag byte followed by varint
+    operands.  Each Body is prefixed with its encoded size so a reader
+    can skip it.
+
+    By default only syntax is written and a loaded tree needs a
+    SymbolTableBuilder pass, which decodes every lazy body.  With
+    `resolved` the tree must have been resolved: every Body also stores
+    its frame layout and every variable its (depth, slot) and type, so
+    a loaded tree runs as it is and bodies are decoded when entered.
+    With `positions` every token also keeps its offset into the source.
+    """
+
+    def __init__(self, resolved=False, positions=False):
+        self.resolved = resolved
+        self.positions = positions
+
+    def write(self, tree):
+        self.strings = {}
+        self.out = bytearray()
+        self.visit(tree)
+        header = bytearray(AST_MAGIC)
+        header.append(AST_VERSION)
+        header.append((FLAG_RESOLVED if self.resolved else 0)
+                      | (FLAG_POSITIONS if self.positions else 0))
+        write_varint(header, len(self.strings))
+        for string in self.strings:
+            encoded = string.encode('utf-8')
+            write_varint(header, len(encoded))
+            header += encoded
+        return bytes(header + self.out)
+
+    def string(self, value):
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        write_varint(self.out, index)
+
+    def position(self, token):
+        if self.positions:
+            # 0 for a token without one
+            write_varint(self.out, 0 if token.pos is None else token.pos + 1)
+
+    def variable(self, node):
+        """Where the Var `node` lives and the name of its type."""
+        if not self.resolved:
+            return
+        if node.symbol is None:
+            raise ValueError('{!r} is not resolved'.format(node.value))
+        write_varint(self.out, node.depth)
+        write_varint(self.out, node.slot)
+        self.string(node.symbol.type.name)
+
+    def visit_Program(self, node):
+        self.out.append(TAG_PROGRAM)
+        self.string(node.name)
+        self.visit(node.body)
+
+    def visit_Body(self, node):
+        outer = self.out
+        self.out = bytearray()
+        if self.resolved:
+            write_varint(self.out, len(node.slot_names))
+            for name in node.slot_names:
+                self.string(name)
+        write_varint(self.out, len(node.children))
+        for child in node.children:
+            self.visit(child)
+        encoded, self.out = self.out, outer
+        self.out.append(TAG_BODY)
+        if self.resolved:
+            # outside the size, so it is known before the body is decoded
+            write_varint(self.out, node.depth)
+        write_varint(self.out, len(encoded))
+        self.out += encoded
+
+    def visit_NoOp(self, node):
+        self.out.append(TAG_NOOP)
+
+    def visit_Declaration(self, node):
+        self.out.append(TAG_DECLARATION)
+        self.string(node.var_node.value)
+        self.string(node.type_node.value)
+        self.position(node.var_node)
+        self.position(node.type_node.token)
+        self.position(node.op)
+        if self.resolved:
+            if node.slot is None:
+                raise ValueError('{!r} is not resolved'.format(
+                    node.var_node.value))
+            write_varint(self.out, node.depth)
+            write_varint(self.out, node.slot)
+        self.visit(node.val)
+
+    def visit_Assign_stmt(self, node):
+        self.out.append(TAG_ASSIGN)
+        self.string(node.left.value)
+        self.variable(node.left)
+        self.position(node.left.token)
+        self.position(node.op)
+        self.visit(node.right)
+
+    def visit_If_stmt(self, node):
+        self.out.append(TAG_IF)
+        self.visit(node.condition)
+        self.visit(node.body)
+        self.visit(node.else_block)
+
+    def visit_DO_stmt(self, node):
+        self.out.append(TAG_DO)
+        self.visit(node.do_body)
+        self.visit(node.condition)
+
+    def visit_Cond_stmt(self, node):
+        self.out.append(TAG_COND)
+        self.out.append(AST_COMPARISONS.index(node.comp_op))
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit_BinOp(self, node):
+        self.out.append(TAG_BINOP)
+        self.out.append(AST_OPERATORS.index((node.op.type, node.op.value)))
+        self.position(node.op)
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit_UnaryOp(self, node):
+        self.out.append(TAG_UNARYOP)
+        self.out.append(AST_OPERATORS.index((node.op.type, node.op.value)))
+        self.position(node.op)
+        self.visit(node.expr)
+
+    def visit_Num(self, node):
+        self.out.append(TAG_NUM)
+        # zigzag, so small negative constants stay short too
+        value = node.value
+        write_varint(self.out, value * 2 if value >= 0 else -value * 2 - 1)
+        self.position(node.token)
+
+    def visit_Var(self, node):
+        self.out.append(TAG_VAR)
+        self.string(node.value)
+        self.variable(node)
+        self.position(node.token)
+
+
+class ASTReader(object):
+    """Rebuild a Program tree from the binary AST format.
+
+    `data` may be bytes or an mmap.  With `lazy=True` (the default) the
+    children of every nested Body are only decoded on first access.
+    Data that is cut short or corrupt raises ASTFormatError, for a lazy
+    body when it is decoded.
+    """
+
+    def __init__(self, data, lazy=True):
+        self.data = data
+        self.lazy = lazy
+        if bytes(data[:len(AST_MAGIC)]) != AST_MAGIC:
+            raise ASTFormatError('Not a serialized AST')
+        self.decode(self.read_header, len(AST_MAGIC))
+        # one VarSymbol per variable and type, shared by its Var nodes
+        self.symbols = {}
+        self.types = {}
+
+    def decode(self, read, *args):
+        try:
+            return read(*args)
+        except (IndexError, UnicodeDecodeError):
+            raise ASTFormatError('Serialized AST is truncated or corrupt') \
+                from None
+
+    def read_header(self, pos):
+        data = self.data
+        if data[pos] != AST_VERSION:
+            raise ASTFormatError(
+                'Unsupported AST version {}'.format(data[pos]))
+        self.resolved = bool(data[pos + 1] & FLAG_RESOLVED)
+        self.positions = bool(data[pos + 1] & FLAG_POSITIONS)
+        count, pos = read_varint(data, pos + 2)
+        self.strings = []
+        for _ in range(count):
+            length, pos = read_varint(data, pos)
+            if pos + length > len(data):
+                raise IndexError(pos + length)
+            self.strings.append(bytes(data[pos:pos + length]).decode('utf-8'))
+            pos += length
+        self.start = pos
+
+    def read(self):
+        return self.decode(self.read_program)
+
+    def read_program(self):
+        tag = self.data[self.start]
+        if tag != TAG_PROGRAM:
+            raise ASTFormatError('Serialized AST does not start with a Program')
+        index, pos = read_varint(self.data, self.start + 1)
+        if self.data[pos] != TAG_BODY:
+            raise ASTFormatError('Invalid AST tag {}'.format(self.data[pos]))
+        # the object body is always needed, decode it eagerly
+        body, pos = self.read_body(pos + 1, lazy=False)
+        if pos != len(self.data):
+            raise ASTFormatError('Serialized AST has trailing data')
+        program = Program(self.strings[index], body)
+        program.resolved = self.resolved
+        return program
+
+    def read_body(self, pos, lazy=None):
+        if self.resolved:
+            depth, pos = read_varint(self.data, pos)
+        size, pos = read_varint(self.data, pos)
+        end = pos + size
+        if end > len(self.data):
+            raise IndexError(end)
+        if lazy is None:
+            lazy = self.lazy
+        if lazy:
+            body = LazyBody(functools.partial(self.read_lazy_children, pos,
+                                              end))
+        else:
+            body = Body()
+            body.children = self.read_contents(pos, end, body)
+        if self.resolved:
+            body.depth = depth
+        return body, end
+
+    def read_lazy_children(self, pos, end, body):
+        return self.decode(self.read_contents, pos, end, body)
+
+    def read_contents(self, pos, end, body):
+        """Children of the Body encoded from `pos` to `end`; the frame
+        layout, if stored, is put on `body`."""
+        data = self.data
+        if self.resolved:
+            count, pos = read_varint(data, pos)
+            slot_names = []
+            for _ in range(count):
+                index, pos = read_varint(data, pos)
+                slot_names.append(self.strings[index])
+            body.slot_names = slot_names
+            body.frame_size = len(slot_names)
+        count, pos = read_varint(data, pos)
+        children = []
+        for _ in range(count):
+            node, pos = self.read_node(pos)
+            children.append(node)
+        if pos != end:
+            raise ASTFormatError('Serialized AST body does not end at its size')
+        return children
+
+    def read_token(self, type, value, pos):
+        """A Token and the offset after its position, if stored."""
+        token = Token(type, value)
+        if self.positions:
+            offset, pos = read_varint(self.data, pos)
+            if offset:
+                token.pos = offset - 1
+        return token, pos
+
+    def read_var(self, pos):
+        index, pos = read_varint(self.data, pos)
+        if self.resolved:
+            depth, pos = read_varint(self.data, pos)
+            slot, pos = read_varint(self.data, pos)
+            type_index, pos = read_varint(self.data, pos)
+        token, pos = self.read_token(ID, self.strings[index], pos)
+        node = Var(token)
+        if self.resolved:
+            node.depth, node.slot = depth, slot
+            node.symbol = self.symbol(index, depth, slot, type_index)
+        return node, pos
+
+    def symbol(self, index, depth, slot, type_index):
+        key = index, depth, slot, type_index
+        symbol = self.symbols.get(key)
+        if symbol is None:
+            type_symbol = self.types.get(type_index)
+            if type_symbol is None:
+                type_symbol = self.types[type_index] = BuiltinTypeSymbol(
+                    self.strings[type_index])
+            symbol = self.symbols[key] = VarSymbol(self.strings[index],
+                                                   type_symbol)
+            symbol.depth = depth
+            symbol.slot = slot
+        return symbol
+
+    def read_node(self, pos):
+        data = self.data
+        tag = data[pos]
+        pos += 1
+        if tag == TAG_NUM:
+            value, pos = read_varint(data, pos)
+            value = value >> 1 if not value & 1 else -((value + 1) >> 1)
+            token, pos = self.read_token(INTEGER, value, pos)
+            return Num(token), pos
+        if tag == TAG_VAR:
+            return self.read_var(pos)
+        if tag == TAG_BINOP:
+            op, pos = self.read_token(*AST_OPERATORS[data[pos]], pos + 1)
+            left, pos = self.read_node(pos)
+            right, pos = self.read_node(pos)
+            return BinOp(left, op, right), pos
+        if tag == TAG_UNARYOP:
+            op, pos = self.read_token(*AST_OPERATORS[data[pos]], pos + 1)
+            expr, pos = self.read_node(pos)
+            return UnaryOp(op, expr), pos
+        if tag == TAG_ASSIGN:
+            left, pos = self.read_var(pos)
+            op, pos = self.read_token(ASSIGN, '=', pos)
+            right, pos = self.read_node(pos)
+            return Assign_stmt(left, op, right), pos
+        if tag == TAG_DECLARATION:
+            name, pos = read_varint(data, pos)
+            type_name, pos = read_varint(data, pos)
+            var_token, pos = self.read_token(ID, self.strings[name], pos)
+            type_token, pos = self.read_token(self.strings[type_name],
+                                              self.strings[type_name], pos)
+            op, pos = self.read_token(ASSIGN, '=', pos)
+            if self.resolved:
+                depth, pos = read_varint(data, pos)
+                slot, pos = read_varint(data, pos)
+            val, pos = self.read_node(pos)
+            node = Declaration(var_token, Type(type_token), op, val)
+            if self.resolved:
+                node.depth, node.slot = depth, slot
+            return node, pos
+        if tag == TAG_COND:
+            comp_op = AST_COMPARISONS[data[pos]]
+            left, pos = self.read_node(pos + 1)
+            right, pos = self.read_node(pos)
+            return Cond_stmt(left, comp_op, right), pos
+        if tag == TAG_IF:
+            condition, pos = self.read_node(pos)
+            body, pos = self.read_node(pos)
+            else_block, pos = self.read_node(pos)
+            return If_stmt(condition, body, else_block), pos
+        if tag == TAG_DO:
+            do_body, pos = self.read_node(pos)
+            condition, pos = self.read_node(pos)
+            return DO_stmt(condition, do_body), pos
+        if tag == TAG_BODY:
+            return self.read_body(pos)
+        if tag == TAG_NOOP:
+            return NoOp(), pos
+        raise ASTFormatError('Invalid AST tag {}'.format(tag))
+
+
+def serialize_ast(tree, resolved=False, positions=False):
+    """The binary AST format of `tree`; see ASTWriter for `resolved`
+    and `positions`."""
+    return ASTWriter(resolved, positions).write(tree)
+
+
+def deserialize_ast(data, lazy=True):
+    return ASTReader(data, lazy).read()
+
+
+def load_ast(path, lazy=True):
+    """Read a serialized AST file through mmap.
+
+    The mapping stays open as long as lazily decoded bodies need it.
+    """
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            # an empty file cannot be mapped
+            raise ASTFormatError('Not a serialized AST')
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return ASTReader(data, lazy).read()
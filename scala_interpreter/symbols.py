@@ -0,0 +1,247 @@
+from .tokens import NameTable
+from .nodes import NodeVisitor
+
+
+class Symbol(object):
+    def __init__(self, name, type=None):
+        self.name = name
+        self.type = type
+        # id of the name in the symbol table's NameTable, set by define()
+        self.name_id = None
+        # where the symbol lives at run time: the nesting depth of the
+        # scope that defined it and its slot in that scope's frame
+        self.depth = None
+        self.slot = None
+
+
+class VarSymbol(Symbol):
+    def __init__(self, name, type):
+        super().__init__(name, type)
+
+    def __str__(self):
+        return '<{name}:{type}>'.format(name=self.name, type=self.type)
+
+    __repr__ = __str__
+
+
+class BuiltinTypeSymbol(Symbol):
+    def __init__(self, name):
+        super().__init__(name)
+
+    def __str__(self):
+        return self.name
+
+    __repr__ = __str__
+
+
+class ScopedSymbolTable(object):
+    """Symbol table for nested block scopes.
+
+    Every name maps to the stack of symbols currently bound to it, the
+    innermost binding last, so a lookup is one dict probe however deep
+    the current block is nested.  Names are keyed by their id in `names`
+    (a new NameTable by default), which ID tokens from a Lexer using the
+    same table already carry.  Each open scope keeps the
+    symbols it defined, so leaving it only pops those bindings again.
+    """
+
+    def __init__(self, names=None):
+        self.names = NameTable() if names is None else names
+        self._symbols = {}
+        self._scopes = [[]]
+        self._frame_sizes = [0]
+        self._init_builtins()
+
+    def _init_builtins(self):
+        self.define(BuiltinTypeSymbol('INTEGER'))
+        self.define(BuiltinTypeSymbol('INT'))
+
+    def __str__(self):
+        s = 'Symbols: {symbols}'.format(
+            symbols=[symbol for scope in self._scopes for symbol in scope]
+        )
+        return s
+
+    __repr__ = __str__
+
+    @property
+    def depth(self):
+        return len(self._scopes) - 1
+
+    def enter_scope(self):
+        self._scopes.append([])
+        self._frame_sizes.append(0)
+
+    def leave_scope(self):
+        for symbol in self._scopes.pop():
+            bindings = self._symbols[symbol.name_id]
+            bindings.pop()
+            if not bindings:
+                del self._symbols[symbol.name_id]
+        self._frame_sizes.pop()
+
+    def fork(self, names):
+        """Table with the current bindings of `names` at the same depth.
+
+        Lets a block be resolved after this table has moved on.
+        """
+        table = ScopedSymbolTable.__new__(ScopedSymbolTable)
+        table.names = self.names
+        table._symbols = {}
+        ids = self.names.ids
+        for name in names:
+            name_id = ids.get(name)
+            bindings = self._symbols.get(name_id)
+            if bindings:
+                table._symbols[name_id] = [bindings[-1]]
+        table._scopes = [[] for _ in self._scopes]
+        table._frame_sizes = [0 for _ in self._frame_sizes]
+        return table
+
+    def slot_names(self):
+        """Names of the variables of the current scope, indexed by slot."""
+        return [symbol.name for symbol in self._scopes[-1]
+                if symbol.slot is not None]
+
+    def define(self, symbol):
+        print('Define: %s' % symbol)
+        scope = self._scopes[-1]
+        if symbol.name_id is None:
+            symbol.name_id = self.names.intern(symbol.name)
+        bindings = self._symbols.setdefault(symbol.name_id, [])
+        symbol.depth = self.depth
+        if bindings and bindings[-1].depth == symbol.depth:
+            # redeclared in the same block: the new symbol takes over the
+            # old one's frame slot
+            previous = bindings[-1]
+            symbol.slot = previous.slot
+            bindings[-1] = symbol
+            scope[scope.index(previous)] = symbol
+            return
+        if isinstance(symbol, VarSymbol):
+            symbol.slot = self._frame_sizes[-1]
+            self._frame_sizes[-1] += 1
+        bindings.append(symbol)
+        scope.append(symbol)
+
+    def lookup(self, name, name_id=None):
+        print('Lookup: %s' % name)
+        if name_id is None:
+            name_id = self.names.ids.get(name)
+        bindings = self._symbols.get(name_id)
+        # the innermost binding shadows the outer ones
+        if bindings:
+            return bindings[-1]
+        return None
+
+    def declare(self, node):
+        """Define the variable introduced by a Declaration node."""
+        type_name = node.type_node.value
+        type_symbol = self.lookup(type_name)
+        var_name = node.var_node.value
+        var_symbol = VarSymbol(var_name, type_symbol)
+        var_symbol.name_id = self.name_id(node.var_node)
+        self.define(var_symbol)
+        node.depth = var_symbol.depth
+        node.slot = var_symbol.slot
+        return var_symbol
+
+    def name_id(self, token):
+        """Id of an ID token's name, the one the Lexer gave it if that
+        Lexer used the same NameTable."""
+        name_id = token.name_id
+        if name_id is not None:
+            names = self.names.names
+            if name_id < len(names) and names[name_id] == token.value:
+                return name_id
+        return self.names.intern(token.value)
+
+    def layout(self, node):
+        """Record the frame layout of the current scope on a Body node."""
+        slot_names = self.slot_names()
+        node.depth = self.depth
+        node.slot_names = slot_names
+        node.frame_size = len(slot_names)
+
+    def resolve(self, node):
+        """Bind a Var node to the (depth, slot) of the variable it names."""
+        var_name = node.value
+        var_symbol = self.lookup(var_name, self.name_id(node.token))
+        if not isinstance(var_symbol, VarSymbol):
+            raise NameError(repr(var_name))
+        node.symbol = var_symbol
+        node.depth = var_symbol.depth
+        node.slot = var_symbol.slot
+        return var_symbol
+
+
+# the flat table of the original interpreter, whose single scope is the
+# object body's
+SymbolTable = ScopedSymbolTable
+
+
+class SymbolTableBuilder(NodeVisitor):
+    def __init__(self, names=None):
+        self.symtab = ScopedSymbolTable(names)
+
+    def visit_Program(self, node):
+        # the object body is the outermost scope itself
+        self.visit_block(node.body)
+        node.resolved = True
+
+    def visit_BinOp(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit_Num(self, node):
+        pass
+
+    def visit_UnaryOp(self, node):
+        self.visit(node.expr)
+
+    def visit_Body(self, node):
+        self.symtab.enter_scope()
+        self.visit_block(node)
+        self.symtab.leave_scope()
+
+    def visit_block(self, node):
+        for child in node.children:
+            self.visit(child)
+        self.symtab.layout(node)
+
+    def visit_NoOp(self, node):
+        pass
+
+    def visit_Declaration(self, node):
+        # the initializer is resolved before the new name comes into scope
+        self.visit(node.val)
+        self.symtab.declare(node)
+
+    def visit_Assign_stmt(self, node):
+        self.symtab.resolve(node.left)
+        self.visit(node.right)
+
+    def visit_Var(self, node):
+        self.symtab.resolve(node)
+
+    def visit_Cond_stmt(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit_If_stmt(self, node):
+        self.visit(node.condition)
+        self.visit(node.body)
+        self.visit(node.else_block)
+
+    def visit_DO_stmt(self, node):
+        # variables declared in the body are not visible in the condition
+        self.visit(node.do_body)
+        self.visit(node.condition)
+
+
+def ensure_resolved(tree):
+    """Resolve a Program with a SymbolTableBuilder unless it already is,
+    as a tree from a plain Parser(...).parse() is not."""
+    if not tree.resolved:
+        SymbolTableBuilder().visit(tree)
+    return tree
@@ -0,0 +1,111 @@
+INTEGER = 'INTEGER'
+PLUS = 'PLUS'
+MINUS = 'MINUS'
+MUL = 'MUL'
+DIV = 'DIV'
+REM = 'REM'
+LPAREN = 'LPAREN'
+RPAREN = 'RPAREN'
+LCURL = 'LCURL'
+RCURL = 'RCURL'
+ID = 'ID'
+ASSIGN = 'ASSIGN'
+SEMI = 'SEMI'
+DOT = 'DOT'
+OBJECT = 'OBJECT'
+VAR = 'VAR'
+COLON = 'COLON'
+COMMA = 'COMMA'
+EOF = 'EOF'
+DEF = 'def'
+IF = 'IF'
+ELSE = 'ELSE'
+TRUE = 'TRUE'
+FALSE = 'FALSE'
+OBJECT = 'OBJECT'
+DO = 'DO'
+WHILE = 'WHILE'
+INT = 'INT'
+LESSTHAN = 'LESSTHAN'
+LEQUAL = 'LEQUAL'
+GREATHAN = 'GREATHAN'
+GEQUAL = 'GEQUAL'
+DEQUAL = 'DEQUAL'
+
+class Token(object):
+    # id of an ID token's name in the Lexer's NameTable, if it has one
+    name_id = None
+
+    def __init__(self, type, value, pos=None):
+        self.type = type
+        self.value = value
+        # offset of the token's first character in the source, if known
+        self.pos = pos
+
+    def __str__(self):
+        """String representation of the class instance.
+        Examples:
+            Token(INTEGER, 3)
+            Token(PLUS, '+')
+            Token(MUL, '*')
+        """
+        return 'Token({type}, {value})'.format(
+            type=self.type,
+            value=repr(self.value)
+        )
+
+    def __repr__(self):
+        return self.__str__()
+
+
+RESERVED_KEYWORDS = {
+    'IF': Token('IF', 'IF'),
+    'ELSE': Token('ELSE', 'ELSE'),
+    'TRUE': Token('TRUE', 'TRUE'),
+    'FALSE': Token('FALSE', 'FALSE'),
+    'VAR': Token('VAR', 'VAR'),
+    'OBJECT': Token('OBJECT', 'OBJECT'),
+    'DO': Token('DO', 'DO'),
+    'WHILE': Token('WHILE', 'WHILE'),
+    'INT': Token('INT','INT')
+}
+
+
+def case_variants(word):
+    """Every upper/lower case spelling of `word`."""
+    variants = ['']
+    for char in word:
+        variants = [variant + case for variant in variants
+                    for case in {char.lower(), char.upper()}]
+    return variants
+
+
+# keywords are case-insensitive; listing every spelling lets the Lexer
+# classify a word with one probe instead of upper-casing it first
+KEYWORD_SPELLINGS = {spelling: token
+                     for name, token in RESERVED_KEYWORDS.items()
+                     for spelling in case_variants(name)}
+
+
+class NameTable(object):
+    """Identifier table interning names to small integer ids.
+
+    `ids` maps a name to its id and `names` lists the names by id, each
+    stored once so that equal names are the same string object.  Every
+    Lexer has a table of its own unless it is given one; the ids its ID
+    tokens carry only mean something in that table.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
@@ -0,0 +1,282 @@
+from .tokens import (DEQUAL, DIV, GEQUAL, GREATHAN, LEQUAL, LESSTHAN, MINUS,
+                     MUL, PLUS, REM)
+from .nodes import NodeVisitor
+from .interpreter import Interpreter
+
+
+OPERATORS = {
+    PLUS: '+',
+    MINUS: '-',
+    MUL: '*',
+    DIV: '//',
+    REM: '%',
+}
+
+COMPARISONS = {
+    LESSTHAN: '<',
+    LEQUAL: '<=',
+    GREATHAN: '>',
+    GEQUAL: '>=',
+    DEQUAL: '==',
+}
+
+
+class NotTraceable(Exception):
+    """The loop body holds something a trace cannot express."""
+
+
+class Trace(object):
+    """A compiled loop: `run(frames)` keeps iterating until the condition
+    fails (returns -1) or a guard fails (returns the index of the side
+    exit in `exits`).
+
+    Each exit is the path of (body, index) pairs from the loop body
+    inwards; the innermost index is the If_stmt whose guard failed, the
+    outer ones the statement after the branch being executed.
+    `directions` are the branch directions the trace was compiled from.
+    """
+
+    def __init__(self, run, exits, source, directions):
+        self.run = run
+        self.exits = exits
+        self.source = source
+        self.directions = directions
+        self.exit_counts = [0] * len(exits)
+
+
+class TraceCompiler(NodeVisitor):
+    """Turn the path one loop iteration took into Python source.
+
+    `directions` maps every If_stmt executed while recording to the set
+    of branches seen taken (True for the body, False for the else
+    block).  An If_stmt seen both ways compiles to an if/else; otherwise
+    the other branch is replaced by a guard that leaves the trace.
+    Expressions compile to the operators the Interpreter
+    applies, reading `f<depth>[slot]` for variables.
+    """
+
+    def __init__(self, directions):
+        self.directions = directions
+
+    def compile(self, node, outer_depth, tick=None):
+        body = node.do_body
+        self.lines = []
+        self.exits = []
+        self.path = []
+        self.indent = 2
+        self.emit_body(body)
+        self.indent = 2
+        self.line('if not {}:'.format(self.visit(node.condition)))
+        self.line('    return -1')
+        if tick is not None:
+            self.line('tick({})'.format(len(body.children) + 1))
+        header = ['def trace(frames):']
+        header += ['    f{0} = frames[{0}]'.format(depth)
+                   for depth in range(outer_depth)]
+        header.append('    while True:')
+        source = '\n'.join(header + self.lines) + '\n'
+        namespace = {'tick': tick}
+        exec(compile(source, '<trace>', 'exec'), namespace)
+        return Trace(namespace['trace'], self.exits, source, self.directions)
+
+    def line(self, text):
+        self.lines.append('    ' * self.indent + text)
+
+    def emit_body(self, body):
+        depth = body.depth
+        self.line('f{0} = [None] * {1}'.format(depth, body.frame_size))
+        self.line('frames.append(f{})'.format(depth))
+        for index, child in enumerate(body.children):
+            self.path.append((body, index))
+            self.visit(child)
+            self.path.pop()
+        self.line('frames.pop()')
+
+    def visit_NoOp(self, node):
+        pass
+
+    def visit_Body(self, node):
+        self.emit_body(node)
+
+    def visit_Declaration(self, node):
+        self.line('f{}[{}] = {}'.format(node.depth, node.slot,
+                                        self.visit(node.val)))
+
+    def visit_Assign_stmt(self, node):
+        var_node = node.left
+        self.line('f{}[{}] = {}'.format(var_node.depth, var_node.slot,
+                                        self.visit(node.right)))
+
+    def visit_If_stmt(self, node):
+        taken = self.directions.get(node)
+        if not taken:
+            raise NotTraceable('If_stmt not executed while recording')
+        condition = self.visit(node.condition)
+        body, index = self.path[-1]
+        if len(taken) == 2:
+            self.line('if {}:'.format(condition))
+            self.branch(node.body, body, index)
+            self.line('else:')
+            self.branch(node.else_block, body, index)
+            return
+        self.exits.append(list(self.path))
+        if True in taken:
+            self.line('if not {}:'.format(condition))
+        else:
+            self.line('if {}:'.format(condition))
+        self.line('    return {}'.format(len(self.exits) - 1))
+        self.indent -= 1
+        self.branch(node.body if True in taken else node.else_block,
+                    body, index)
+        self.indent += 1
+
+    def branch(self, node, body, index):
+        # a side exit inside the branch resumes after the If_stmt
+        self.path[-1] = (body, index + 1)
+        self.indent += 1
+        size = len(self.lines)
+        self.visit(node)
+        if len(self.lines) == size:
+            self.line('pass')
+        self.indent -= 1
+        self.path[-1] = (body, index)
+
+    def visit_DO_stmt(self, node):
+        raise NotTraceable('nested do-while')
+
+    def visit_Cond_stmt(self, node):
+        return '({} {} {})'.format(self.visit(node.left),
+                                   COMPARISONS[node.comp_op],
+                                   self.visit(node.right))
+
+    def visit_BinOp(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        op = node.op.type
+        if op == REM and node.int_op is None:
+            # the Interpreter takes untyped remainders on floats
+            return '(float({}) % float({}))'.format(left, right)
+        return '({} {} {})'.format(left, OPERATORS[op], right)
+
+    def visit_UnaryOp(self, node):
+        return '({}{})'.format('-' if node.op.type == MINUS else '+',
+                               self.visit(node.expr))
+
+    def visit_Num(self, node):
+        return repr(node.value)
+
+    def visit_Var(self, node):
+        return 'f{}[{}]'.format(node.depth, node.slot)
+
+
+class TracingInterpreter(Interpreter):
+    """Interpreter with a tracing tier for hot do-while loops.
+
+    Iterations of every DO_stmt are counted.  Once a loop has run
+    `hot_loop` times, the next iteration is interpreted while recording
+    the direction of each If_stmt, and that path is compiled by
+    TraceCompiler into a Python function running the rest of the loop.
+    When a guard fails, the iteration is finished by the Interpreter and
+    the trace is entered again.  Once a side exit has been taken
+    `max_exits` times, the path it leads to is recorded while finishing
+    the iteration and the trace is recompiled to include it, at most
+    `max_extensions` times per loop.  Loops nesting another do-while
+    stay interpreted; the inner loop is traced on its own.
+    """
+
+    def __init__(self, tree, governor=None, hot_loop=50, max_exits=16,
+                 max_extensions=4):
+        super().__init__(tree, governor)
+        self.hot_loop = hot_loop
+        self.max_exits = max_exits
+        self.max_extensions = max_extensions
+        self.counts = {}
+        self.traces = {}
+        self.extensions = {}
+        self.untraceable = set()
+        self.directions = None
+        self.traces_compiled = self.side_exits = 0
+
+    def visit_If_stmt(self, node):
+        taken = bool(self.visit(node.condition))
+        if self.directions is not None:
+            self.directions.setdefault(node, set()).add(taken)
+        if taken:
+            self.visit(node.body)
+        else:
+            self.visit(node.else_block)
+
+    def visit_DO_stmt(self, node):
+        governor = self.governor
+        self.visit(node.do_body)
+        while self.visit(node.condition):
+            if governor is not None:
+                governor.tick(len(node.do_body.children) + 1)
+            trace = self.traces.get(node)
+            if trace is None:
+                count = self.counts.get(node, 0) + 1
+                self.counts[node] = count
+                if count >= self.hot_loop and node not in self.untraceable:
+                    self.record(node)
+                else:
+                    self.visit(node.do_body)
+                continue
+            exit_index = trace.run(self.frames)
+            if exit_index < 0:
+                return
+            self.side_exits += 1
+            trace.exit_counts[exit_index] += 1
+            path = trace.exits[exit_index]
+            if (trace.exit_counts[exit_index] >= self.max_exits
+                    and self.extensions.get(node, 0) < self.max_extensions):
+                self.extensions[node] = self.extensions.get(node, 0) + 1
+                self.extend(node, trace, path)
+            else:
+                self.resume(path)
+
+    # a trace runs a loop faster than its unrolled copies
+    visit_UnrolledLoop = visit_DO_stmt
+
+    def record(self, node):
+        """Run one iteration recording branch directions, then compile."""
+        directions = self.recording(self.visit, node.do_body)
+        self.compile(node, directions)
+
+    def extend(self, node, trace, path):
+        """Finish an iteration from a side exit recording its path, then
+        compile the trace again with that path added."""
+        directions = self.recording(self.resume, path)
+        for if_node, taken in trace.directions.items():
+            directions.setdefault(if_node, set()).update(taken)
+        self.compile(node, directions)
+
+    def recording(self, run, *args):
+        outer = self.directions
+        self.directions = {}
+        try:
+            run(*args)
+            return self.directions
+        finally:
+            self.directions = outer
+
+    def compile(self, node, directions):
+        tick = self.governor.tick if self.governor is not None else None
+        try:
+            trace = TraceCompiler(directions).compile(node, len(self.frames),
+                                                      tick)
+        except NotTraceable:
+            if node in self.traces:
+                # keep the trace; this side exit stays interpreted
+                self.extensions[node] = self.max_extensions
+            else:
+                self.untraceable.add(node)
+            return
+        self.traces[node] = trace
+        self.traces_compiled += 1
+
+    def resume(self, path):
+        """Finish an iteration left at a side exit, innermost block first."""
+        for body, index in reversed(path):
+            for child in body.children[index:]:
+                self.visit(child)
+            self.frames.pop()
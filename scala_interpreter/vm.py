@@ -0,0 +1,272 @@
+import hashlib
+import marshal
+import sys
+
+from .tokens import MINUS, REM
+from .nodes import NoOp, NodeVisitor
+from .inference import INT_BINOPS, compare
+from .interpreter import ExecutionLimitExceeded
+from .symbols import ensure_resolved
+
+
+# opcodes of the bytecode executed by VM
+STMT = 0           # statement boundary, the VM may pause here
+LOAD_CONST = 1     # arg: value
+LOAD = 2           # arg: (depth, slot)
+STORE = 3          # arg: (depth, slot)
+BINARY = 4         # arg: operator token type, generic semantics
+BINARY_INT = 5     # arg: operator token type, operands proven INT
+NEGATE = 6
+COMPARE = 7        # arg: comparison token type
+JUMP = 8           # arg: target pc
+JUMP_IF_FALSE = 9  # arg: target pc
+LOOP = 10          # arg: (target pc, steps), jump back if true
+PUSH_FRAME = 11    # arg: frame size
+POP_FRAME = 12
+HALT = 13
+
+SNAPSHOT_VERSION = 2
+# marshal data is only meant to be read by the Python version that wrote
+# it, so snapshots name that Python the way .pyc file names do
+PYTHON_TAG = sys.implementation.cache_tag or '{}-{}{}'.format(
+    sys.implementation.name, *sys.version_info[:2])
+
+
+class Bytecode(object):
+    """Flat instruction list for a resolved program.
+
+    `instructions` is a list of (opcode, arg) pairs made only of plain
+    values, so the whole object can be marshalled; `global_names` are
+    the slot names of the object body's frame.
+    """
+
+    def __init__(self, name, instructions, global_names):
+        self.name = name
+        self.instructions = instructions
+        self.global_names = global_names
+        self.digest = hashlib.sha1(
+            marshal.dumps((name, instructions, global_names))).hexdigest()
+
+
+class Compiler(NodeVisitor):
+    """Translate a resolved tree into Bytecode for the VM.
+
+    Every statement starts with a STMT instruction; at those points the
+    operand stack is empty, so the whole execution state is the program
+    counter plus the frames.
+    """
+
+    def compile(self, tree):
+        self.code = []
+        self.visit(ensure_resolved(tree))
+        return Bytecode(tree.name, self.code, list(tree.body.slot_names))
+
+    def emit(self, op, arg=None):
+        self.code.append((op, arg))
+        return len(self.code) - 1
+
+    def patch(self, index, target):
+        self.code[index] = (self.code[index][0], target)
+
+    def visit_Program(self, node):
+        # the global frame is created by the VM itself
+        for child in node.body.children:
+            self.visit(child)
+        self.emit(HALT)
+
+    def visit_Body(self, node):
+        self.emit(PUSH_FRAME, node.frame_size)
+        for child in node.children:
+            self.visit(child)
+        self.emit(POP_FRAME)
+
+    def visit_NoOp(self, node):
+        pass
+
+    def visit_Declaration(self, node):
+        self.emit(STMT)
+        self.visit(node.val)
+        self.emit(STORE, (node.depth, node.slot))
+
+    def visit_Assign_stmt(self, node):
+        self.emit(STMT)
+        self.visit(node.right)
+        self.emit(STORE, (node.left.depth, node.left.slot))
+
+    def visit_If_stmt(self, node):
+        self.emit(STMT)
+        self.visit(node.condition)
+        to_else = self.emit(JUMP_IF_FALSE)
+        self.visit(node.body)
+        if isinstance(node.else_block, NoOp):
+            self.patch(to_else, len(self.code))
+            return
+        to_end = self.emit(JUMP)
+        self.patch(to_else, len(self.code))
+        self.visit(node.else_block)
+        self.patch(to_end, len(self.code))
+
+    def visit_DO_stmt(self, node):
+        top = len(self.code)
+        self.visit(node.do_body)
+        # checking the condition is a boundary of its own, so even a loop
+        # with an empty body can be paused
+        self.emit(STMT)
+        self.visit(node.condition)
+        # the governor counts steps as the tree engines do
+        self.emit(LOOP, (top, len(node.do_body.children) + 1))
+
+    def visit_Cond_stmt(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+        self.emit(COMPARE, node.comp_op)
+
+    def visit_BinOp(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+        if node.int_op is not None:
+            self.emit(BINARY_INT, node.op.type)
+        else:
+            self.emit(BINARY, node.op.type)
+
+    def visit_UnaryOp(self, node):
+        self.visit(node.expr)
+        if node.op.type == MINUS:
+            self.emit(NEGATE)
+
+    def visit_Num(self, node):
+        self.emit(LOAD_CONST, node.value)
+
+    def visit_Var(self, node):
+        self.emit(LOAD, (node.depth, node.slot))
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class VM(object):
+    """Stack machine running Bytecode with an explicit program counter.
+
+    Unlike Interpreter, execution state does not live on the Python call
+    stack: run() can stop at any statement boundary, snapshot() turns
+    the state into bytes and VM.restore() continues from them, possibly
+    in another process.
+    """
+
+    def __init__(self, code):
+        self.code = code
+        self.pc = 0
+        self.frames = [[None] * len(code.global_names)]
+        self.finished = False
+
+    @property
+    def GLOBAL_MEMORY(self):
+        return {name: value
+                for name, value in zip(self.code.global_names, self.frames[0])
+                if value is not None}
+
+    def run(self, max_statements=None, governor=None):
+        """Execute until HALT or until `max_statements` statements ran.
+
+        Returns True once the program has finished.  A `governor` is
+        started and, like Interpreter does, ticked each time a loop goes
+        round again, with one step per statement of its body plus one
+        for the condition; when it stops the run the VM is left paused
+        at the top of that loop body, so it can still be snapshotted and
+        resumed, and ExecutionLimitExceeded is raised.
+        """
+        if governor is not None:
+            governor.start()
+        code = self.code.instructions
+        frames = self.frames
+        stack = []
+        pc = self.pc
+        budget = max_statements
+        while True:
+            op, arg = code[pc]
+            pc += 1
+            if op == LOAD:
+                stack.append(frames[arg[0]][arg[1]])
+            elif op == LOAD_CONST:
+                stack.append(arg)
+            elif op == STORE:
+                frames[arg[0]][arg[1]] = stack.pop()
+            elif op == BINARY_INT:
+                right = stack.pop()
+                stack.append(INT_BINOPS[arg](stack.pop(), right))
+            elif op == STMT:
+                if budget is not None:
+                    if budget == 0:
+                        self.pc = pc - 1
+                        return False
+                    budget -= 1
+            elif op == COMPARE:
+                right = stack.pop()
+                stack.append(compare(arg, stack.pop(), right))
+            elif op == LOOP:
+                if stack.pop():
+                    pc = arg[0]
+                    if governor is not None:
+                        try:
+                            governor.tick(arg[1])
+                        except ExecutionLimitExceeded as e:
+                            self.pc = pc
+                            e.memory = self.GLOBAL_MEMORY
+                            raise
+            elif op == JUMP_IF_FALSE:
+                if not stack.pop():
+                    pc = arg
+            elif op == JUMP:
+                pc = arg
+            elif op == BINARY:
+                right = stack.pop()
+                left = stack.pop()
+                if arg == REM:
+                    stack.append(float(left) % float(right))
+                else:
+                    stack.append(INT_BINOPS[arg](left, right))
+            elif op == NEGATE:
+                stack.append(-stack.pop())
+            elif op == PUSH_FRAME:
+                frames.append([None] * arg)
+            elif op == POP_FRAME:
+                frames.pop()
+            elif op == HALT:
+                self.pc = pc - 1
+                self.finished = True
+                return True
+
+    def snapshot(self):
+        """Serialize the paused state (program counter and frames).
+
+        The bytes are marshal data: only this Python version (PYTHON_TAG)
+        can restore them.
+        """
+        return marshal.dumps(
+            (SNAPSHOT_VERSION, PYTHON_TAG, self.code.digest, self.pc,
+             self.finished, self.frames))
+
+    @classmethod
+    def restore(cls, code, data):
+        """Rebuild a VM for `code` from the bytes of snapshot().
+
+        marshal is not safe against malicious data, so only restore
+        snapshots this interpreter wrote itself, never untrusted ones.
+        """
+        try:
+            version, tag, digest, pc, finished, frames = marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            raise SnapshotError('Corrupt snapshot')
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError('Unsupported snapshot version {}'.format(version))
+        if tag != PYTHON_TAG:
+            raise SnapshotError('Snapshot was written by {}, not {}'.format(
+                tag, PYTHON_TAG))
+        if digest != code.digest:
+            raise SnapshotError('Snapshot belongs to a different program')
+        vm = cls(code)
+        vm.pc = pc
+        vm.finished = finished
+        vm.frames = frames
+        return vm
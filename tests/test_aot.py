@@ -0,0 +1,154 @@
+import os
+
+import pytest
+
+from scala_interpreter import (ARTIFACT_HEADER, VM, Interpreter, Lexer,
+                               Parser, TypeInferencer, artifact_path,
+                               cached_compile, compile_source, load_artifact,
+                               write_artifact)
+from scala_interpreter import aot
+from scala_interpreter.cli import main
+
+
+PROGRAM = '''object C {
+  var i:INT = 0; var s:INT = 0;
+  do { s = s + i % 7; i = i + 1 } while (i < 30);
+  if (s > 50) { s = s - 50 } else { s = 0 }
+}'''
+
+EXPECTED = {'i': 30, 's': 35}
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'program.scala'
+    path.write_text(PROGRAM)
+    return str(path)
+
+
+def run(code):
+    vm = VM(code)
+    vm.run()
+    return vm.GLOBAL_MEMORY
+
+
+def written(source):
+    path = artifact_path(source)
+    write_artifact(path, compile_source(PROGRAM), source)
+    return path
+
+
+def test_compiled_source_runs_like_the_interpreter():
+    tree = Parser(Lexer(PROGRAM), fused=True).parse()
+    TypeInferencer().visit(tree)
+    interpreter = Interpreter(tree)
+    interpreter.interpret()
+    assert interpreter.GLOBAL_MEMORY == EXPECTED
+    for optimize in (False, True):
+        assert run(compile_source(PROGRAM, optimize)) == EXPECTED
+
+
+def test_fresh_artifact_loads(source):
+    path = written(source)
+    assert path.endswith('program.scalac')
+    assert load_artifact(path, source).digest \
+        == compile_source(PROGRAM).digest
+    # no temporary file is left next to it
+    assert sorted(os.listdir(os.path.dirname(path))) \
+        == ['program.scala', 'program.scalac']
+
+
+def test_touched_but_unchanged_source_is_still_fresh(source):
+    path = written(source)
+    st = os.stat(source)
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert run(load_artifact(path, source)) == EXPECTED
+
+
+def test_changed_source_makes_the_artifact_stale(source):
+    path = written(source)
+    st = os.stat(source)
+    with open(source, 'w') as f:
+        f.write(PROGRAM.replace('30', '31'))
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert load_artifact(path, source) is None
+
+
+def test_missing_and_corrupt_artifacts_are_stale(source):
+    path = written(source)
+    with open(path, 'rb') as f:
+        data = f.read()
+    header = ARTIFACT_HEADER.size
+    tag = header - 8 - 8 - 20 - 16
+    for bad in (b'', data[:header - 1], b'PYC0' + data[4:],
+                data[:4] + bytes([data[4] + 1]) + data[5:],
+                data[:tag] + b'cpython-0'.ljust(16, b'\0') + data[tag + 16:],
+                data[:header] + b'\xff' * 8, data[:-3]):
+        with open(path, 'wb') as f:
+            f.write(bad)
+        assert load_artifact(path, source) is None
+    os.remove(path)
+    assert load_artifact(path, source) is None
+
+
+def test_failed_write_keeps_the_old_artifact(source, monkeypatch):
+    path = written(source)
+    with open(path, 'rb') as f:
+        before = f.read()
+
+    def fail(src, dst):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(aot.os, 'replace', fail)
+    with pytest.raises(OSError):
+        write_artifact(path, compile_source('object E { var x:INT = 1 }'),
+                       source)
+    with open(path, 'rb') as f:
+        assert f.read() == before
+    assert sorted(os.listdir(os.path.dirname(path))) \
+        == ['program.scala', 'program.scalac']
+
+
+def test_cached_compile_reuses_and_refreshes(source, monkeypatch):
+    assert run(cached_compile(source)) == EXPECTED
+    assert os.path.exists(artifact_path(source))
+    compiled = []
+    compile_text = aot.compile_source
+
+    def counted(text, optimize=True):
+        compiled.append(text)
+        return compile_text(text, optimize)
+
+    monkeypatch.setattr(aot, 'compile_source', counted)
+    assert run(cached_compile(source)) == EXPECTED
+    assert compiled == []
+    st = os.stat(source)
+    with open(source, 'w') as f:
+        f.write(PROGRAM.replace('s - 50', 's - 10'))
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert run(cached_compile(source)) == {'i': 30, 's': 75}
+    assert len(compiled) == 1
+    assert run(cached_compile(source)) == {'i': 30, 's': 75}
+    assert len(compiled) == 1
+
+
+def test_cached_compile_runs_without_a_writable_cache(source, monkeypatch):
+    def fail(path, code, source):
+        raise OSError('read-only')
+
+    monkeypatch.setattr(aot, 'write_artifact', fail)
+    assert run(cached_compile(source)) == EXPECTED
+    assert not os.path.exists(artifact_path(source))
+
+
+def test_cli_compile_and_run(source, tmp_path, capsys):
+    main([source])
+    expected = capsys.readouterr().out.split('Run-time')[-1]
+    output = str(tmp_path / 'out.scalac')
+    main(['compile', source, '-o', output])
+    assert capsys.readouterr().out.endswith('Wrote {}\n'.format(output))
+    assert run(load_artifact(output, source)) == EXPECTED
+    for _ in range(2):
+        main(['run', source])
+        assert capsys.readouterr().out.endswith(expected)
+    assert os.path.exists(artifact_path(source))
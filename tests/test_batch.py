@@ -0,0 +1,100 @@
+from multiprocessing import shared_memory
+
+import pytest
+
+from scala_interpreter import (Interpreter, Lexer, Parser, SharedColumns,
+                               batch_pool, run_batch)
+from scala_interpreter import batch
+
+
+PROGRAM = '''object B {
+  var x:INT = 0; var y:INT = 3; var s:INT = 0; var i:INT = 0;
+  do { s = s + x * i; i = i + 1 } while (i < y);
+  if (s > 20) { s = s - 20 } else { s = s + 1 }
+}'''
+
+
+def tree():
+    return Parser(Lexer(PROGRAM), fused=True).parse()
+
+
+def run_row(x, y):
+    text = PROGRAM.replace('x:INT = 0', 'x:INT = {}'.format(x)).replace(
+        'y:INT = 3', 'y:INT = {}'.format(y))
+    interpreter = Interpreter(Parser(Lexer(text), fused=True).parse())
+    interpreter.interpret()
+    return interpreter.GLOBAL_MEMORY
+
+
+@pytest.fixture(scope='module')
+def executor():
+    with batch_pool(2) as executor:
+        # fork the workers before any block exists
+        executor.submit(len, '').result()
+        yield executor
+
+
+@pytest.mark.parametrize('shared', [False, True])
+def test_rows_run_like_the_interpreter(executor, shared):
+    xs = list(range(-5, 20))
+    ys = [x % 4 + 1 for x in xs]
+    results = run_batch(tree(), {'x': xs, 'y': ys}, workers=2,
+                        executor=executor, shared=shared)
+    for row, (x, y) in enumerate(zip(xs, ys)):
+        memory = run_row(x, y)
+        assert {name: column[row] for name, column in results.items()} \
+            == memory
+
+
+def test_input_block_is_freed_when_the_output_block_fails(monkeypatch):
+    created = []
+    create = SharedColumns.create.__func__
+
+    def failing_create(cls, names, rows):
+        if created:
+            raise MemoryError
+        created.append(create(cls, names, rows))
+        return created[-1]
+
+    monkeypatch.setattr(SharedColumns, 'create', classmethod(failing_create))
+    with pytest.raises(MemoryError):
+        run_batch(tree(), {'x': [1, 2]}, workers=1, shared=True)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=created[0].block.name)
+
+
+def test_workers_attach_without_owning_the_block(executor):
+    columns = SharedColumns.create(['s'], 4)
+    try:
+        executor.submit(batch.run_shared, tree(), columns.spec(),
+                        columns.spec(), 0, 4).result()
+        # still there for the creator to read and unlink
+        assert list(columns.columns['s']) == [1, 1, 1, 1]
+    finally:
+        columns.close()
+        columns.unlink()
+
+
+@pytest.mark.parametrize('shared', [False, True])
+def test_int_arithmetic_stays_integral_without_a_typed_tree(executor, shared):
+    text = 'object M { var x:INT = 7; var y:INT = 0; y = x % 3 - x / 2 }'
+    # neither resolved nor typed: run_batch does both
+    results = run_batch(Parser(Lexer(text)).parse(), {'x': [7, -7, 10]},
+                        workers=2, executor=executor, shared=shared)
+    assert list(results['y']) == [x % 3 - x // 2 for x in (7, -7, 10)]
+
+
+def test_rows_go_through_shared_memory_by_default(executor, monkeypatch):
+    created = []
+    create = SharedColumns.create.__func__
+
+    def counted_create(cls, names, rows):
+        created.append(names)
+        return create(cls, names, rows)
+
+    monkeypatch.setattr(SharedColumns, 'create', classmethod(counted_create))
+    results = run_batch(tree(), {'x': [1, 2]}, ['s'], workers=2,
+                        executor=executor)
+    assert list(results['s']) == [run_row(x, 3)['s'] for x in (1, 2)]
+    # one block for the inputs, one for the outputs
+    assert len(created) == 2
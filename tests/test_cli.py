@@ -0,0 +1,125 @@
+import pytest
+
+from scala_interpreter.cli import main, parse_args
+
+
+@pytest.mark.parametrize('argv', [
+    ['--engine', 'vm', '--typed-memory'],
+    ['--pause-after', '2'],
+    ['--engine', 'trace', '--resume'],
+    ['--engine', 'quicken', '--memo'],
+    ['--engine', 'trace', '--memo'],
+    ['--engine', 'vm', '--memo'],
+    ['--engine', 'quicken', '--profile'],
+    ['--engine', 'trace', '--profile'],
+    ['--profile', '--memo'],
+    ['--lazy', '--jobs', '3'],
+    ['--pipeline', '--jobs', '8'],
+])
+def test_options_not_for_the_engine_are_rejected(argv):
+    with pytest.raises(SystemExit):
+        parse_args(['program.scala'] + argv)
+
+
+@pytest.mark.parametrize('engine', ['tree', 'quicken', 'trace'])
+def test_typed_memory_composes_with_tree_engines(tmp_path, capsys, engine):
+    source = tmp_path / 'loop.scala'
+    source.write_text('object A { var i:INT = 0; '
+                      'do { i = i + 1 } while (i < 10) }')
+    main([str(source), '--engine', engine, '--typed-memory'])
+    assert capsys.readouterr().out.endswith('i = 10\n')
+
+
+def test_jobs_only_go_parallel_where_it_pays(tmp_path, capsys, monkeypatch):
+    from scala_interpreter import cli, lexer, parallel
+
+    def refuse(*args, **kwargs):
+        raise AssertionError('took a parallel path')
+
+    source = tmp_path / 'small.scala'
+    source.write_text('object A { var i:INT = 0; '
+                      'do { i = i + 1 } while (i < 10) }')
+    monkeypatch.setattr(lexer, 'lex_parallel', refuse)
+    # a small source is lexed and parsed here even with cores to spare
+    monkeypatch.setattr(cli.os, 'cpu_count', lambda: 8)
+    main([str(source), '--jobs', '4'])
+    assert capsys.readouterr().out.endswith('i = 10\n')
+    # and with one core nothing is sent to processes at all
+    monkeypatch.setattr(cli.os, 'cpu_count', lambda: 1)
+    monkeypatch.setattr(parallel.ParallelInterpreter, 'visit_Program', refuse)
+    main([str(source), '--jobs', '4'])
+    assert capsys.readouterr().out.endswith('i = 10\n')
+    assert cli.worker_count(4) == 1
+
+
+def test_errors_name_the_same_place_under_jobs(tmp_path, monkeypatch):
+    from scala_interpreter import cli, lexer
+    calls = []
+    lex_parallel = lexer.lex_parallel
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return lex_parallel(*args, **kwargs)
+
+    monkeypatch.setattr(lexer, 'lex_parallel', counted)
+    monkeypatch.setattr(cli.os, 'cpu_count', lambda: 4)
+    monkeypatch.setattr(cli, 'PARALLEL_MIN_SOURCE', 0)
+    lines = ['object e {']
+    lines += ['var v{0}:INT = {0};'.format(i) for i in range(40)]
+    for bad, expected in (('v3 = v3 $ 1;', 'line 42, column 9'),
+                          ('v3 = v3 + ;', 'line 42, column 11')):
+        source = tmp_path / 'bad.scala'
+        source.write_text('\n'.join(lines + [bad, 'v4 = 1', '}']))
+        for argv in ([str(source)], [str(source), '--jobs', '3']):
+            with pytest.raises(Exception) as raised:
+                main(argv)
+            assert expected in str(raised.value)
+    assert len(calls) == 2
+
+
+def test_jobs_under_a_governor_warn_that_statements_run_here(
+        tmp_path, capsys, monkeypatch):
+    from scala_interpreter import cli, parallel
+
+    def refuse(*args, **kwargs):
+        raise AssertionError('ran statements in processes')
+
+    source = tmp_path / 'loop.scala'
+    source.write_text('object A { var i:INT = 0; '
+                      'do { i = i + 1 } while (i < 10) }')
+    monkeypatch.setattr(cli.os, 'cpu_count', lambda: 4)
+    monkeypatch.setattr(parallel.ParallelInterpreter, 'visit_Program', refuse)
+    main([str(source), '--jobs', '2', '--max-steps', '1000'])
+    captured = capsys.readouterr()
+    assert captured.out.endswith('i = 10\n')
+    assert 'Warning: --jobs' in captured.err
+    main([str(source), '--max-steps', '1000'])
+    assert 'Warning' not in capsys.readouterr().err
+
+
+def test_workers_shut_down_when_the_program_fails(tmp_path, monkeypatch):
+    import concurrent.futures
+    from scala_interpreter import cli
+    shut_down = []
+
+    class Executor(concurrent.futures.ProcessPoolExecutor):
+        def shutdown(self, *args, **kwargs):
+            shut_down.append(self)
+            super().shutdown(*args, **kwargs)
+
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', Executor)
+    monkeypatch.setattr(cli.os, 'cpu_count', lambda: 4)
+    source = tmp_path / 'bad.scala'
+    source.write_text('object A { var i:INT = 0; i = 1 / i }')
+    with pytest.raises(ZeroDivisionError):
+        main([str(source), '--jobs', '2'])
+    assert len(shut_down) == 1
+
+
+@pytest.mark.parametrize('option', ['--lazy', '--pipeline'])
+def test_front_end_options_keep_a_few_jobs(tmp_path, capsys, option):
+    source = tmp_path / 'loop.scala'
+    source.write_text('object A { var i:INT = 0; '
+                      'do { i = i + 1 } while (i < 10) }')
+    main([str(source), option, '--jobs', '2'])
+    assert capsys.readouterr().out.endswith('i = 10\n')
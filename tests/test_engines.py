@@ -0,0 +1,191 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from scala_interpreter import (VM, Compiler, CoroutineInterpreter, IntFrame,
+                               Interpreter, Lexer, MemoInterpreter,
+                               ParallelInterpreter, Parser,
+                               ProfilingInterpreter, QuickeningInterpreter,
+                               Scheduler, TracingInterpreter, TypeInferencer)
+
+
+PROGRAMS = {
+    'loop': """object a {
+var i:INT = 0; var s:INT = 0; var p:INT = 1;
+do { s = s + i * i - 3; p = (p * 3) % 1000; i = i + 1 } while (i < 40);
+var q:INT = s / 7; var r:INT = -s % 9
+}""",
+    'blocks': """object b {
+var x:INT = 5; var y:INT = 0;
+if (x > 3) { var x:INT = 10; y = x * 2 } else { y = 1 };
+do { var t:INT = y % 4; y = y - t - 1;
+     if (t == 2) { x = x + 1 } else { x = x - 1 } } while (y > 0)
+}""",
+    'groups': """object c {
+var a:INT = 0; var i:INT = 0; var b:INT = 0; var j:INT = 0;
+do { a = a + i; i = i + 1 } while (i < 200);
+do { b = b + j * 2; j = j + 1 } while (j < 300);
+var c:INT = a + b
+}""",
+    'invariant': """object d {
+var k:INT = 7; var m:INT = 3; var i:INT = 0; var s:INT = 0;
+do { s = s + (k * m + k % m) * (k - m); i = i + 1 } while (i < 50)
+}""",
+    'independent': """object e {
+var a:INT = 0; var i:INT = 0; var b:INT = 1; var j:INT = 0;
+do { a = a + i % 5; i = i + 1 } while (i < 200);
+var c:INT = 4; c = c * c;
+do { b = (b * 3) % 101; j = j + 1 } while (j < 300)
+}""",
+}
+
+
+def parse(text):
+    tree = Parser(Lexer(text), fused=True).parse()
+    TypeInferencer().visit(tree)
+    return tree
+
+
+def interpret(tree, engine=Interpreter):
+    interpreter = engine(tree)
+    interpreter.interpret()
+    return interpreter.GLOBAL_MEMORY
+
+
+class TypedInterpreter(Interpreter):
+    typed_memory = True
+
+
+def run_vm(tree):
+    vm = VM(Compiler().compile(tree))
+    assert vm.run()
+    return vm.GLOBAL_MEMORY
+
+
+def run_scheduled(tree):
+    scheduler = Scheduler(quantum=3)
+    task = scheduler.spawn(CoroutineInterpreter(tree))
+    # a second program sharing the turns must not disturb the first
+    scheduler.spawn(CoroutineInterpreter(parse(PROGRAMS['loop'])))
+    return scheduler.run()[task]
+
+
+ENGINES = {
+    'coroutine': lambda tree: interpret(tree, CoroutineInterpreter),
+    'memo': lambda tree: interpret(tree, MemoInterpreter),
+    'profile': lambda tree: interpret(tree, ProfilingInterpreter),
+    'quicken': lambda tree: interpret(tree, QuickeningInterpreter),
+    'scheduler': run_scheduled,
+    'trace': lambda tree: interpret(tree, TracingInterpreter),
+    'typed memory': lambda tree: interpret(tree, TypedInterpreter),
+    'vm': run_vm,
+}
+
+
+@pytest.fixture(scope='module')
+def executor():
+    with ProcessPoolExecutor(2) as executor:
+        yield executor
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+@pytest.mark.parametrize('program', sorted(PROGRAMS))
+def test_engine_matches_the_interpreter(engine, program):
+    expected = interpret(parse(PROGRAMS[program]))
+    assert ENGINES[engine](parse(PROGRAMS[program])) == expected
+
+
+@pytest.mark.parametrize('program', sorted(PROGRAMS))
+def test_parallel_interpreter_matches_the_interpreter(executor, program):
+    expected = interpret(parse(PROGRAMS[program]))
+    interpreter = ParallelInterpreter(parse(PROGRAMS[program]), 2, executor)
+    interpreter.interpret()
+    assert interpreter.GLOBAL_MEMORY == expected
+
+
+FAILING_GROUPS = [
+    # a loop group fails before a group run here
+    """object f {
+var b:INT = 0; var j:INT = 0;
+do { b = b + 100 / (j - 50); j = j + 1 } while (j < 100);
+var z:INT = 0; var late:INT = 3;
+var a:INT = 0; var i:INT = 0;
+do { a = a + i; i = i + 1 } while (i < 100)
+}""",
+    # a group run here fails while the loop groups are in the pool
+    """object g {
+var a:INT = 0; var i:INT = 0;
+do { a = a + i; i = i + 1 } while (i < 100);
+var z:INT = 0; var q:INT = 5 / z;
+var b:INT = 0; var j:INT = 0;
+do { b = b + 100 / (j - 50); j = j + 1 } while (j < 100)
+}""",
+    # x's group fails after y's first store only
+    """object h {
+var x:INT = 0; var y:INT = 0;
+do { x = x + 1 } while (x < 10);
+y = 1; x = x / (x - 10); y = 2;
+do { y = y + 1 } while (y < 10)
+}""",
+]
+
+
+@pytest.mark.parametrize('text', FAILING_GROUPS)
+def test_parallel_interpreter_fails_like_the_interpreter(executor, text):
+    interpreter = Interpreter(parse(text))
+    with pytest.raises(ZeroDivisionError):
+        interpreter.interpret()
+    parallel = ParallelInterpreter(parse(text), 2, executor)
+    with pytest.raises(ZeroDivisionError):
+        parallel.interpret()
+    assert parallel.GLOBAL_MEMORY == interpreter.GLOBAL_MEMORY
+
+
+@pytest.mark.parametrize('program', sorted(PROGRAMS))
+def test_vm_snapshots_resume_to_the_same_result(program):
+    expected = interpret(parse(PROGRAMS[program]))
+    code = Compiler().compile(parse(PROGRAMS[program]))
+    vm = VM(code)
+    pauses = 0
+    # a round trip through bytes at every other statement
+    while not vm.run(2):
+        vm = VM.restore(code, vm.snapshot())
+        pauses += 1
+    assert pauses > 1
+    assert vm.GLOBAL_MEMORY == expected
+
+
+def test_int_frame_snapshot_round_trip():
+    frame = IntFrame(5, [0, 1, 2, 3])
+    frame[0] = 7
+    frame[1] = 2 ** 70
+    frame[2] = -3
+    frame[4] = 1.5
+    copy = IntFrame(5, [0, 1, 2, 3])
+    copy.restore(frame.snapshot())
+    assert list(copy) == list(frame) == [7, 2 ** 70, -3, None, 1.5]
+    assert copy.promoted == frame.promoted == [1]
+    copy[1] = 4
+    assert copy.promoted == [] and frame[1] == 2 ** 70
+
+
+def tree_state(node):
+    """Class and attribute names of every object below `node`."""
+    state = [(type(node), sorted(vars(node)))]
+    for value in vars(node).values():
+        for item in value if isinstance(value, list) else [value]:
+            if hasattr(item, '__dict__') and not isinstance(item, type):
+                state += tree_state(item)
+    return state
+
+
+@pytest.mark.parametrize('program', sorted(PROGRAMS))
+def test_quickening_leaves_the_tree_as_it_found_it(program):
+    tree = parse(PROGRAMS[program])
+    before = tree_state(tree)
+    interpreter = QuickeningInterpreter(tree)
+    interpreter.interpret()
+    assert interpreter.rewrites
+    assert tree_state(tree) == before
+    # and the tree still runs the same elsewhere
+    assert interpret(tree) == interpret(parse(PROGRAMS[program]))
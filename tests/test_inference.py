@@ -0,0 +1,77 @@
+import pytest
+
+from scala_interpreter import (INT, INT_BINOPS, BinOp, Interpreter, Lexer,
+                               Num, Parser, TypeInferencer, UnaryOp, Var)
+from scala_interpreter.tokens import REM
+
+
+PROGRAM = """object T {
+var a:INT = 17; var b:INT = -5; var c:INT = 0;
+c = a + b * 2 - -a; c = c / b; c = a % b; c = -a % 3;
+do { var d:INT = c % 4; c = c + d + 1 } while (c < 40)
+}"""
+
+
+def parse(text=PROGRAM):
+    return Parser(Lexer(text), fused=True).parse()
+
+
+def expressions(node):
+    """Every expression node below `node`, depth first."""
+    if isinstance(node, (BinOp, UnaryOp, Num, Var)):
+        yield node
+    for child in vars(node).values():
+        for item in child if isinstance(child, list) else [child]:
+            if hasattr(item, '__dict__') and not isinstance(item, type):
+                yield from expressions(item)
+
+
+def run(tree):
+    interpreter = Interpreter(tree)
+    interpreter.interpret()
+    return interpreter.GLOBAL_MEMORY
+
+
+def test_int_expressions_get_int_ops():
+    tree = parse()
+    TypeInferencer().visit(tree)
+    found = list(expressions(tree))
+    assert any(isinstance(node, BinOp) for node in found)
+    for node in found:
+        assert node.static_type == INT
+        if isinstance(node, BinOp):
+            assert node.int_op is INT_BINOPS[node.op.type]
+
+
+def test_int_ops_compute_what_the_generic_path_does():
+    expected = run(parse())
+    tree = parse()
+    TypeInferencer().visit(tree)
+    assert run(tree) == expected
+    # only the untyped REM goes through floats
+    assert all(type(value) is int for value in run(tree).values())
+    assert type(expected['c']) is float
+
+
+def test_interpreter_calls_the_assigned_int_op():
+    tree = parse('object T { var a:INT = 7; var b:INT = a % 3 }')
+    TypeInferencer().visit(tree)
+    rem = tree.body.children[1].val
+    calls = []
+
+    def int_op(left, right):
+        calls.append((left, right))
+        return INT_BINOPS[REM](left, right)
+
+    rem.int_op = int_op
+    assert run(tree) == {'a': 7, 'b': 1}
+    assert calls == [(7, 3)]
+
+
+@pytest.mark.parametrize('expr', ['a / b', 'a % b', 'a % (b - b)'])
+def test_division_by_zero_still_raises(expr):
+    tree = parse('object T {{ var a:INT = 7; var b:INT = 0; '
+                 'var c:INT = {} }}'.format(expr))
+    TypeInferencer().visit(tree)
+    with pytest.raises(ZeroDivisionError):
+        run(tree)
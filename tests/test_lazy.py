@@ -0,0 +1,36 @@
+from scala_interpreter import (Interpreter, LazyBody, Lexer, Parser,
+                               TypeInferencer)
+from scala_interpreter.cli import main
+
+
+COLD = """object cold {
+var x:INT = 1; var y:INT = 0;
+if (x < 0) { y = y + 1; var t:INT = y * 2; y = t } else { y = 2 };
+do { x = x + 1 } while (x < 5)
+}"""
+
+
+def test_body_that_never_runs_stays_unparsed():
+    tree = Parser(Lexer(COLD), lazy=True).parse()
+    TypeInferencer().visit(tree)
+    interpreter = Interpreter(tree)
+    interpreter.interpret()
+    assert interpreter.GLOBAL_MEMORY == {'x': 5, 'y': 2}
+    cold = tree.body.children[2].body
+    assert isinstance(cold, LazyBody) and not cold.loaded
+    assert tree.body.children[2].else_block.loaded
+
+
+def test_inferred_types_reach_bodies_loaded_later():
+    tree = Parser(Lexer(COLD), lazy=True).parse()
+    TypeInferencer().visit(tree)
+    cold = tree.body.children[2].body
+    assert cold.children[0].right.int_op is not None
+
+
+def test_cli_never_parses_a_cold_body(tmp_path, capsys):
+    # the body is brace-balanced but not valid; --lazy never parses it
+    source = tmp_path / 'cold.scala'
+    source.write_text(COLD.replace('y = t }', 'y = = t }'))
+    main([str(source), '--lazy'])
+    assert capsys.readouterr().out.endswith('x = 5\ny = 2\n')
@@ -0,0 +1,121 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from scala_interpreter import (ASTDumper, Lexer, LineIndex, Parser,
+                               TokenBuffer, TokenColumns, TokenStream,
+                               lex_background, lex_batches, lex_parallel,
+                               tokenize, tokenize_columns)
+
+
+def program(bad_line):
+    lines = ['object A {']
+    lines += ['var v{0}:INT = {0};'.format(i) for i in range(50)]
+    lines += [bad_line, '}']
+    return '\n'.join(lines)
+
+
+BAD_CHARACTER = program('v3 = v3 $ 1;')
+BAD_SYNTAX = program('v3 = v3 + ;')
+
+
+@pytest.fixture(scope='module')
+def executor():
+    with ProcessPoolExecutor(3) as executor:
+        yield executor
+
+
+def error_of(func):
+    with pytest.raises(Exception) as raised:
+        func()
+    return str(raised.value)
+
+
+def test_line_index_matches_counting():
+    text = 'a\nbc\n\nd'
+    index = LineIndex(text)
+    for offset in range(len(text) + 1):
+        line = text.count('\n', 0, offset) + 1
+        column = offset - (text.rfind('\n', 0, offset) + 1) + 1
+        assert index.location(offset) == (line, column)
+
+
+def test_token_positions_point_into_the_source():
+    for token in tokenize(BAD_SYNTAX):
+        assert BAD_SYNTAX[token.pos:].upper().startswith(
+            str(token.value).upper())
+
+
+def test_lex_error_location_is_the_same_on_every_path(executor):
+    expected = "Invalid character '$' at line 52, column 9"
+    assert error_of(lambda: tokenize(BAD_CHARACTER)) == expected
+    assert error_of(lambda: Parser(TokenBuffer(
+        lex_background(BAD_CHARACTER), text=BAD_CHARACTER)).parse()) \
+        == expected
+    for workers in (2, 3):
+        assert error_of(lambda: lex_parallel(BAD_CHARACTER, workers,
+                                             executor)) == expected
+
+
+def test_parse_error_location_is_the_same_on_every_path(executor):
+    expected = ("Invalid syntax at line 52, column 11: "
+                "unexpected Token(SEMI, ';')")
+    assert error_of(lambda: Parser(Lexer(BAD_SYNTAX)).parse()) == expected
+    assert error_of(lambda: Parser(Lexer(BAD_SYNTAX), lazy=True).parse()) \
+        == expected
+    for workers in (2, 3):
+        assert error_of(lambda: Parser(lex_parallel(
+            BAD_SYNTAX, workers, executor)).parse_parallel(
+                workers, executor)) == expected
+
+
+def test_positions_survive_parallel_lexing(executor):
+    stream = lex_parallel(BAD_SYNTAX, 3, executor)
+    assert stream.positions == [token.pos for token in tokenize(BAD_SYNTAX)]
+
+
+def sources(text, executor):
+    """A fresh token source of each kind over `text`."""
+    types, values, positions, name_ids = tokenize_columns(text)
+    return {
+        'lexer': lambda: Lexer(text),
+        'stream': lambda: TokenStream(tokenize(text), text),
+        'columns': lambda: TokenColumns(types, values, positions, text,
+                                        name_ids),
+        'batches': lambda: TokenBuffer(lex_batches(text, 4), text=text),
+        'background': lambda: TokenBuffer(lex_background(text, 4),
+                                          text=text),
+        'parallel': lambda: lex_parallel(text, 2, executor),
+    }
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('object M { var x:INT = 7; x = ', 'line 1, column 31'),
+    ('object M {\n var x:INT = 7;\n x = x +', 'line 3, column 9'),
+    ('object M { var x:INT = 7', 'line 1, column 25'),
+])
+def test_end_of_input_errors_have_a_location_on_every_source(
+        executor, text, expected):
+    for name, source in sources(text, executor).items():
+        message = error_of(lambda: Parser(source()).parse())
+        assert message.startswith('Invalid syntax at ' + expected), name
+        assert 'EOF' in message, name
+
+
+def test_a_body_cut_short_ends_at_its_closing_brace(executor):
+    # the statement cut short by '}' in the if, and the object's last one
+    for text in ('object M { var x:INT = 7;\n'
+                 'if (x > 1) { x = x + } else { x = 2 }; x = 1 }',
+                 'object M { var x:INT = 7;\n'
+                 'var y:INT = 1; var z:INT = 2; x = x + }'):
+        expected = error_of(lambda: Parser(Lexer(text)).parse())
+        assert expected.startswith('Invalid syntax at line 2, column ')
+        location = expected.split(':')[0]
+        # dumping the tree parses every lazy body
+        lazy = error_of(lambda: ASTDumper().dump(
+            Parser(Lexer(text), lazy=True).parse()))
+        assert lazy.split(':')[0] == location
+        for workers in (2, 3):
+            parallel = error_of(lambda: Parser(lex_parallel(
+                text, workers, executor)).parse_parallel(workers, executor))
+            assert parallel.split(':')[0] == location
@@ -0,0 +1,99 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from scala_interpreter import (Interpreter, Lexer, NameTable, Parser,
+                               SymbolTableBuilder, TokenBuffer, lex_background,
+                               lex_parallel, tokenize, tokenize_columns)
+from scala_interpreter.tokens import ID
+
+
+def program(count):
+    lines = ['object A {', 'var total:INT = 0;']
+    lines += ['var name{0}:INT = {0};'.format(i) for i in range(count)]
+    lines += ['total = total + name{};'.format(i) for i in range(count)]
+    lines += ['if (total > 0) { var inner:INT = total; total = inner * 2 }', '}']
+    return '\n'.join(lines)
+
+
+TEXT = program(40)
+
+
+@pytest.fixture(scope='module')
+def executor():
+    with ProcessPoolExecutor(3) as executor:
+        yield executor
+
+
+def run(tree):
+    interpreter = Interpreter(tree)
+    interpreter.interpret()
+    return interpreter.GLOBAL_MEMORY
+
+
+def test_every_lexer_has_a_table_of_its_own():
+    first = Lexer(TEXT)
+    tokenize_columns(TEXT, names=first.names)
+    size = len(first.names)
+    tokenize(program(200))
+    assert len(first.names) == size
+    assert Lexer(TEXT).names is not first.names
+
+
+def test_name_ids_index_the_lexers_table():
+    names = NameTable()
+    for token in tokenize(TEXT, names):
+        if token.type == ID:
+            assert names.names[token.name_id] is token.value
+        else:
+            assert token.name_id is None
+
+
+def test_lex_parallel_carries_the_name_ids(executor):
+    expected = tokenize_columns(TEXT)
+    for workers in (2, 3):
+        stream = lex_parallel(TEXT, workers, executor)
+        assert (stream.types, stream.values, stream.positions,
+                stream.name_ids) == expected
+        for index in range(len(stream.types)):
+            token = stream.get_next_token()
+            if token.type == ID:
+                assert stream.names.names[token.name_id] is token.value
+
+
+def test_lex_background_carries_the_name_ids():
+    names = NameTable()
+    names.intern('unrelated')
+    buffer = TokenBuffer(lex_background(TEXT, 16, names), text=TEXT,
+                         names=names)
+    tokens = tokenize(TEXT)
+    for expected in tokens:
+        token = buffer.get_next_token()
+        assert (token.type, token.value) == (expected.type, expected.value)
+        if token.type == ID:
+            assert names.names[token.name_id] == token.value
+
+
+def test_symbol_table_ignores_ids_of_another_table():
+    expected = run(Parser(Lexer(TEXT), fused=True).parse())
+    tree = Parser(Lexer(TEXT)).parse()
+    # a table that already gave the program's first ids to other names
+    names = NameTable()
+    for name in ('x', 'y', 'z', 'w'):
+        names.intern(name)
+    SymbolTableBuilder(names).visit(tree)
+    assert run(tree) == expected
+
+
+def test_parallel_paths_resolve_like_the_lexer(executor):
+    expected = run(Parser(Lexer(TEXT), fused=True).parse())
+    stream = lex_parallel(TEXT, 3, executor)
+    parser = Parser(stream, fused=True)
+    tree = parser.parse_parallel(3, executor)
+    assert parser.symtab.names is stream.names
+    assert run(tree) == expected
+    names = NameTable()
+    parser = Parser(TokenBuffer(lex_background(TEXT, names=names),
+                                text=TEXT, names=names), fused=True)
+    assert run(parser.parse()) == expected
+    assert parser.symtab.names is names
@@ -0,0 +1,160 @@
+import itertools
+
+import pytest
+
+from scala_interpreter import (ClosedFormLoop, ExecutionGovernor,
+                               ExecutionLimitExceeded, Interpreter, Lexer,
+                               MemoInterpreter, Optimizer, Parser,
+                               QuickeningInterpreter, TracingInterpreter,
+                               TypeInferencer, UnrolledLoop)
+
+
+ENGINES = [Interpreter, QuickeningInterpreter, MemoInterpreter,
+           TracingInterpreter]
+
+FLIPPED = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '==': '=='}
+
+
+def build(text, optimizer=None):
+    tree = Parser(Lexer(text), fused=True).parse()
+    TypeInferencer().visit(tree)
+    if optimizer is not None:
+        optimizer.optimize(tree)
+    return tree
+
+
+def run(tree, engine=Interpreter, max_steps=None):
+    """Final memory, or the error the program stopped with."""
+    governor = ExecutionGovernor(max_steps=max_steps) if max_steps else None
+    interpreter = engine(tree, governor)
+    try:
+        interpreter.interpret()
+    except ExecutionLimitExceeded:
+        return 'limit'
+    except ZeroDivisionError:
+        return 'zero division', dict(interpreter.GLOBAL_MEMORY)
+    return interpreter.GLOBAL_MEMORY
+
+
+def contains(node, kind):
+    if isinstance(node, kind):
+        return True
+    children = node.__dict__.values() if hasattr(node, '__dict__') else ()
+    for child in children:
+        for item in child if isinstance(child, list) else [child]:
+            if hasattr(item, '__dict__') and contains(item, kind):
+                return True
+    return False
+
+
+def counting_loop(start, step, bound, cond):
+    return """object t {{
+var b:INT = {2}; var i:INT = {0}; var s:INT = 1; var u:INT = 2; var k:INT = 0;
+do {{ s = s + i; i = i + {1}; u = u - i; k = b * 2 }} while ({3})
+}}""".format(start, step, bound, cond)
+
+
+@pytest.mark.parametrize('op', sorted(FLIPPED))
+@pytest.mark.parametrize('flip', [False, True])
+def test_closed_form_matches_iterating(op, flip):
+    summarized = 0
+    for start, step, bound in itertools.product([0, 5, -3, 10],
+                                                [1, 2, 3, -1, -2, 0],
+                                                [0, 4, 7, 10, -5]):
+        if step == 0 and op != '==':
+            continue
+        cond = 'b {} i'.format(FLIPPED[op]) if flip else 'i {} b'.format(op)
+        text = counting_loop(start, step, bound, cond)
+        # loops that never end run into the governor both ways
+        expected = run(build(text), max_steps=2000)
+        for engine in ENGINES:
+            optimizer = Optimizer(max_unroll=1)
+            assert run(build(text, optimizer), engine, 2000) == expected, \
+                (text, engine)
+            summarized += optimizer.summarized
+    assert summarized
+
+
+def test_closed_form_skips_the_iterations():
+    text = counting_loop(0, 1, 10 ** 6, 'i < b')
+    tree = build(text, Optimizer())
+    assert contains(tree, ClosedFormLoop)
+    assert run(tree) == {'b': 10 ** 6, 'i': 10 ** 6, 's': 499999500001,
+                         'u': 2 - 500000500000, 'k': 2 * 10 ** 6}
+
+
+UNROLL_BODIES = [
+    's = (s + i) % 97; i = i + {step}',
+    'var t:INT = i * 2; s = s + t % 5; i = {step} + i',
+    'if (s > 5) {{ s = s - 5 }} else {{ s = i }}; i = i + {step}',
+    'i = i + {step}; s = s + i % 4',
+]
+
+
+@pytest.mark.parametrize('factor', [2, 3, 4])
+@pytest.mark.parametrize('body', range(len(UNROLL_BODIES)))
+def test_unrolled_loops_run_the_remainder_trips(factor, body):
+    unrolled = 0
+    # trip counts on both sides of every multiple of the factor
+    for step, bound in itertools.product([1, 2, 3], range(0, 14)):
+        text = """object t {{
+var b:INT = {0}; var i:INT = 1; var s:INT = 0;
+do {{ {1} }} while (i < b)
+}}""".format(bound, UNROLL_BODIES[body].format(step=step))
+        expected = run(build(text))
+        for engine in ENGINES:
+            optimizer = Optimizer(max_unroll=factor)
+            tree = build(text, optimizer)
+            assert run(tree, engine) == expected, (text, engine)
+            unrolled += optimizer.unrolled
+    assert unrolled
+
+
+def test_governed_unrolled_loop_stops_like_the_original():
+    text = """object t {
+var i:INT = 1; var s:INT = 0;
+do { s = (s + i) % 97; i = i + 1 } while (s < 1000)
+}"""
+    tree = build(text, Optimizer(max_unroll=4))
+    assert contains(tree, UnrolledLoop)
+    assert run(tree, max_steps=25) == run(build(text), max_steps=25) \
+        == 'limit'
+
+
+@pytest.mark.parametrize('store', [
+    'x = 1 / z; x = 2',
+    'x = 5 % z; x = 2',
+    'x = -(3 / (z + 0)); x = 2',
+    'var d:INT = 4 / z; x = 2',
+    'if (x > 0) { x = 7 % z } else { x = 1 }; x = 2',
+])
+def test_dead_stores_that_may_raise_still_raise(store):
+    text = 'object t {{ var z:INT = 0; var x:INT = 1; {} }}'.format(store)
+    expected = run(build(text))
+    assert expected[0] == 'zero division'
+    for engine in ENGINES:
+        assert run(build(text, Optimizer()), engine) == expected
+
+
+def test_dead_stores_are_removed():
+    text = """object t {
+var z:INT = 3; var x:INT = 1;
+x = 1 / z; x = z * 4; x = 2;
+if (z > 5) { var w:INT = z; x = w } else { var w:INT = z + 1 }
+}"""
+    optimizer = Optimizer()
+    tree = build(text, optimizer)
+    assert optimizer.removed
+    assert run(tree) == run(build(text)) == {'z': 3, 'x': 2}
+
+
+def test_constant_branches_are_pruned():
+    text = """object t {
+var x:INT = 1;
+if (2 > 1) { x = x + 1 } else { x = x / 0 };
+do { x = x * 3 } while (1 == 2)
+}"""
+    optimizer = Optimizer()
+    tree = build(text, optimizer)
+    assert optimizer.removed
+    assert run(tree) == run(build(text)) == {'x': 6}
@@ -0,0 +1,69 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from scala_interpreter import (AST, ASTDumper, Interpreter, Lexer, Parser,
+                               SymbolTableBuilder, Token, split_statements,
+                               tokenize)
+
+
+ELSE_AFTER_SEMI = """object p {
+var x:INT = 1; var y:INT = 0; var z:INT = 0;
+if (x == 1) { y = 5 }; else { y = 6 };
+z = y + 1;
+if (x == 2) { z = z * 2 }; else { z = z * 3 };
+do { x = x + 1 } while (x < 4);
+if (x < 9) { y = y + x } else { y = 0 }
+}"""
+
+
+@pytest.fixture(scope='module')
+def executor():
+    with ProcessPoolExecutor(2) as executor:
+        yield executor
+
+
+def resolved(tree):
+    SymbolTableBuilder().visit(tree)
+    return tree
+
+
+def run(tree):
+    interpreter = Interpreter(tree)
+    interpreter.interpret()
+    return interpreter.GLOBAL_MEMORY
+
+
+@pytest.mark.parametrize('workers', [2, 3, 4, 6])
+def test_parse_parallel_matches_parse(executor, workers):
+    expected = resolved(Parser(Lexer(ELSE_AFTER_SEMI)).parse())
+    tree = resolved(Parser(Lexer(ELSE_AFTER_SEMI)).parse_parallel(
+        workers, executor))
+    assert ASTDumper().dump(tree) == ASTDumper().dump(expected)
+    assert run(tree) == run(expected) == {'x': 4, 'y': 9, 'z': 18}
+
+
+def tokens_of(node):
+    """(type, value, pos) of every token in the tree, in a fixed order."""
+    found = []
+    for name, value in sorted(vars(node).items()):
+        for item in value if isinstance(value, list) else [value]:
+            if isinstance(item, Token):
+                found.append((name, item.type, item.value, item.pos))
+            elif isinstance(item, AST):
+                found.extend(tokens_of(item))
+    return found
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_parse_parallel_keeps_token_positions(executor, workers):
+    expected = tokens_of(Parser(Lexer(ELSE_AFTER_SEMI)).parse())
+    tree = Parser(Lexer(ELSE_AFTER_SEMI)).parse_parallel(workers, executor)
+    assert tokens_of(tree) == expected
+    assert all(pos is not None for _, _, _, pos in expected)
+
+
+def test_statement_split_keeps_else_after_semi():
+    types = [token.type for token in tokenize(ELSE_AFTER_SEMI)][3:-1]
+    starts = split_statements(types)
+    assert all(types[start] != 'ELSE' for start in starts)
@@ -0,0 +1,111 @@
+import pytest
+
+from scala_interpreter import (AST_VERSION, ASTDumper, ASTFormatError,
+                               Interpreter, Lexer, Parser, SymbolTableBuilder,
+                               TypeInferencer, deserialize_ast, load_ast,
+                               serialize_ast)
+from scala_interpreter.cli import main, parse_args
+
+
+PROGRAM = '''object P {
+  var i:INT = 0; var s:INT = 0;
+  do { var step:INT = i % 7; s = s + step; i = i + 1 } while (i < 100);
+  if (s < 0) { var never:INT = 1; s = never } else { var t:INT = s * 2; s = t + 1 }
+}'''
+
+
+def resolved_tree():
+    return Parser(Lexer(PROGRAM), fused=True).parse()
+
+
+def run(tree):
+    TypeInferencer().visit(tree)
+    interpreter = Interpreter(tree)
+    interpreter.interpret()
+    return interpreter.GLOBAL_MEMORY
+
+
+def test_resolved_ast_runs_without_resolving(tmp_path):
+    tree = resolved_tree()
+    expected = ASTDumper().dump(tree)
+    path = tmp_path / 'program.sast'
+    path.write_bytes(serialize_ast(tree, resolved=True))
+    for loaded in (deserialize_ast(path.read_bytes(), lazy=False),
+                   load_ast(str(path))):
+        assert ASTDumper().dump(loaded) == expected
+        assert run(loaded) == {'i': 100, 's': 591}
+
+
+def test_resolved_ast_decodes_only_the_bodies_that_run():
+    tree = deserialize_ast(serialize_ast(resolved_tree(), resolved=True))
+    if_stmt = tree.body.children[-1]
+    run(tree)
+    assert not if_stmt.body.loaded
+    assert if_stmt.else_block.loaded
+
+
+def test_syntax_only_ast_still_needs_resolving():
+    tree = deserialize_ast(serialize_ast(resolved_tree()), lazy=False)
+    SymbolTableBuilder().visit(tree)
+    assert ASTDumper().dump(tree) == ASTDumper().dump(resolved_tree())
+
+
+def test_resolved_ast_needs_a_resolved_tree():
+    with pytest.raises(ValueError):
+        serialize_ast(Parser(Lexer(PROGRAM)).parse(), resolved=True)
+
+
+def test_every_truncation_is_a_format_error():
+    data = serialize_ast(resolved_tree(), resolved=True)
+    for size in range(len(data)):
+        with pytest.raises(ASTFormatError):
+            deserialize_ast(data[:size], lazy=False)
+
+
+def test_bad_headers_and_trailing_data_are_format_errors(tmp_path):
+    data = serialize_ast(resolved_tree(), resolved=True)
+    version = len(b'SAST')
+    for bad in (b'', b'PYC0' + data[4:],
+                data[:version] + bytes([AST_VERSION + 1]) + data[version + 1:],
+                data + b'\0'):
+        with pytest.raises(ASTFormatError):
+            deserialize_ast(bad)
+    empty = tmp_path / 'empty.sast'
+    empty.write_bytes(b'')
+    with pytest.raises(ASTFormatError):
+        load_ast(str(empty))
+
+
+def test_a_lazy_body_reports_corruption_when_decoded():
+    data = bytearray(serialize_ast(resolved_tree(), resolved=True))
+    # the last byte belongs to the else block; no such node tag exists
+    data[-1] = 0xff
+    tree = deserialize_ast(bytes(data))
+    with pytest.raises(ASTFormatError):
+        tree.body.children[-1].else_block.children
+
+
+def test_cli_runs_the_ast_it_wrote(tmp_path, capsys):
+    source = tmp_path / 'program.scala'
+    source.write_text(PROGRAM)
+    main([str(source)])
+    expected = capsys.readouterr().out.split('Run-time')[-1]
+    main(['ast', str(source)])
+    assert capsys.readouterr().out.endswith(
+        'Wrote {}\n'.format(tmp_path / 'program.sast'))
+    for argv in ([str(tmp_path / 'program.sast')],
+                 [str(tmp_path / 'program.sast'), '--engine', 'vm']):
+        main(argv)
+        assert capsys.readouterr().out.split('Run-time')[-1] == expected
+
+
+@pytest.mark.parametrize('option', ['--fused', '--lazy', '--pipeline',
+                                    '--jobs=2', '--profile', '--pgo'])
+def test_options_needing_program_text_are_rejected_for_an_ast(option):
+    with pytest.raises(SystemExit):
+        parse_args(['program.sast', option])
+
+
+def test_cli_knows_the_ast_suffix_without_importing_serialize():
+    from scala_interpreter import AST_SUFFIX, cli
+    assert cli.AST_SUFFIX == AST_SUFFIX
@@ -0,0 +1,99 @@
+import pytest
+
+from scala_interpreter import (VM, Compiler, Interpreter, Lexer, Parser,
+                               ScopedSymbolTable, SymbolTable,
+                               SymbolTableBuilder)
+
+
+SHADOWING = """object S {
+var x:INT = 1; var y:INT = 2; var out:INT = 0;
+if (x < y) { var x:INT = 10; out = x + y; var y:INT = x * 3; out = out + y }
+else { out = 0 };
+do { var x:INT = out; var z:INT = x + 1; out = z; y = y + 1 } while (y < 5);
+out = out + x
+}"""
+
+
+def run(tree):
+    interpreter = Interpreter(tree)
+    interpreter.interpret()
+    return interpreter.GLOBAL_MEMORY
+
+
+def test_a_plain_parse_runs_as_it_always_did():
+    tree = Parser(Lexer(SHADOWING)).parse()
+    assert not tree.resolved
+    assert run(tree) == {'x': 1, 'y': 5, 'out': 46}
+    assert tree.resolved
+    vm = VM(Compiler().compile(Parser(Lexer(SHADOWING)).parse()))
+    vm.run()
+    assert vm.GLOBAL_MEMORY == {'x': 1, 'y': 5, 'out': 46}
+
+
+def test_inner_declarations_shadow_only_inside_their_block():
+    for fused in (False, True):
+        tree = Parser(Lexer(SHADOWING), fused=fused).parse()
+        if not fused:
+            SymbolTableBuilder().visit(tree)
+        assert run(tree) == {'x': 1, 'y': 5, 'out': 46}
+
+
+def test_vars_resolve_to_depth_and_slot():
+    tree = Parser(Lexer(SHADOWING), fused=True).parse()
+    body = tree.body
+    assert (body.depth, body.slot_names) == (0, ['x', 'y', 'out'])
+    if_stmt, do_stmt, last = body.children[3], body.children[4], \
+        body.children[5]
+    then = if_stmt.body
+    assert (then.depth, then.slot_names) == (1, ['x', 'y'])
+    # `out = x + y` reads the inner x and the still outer y
+    out = then.children[1]
+    assert (out.left.depth, out.left.slot) == (0, 2)
+    assert (out.right.left.depth, out.right.left.slot) == (1, 0)
+    assert (out.right.right.depth, out.right.right.slot) == (0, 1)
+    loop = do_stmt.do_body
+    assert (loop.depth, loop.slot_names) == (1, ['x', 'z'])
+    # the condition is outside the body: y is the object's
+    assert (do_stmt.condition.left.depth, do_stmt.condition.left.slot) \
+        == (0, 1)
+    assert (last.right.right.depth, last.right.right.slot) == (0, 0)
+
+
+def test_symbol_table_is_the_scoped_table():
+    assert SymbolTable is ScopedSymbolTable
+    table = SymbolTable()
+    assert table.lookup('INT') is not None and table.lookup('x') is None
+
+
+def test_undeclared_names_are_name_errors_when_run():
+    tree = Parser(Lexer('object U { var x:INT = 1; y = x }')).parse()
+    with pytest.raises(NameError):
+        Interpreter(tree)
+
+
+@pytest.mark.parametrize('body', [
+    'y = 1',
+    'var x:INT = y; var y:INT = 2',
+    'var x:INT = x + 1',
+    'if (1 < 2) { var t:INT = 1 } else { var t:INT = 2 }; var u:INT = t',
+    'do { var t:INT = 1 } while (t < 2)',
+    'var x:INT = 1; x = x + undeclared',
+])
+def test_undeclared_names_are_name_errors_on_both_paths(body):
+    text = 'object U {{ {} }}'.format(body)
+    with pytest.raises(NameError):
+        Parser(Lexer(text), fused=True).parse()
+    tree = Parser(Lexer(text)).parse()
+    with pytest.raises(NameError):
+        SymbolTableBuilder().visit(tree)
+
+
+def test_statements_run_without_a_tree():
+    # as ParallelInterpreter's workers run them
+    tree = Parser(Lexer('object W { var a:INT = 2; var b:INT = a * 3 }'),
+                  fused=True).parse()
+    interpreter = Interpreter(None)
+    interpreter.frames = [[None] * tree.body.frame_size]
+    for statement in tree.body.children:
+        interpreter.visit(statement)
+    assert interpreter.frames == [[2, 6]]
@@ -0,0 +1,68 @@
+import pytest
+
+from scala_interpreter import (VM, Compiler, ExecutionGovernor,
+                               ExecutionLimitExceeded, Interpreter, Lexer,
+                               Parser, SnapshotError, TypeInferencer)
+
+
+LOOP = """object loop {
+var i:INT = 0; var s:INT = 0;
+do { s = s + i * 3; i = i + 1 } while (i < 50);
+var t:INT = s % 7
+}"""
+
+
+def parse(text):
+    tree = Parser(Lexer(text), fused=True).parse()
+    TypeInferencer().visit(tree)
+    return tree
+
+
+def interpret(tree):
+    interpreter = Interpreter(tree)
+    interpreter.interpret()
+    return interpreter.GLOBAL_MEMORY
+
+
+def test_governor_stops_vm_at_a_resumable_statement():
+    tree = parse(LOOP)
+    code = Compiler().compile(tree)
+    vm = VM(code)
+    with pytest.raises(ExecutionLimitExceeded) as stopped:
+        vm.run(governor=ExecutionGovernor(max_steps=3))
+    assert stopped.value.memory == vm.GLOBAL_MEMORY
+    assert not vm.finished
+    resumed = VM.restore(code, vm.snapshot())
+    assert resumed.run()
+    assert resumed.GLOBAL_MEMORY == interpret(tree)
+
+
+NESTED = """object nested {
+var i:INT = 0; var s:INT = 0;
+do { var j:INT = 0; do { s = s + j; j = j + 1 } while (j < 4);
+     if (s > 20) { s = s - 20 } else { s = s + 1 }; i = i + 1 } while (i < 30)
+}"""
+
+
+@pytest.mark.parametrize('max_steps', [1, 3, 10, 57, 200])
+def test_vm_counts_steps_like_the_interpreter(max_steps):
+    tree = parse(NESTED)
+    interpreter = Interpreter(tree, ExecutionGovernor(max_steps=max_steps))
+    with pytest.raises(ExecutionLimitExceeded) as expected:
+        interpreter.interpret()
+    vm = VM(Compiler().compile(tree))
+    with pytest.raises(ExecutionLimitExceeded) as stopped:
+        vm.run(governor=ExecutionGovernor(max_steps=max_steps))
+    assert stopped.value.steps == expected.value.steps
+    assert stopped.value.memory == interpreter.GLOBAL_MEMORY
+
+
+def test_snapshots_of_another_python_are_refused(monkeypatch):
+    from scala_interpreter import vm as vm_module
+    code = Compiler().compile(parse(LOOP))
+    vm = VM(code)
+    vm.run(5)
+    data = vm.snapshot()
+    monkeypatch.setattr(vm_module, 'PYTHON_TAG', 'cpython-0')
+    with pytest.raises(SnapshotError):
+        VM.restore(code, data)